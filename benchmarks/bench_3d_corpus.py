@@ -0,0 +1,237 @@
+"""
+3D模型转换分阶段基准测试
+Per stage benchmark of the 3D model conversion on the benchmark corpus
+
+用法 / Usage:
+    python benchmarks/bench_3d_corpus.py [model.obj[.gz] ...] [--repeat N] [--compress]
+        [--profile DIR [--profiler cprofile|pyinstrument]]
+
+不传文件时使用 benchmarks/corpus/3d 中的语料（小型无源器件、QFN、大型连接器、模块），
+也可以传入从EasyEDA下载的OBJ文件。每个模型分别计时 get_materials、get_vertices、
+get_vertices_numpy、generate_wrl_model 以及写入文件，并报告每秒处理的面数和内存峰值。
+为了让各模型的内存峰值互不影响，每个模型在单独的子进程中测试；RSS列是子进程的峰值RSS，
+base列是导入完成后、转换之前的RSS。
+Without files the corpus in benchmarks/corpus/3d is used (small passive, QFN, large
+connector, module), OBJ files downloaded from EasyEDA can be passed as well. get_materials,
+get_vertices, get_vertices_numpy, generate_wrl_model and the file write are timed separately
+for every model, and the throughput in faces per second and the peak memory are reported.
+Every model is measured in a child process of its own so that the peaks don't affect each
+other. The RSS column is the peak RSS of the child, base is the RSS after the imports and
+before the conversion.
+
+每个模型还用默认选项做一次网格优化，优化后的WRL比未优化的大时基准测试失败。
+Every model is also exported once with the default mesh optimisation, the benchmark fails
+when the optimised WRL is larger than the unoptimised one.
+
+--profile 把每个模型完整导出（write_wrl_model）的性能分析结果写入目录：cProfile 生成
+<模型>.prof（可用 snakeviz 或 pstats 查看）并打印耗时最多的函数，pyinstrument 生成 <模型>.html。
+--profile writes a profile of the full export (write_wrl_model) of every model to a directory:
+cProfile writes <model>.prof (open it with snakeviz or pstats) and prints the most expensive
+functions, pyinstrument writes <model>.html.
+"""
+
+import argparse
+import cProfile
+import gzip
+import io
+import multiprocessing
+import os
+import pstats
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+try:
+    import resource
+except ImportError:
+    # Windows没有resource模块，不报告RSS
+    # Windows has no resource module, RSS isn't reported
+    resource = None
+
+from src.core.easyeda.parameters_easyeda import Ee3dModel, Ee3dModelBase
+from src.core.kicad.export_kicad_3d_model import (
+    generate_wrl_model,
+    get_materials,
+    get_vertices,
+    get_vertices_numpy,
+    get_wrl_extension,
+    open_wrl_file,
+    parse_material_block,
+    write_wrl_model,
+)
+from src.core.kicad.mesh_processing import MeshOptions
+
+CORPUS_DIR = repo_root / "benchmarks" / "corpus" / "3d"
+
+STAGES = ("materials", "vertices", "vertices_np", "generate", "write")
+
+
+def read_obj(path: Path) -> bytes:
+    """读取OBJ文件，.gz 文件先解压 / Read an OBJ file, .gz files are decompressed"""
+    if path.suffix == ".gz":
+        with gzip.open(path, "rb") as obj_file:
+            return obj_file.read()
+    return path.read_bytes()
+
+
+def get_model_name(path: Path) -> str:
+    return path.name.split(".")[0]
+
+
+def make_model(name: str, raw_obj: bytes) -> Ee3dModel:
+    origin = Ee3dModelBase(x=0, y=0, z=0)
+    return Ee3dModel(name=name, uuid=name, translation=origin, rotation=origin, raw_obj=raw_obj)
+
+
+def get_rss_mb() -> float:
+    """当前进程的峰值RSS（MB），不支持时为0 / Peak RSS of this process in MB, 0 when unsupported"""
+    if resource is None:
+        return 0.0
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux以KB为单位，macOS以字节为单位 / Kilobytes on Linux, bytes on macOS
+    return max_rss / (1e6 if sys.platform == "darwin" else 1e3)
+
+
+def best_time(func, repeat: int, setup=None) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def measure_model(path: Path, repeat: int, compress: bool) -> dict:
+    """
+    在子进程中运行：分阶段计时一个模型并返回结果
+    Runs in a child process: time the stages of one model and return the results
+    """
+    raw_obj = read_obj(path)
+    model = make_model(get_model_name(path), raw_obj)
+    result = {
+        "faces": raw_obj.count(b"\nf "),
+        "obj_mb": len(raw_obj) / 1e6,
+        "base_mb": get_rss_mb(),
+    }
+
+    # 材质解析结果有缓存，每次计时前清空，测量的是冷缓存耗时
+    # Parsed materials are cached, the cache is cleared before every run to time a cold cache
+    result["materials"] = best_time(
+        lambda: get_materials(raw_obj), repeat, setup=parse_material_block.cache_clear
+    )
+    result["vertices"] = best_time(lambda: get_vertices(raw_obj), repeat)
+    result["vertices_np"] = best_time(lambda: get_vertices_numpy(raw_obj), repeat)
+
+    wrl_models = []
+    result["generate"] = best_time(
+        lambda: wrl_models.append(generate_wrl_model(model)), repeat, setup=wrl_models.clear
+    )
+    raw_wrl = wrl_models[0].raw_wrl
+    del wrl_models
+    result["wrl_mb"] = len(raw_wrl) / 1e6
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        wrl_path = os.path.join(temp_dir, f"{model.name}.{get_wrl_extension(compress)}")
+
+        def write_file():
+            with open_wrl_file(wrl_path, compress) as wrl_file:
+                wrl_file.write(raw_wrl)
+
+        result["write"] = best_time(write_file, repeat)
+        del raw_wrl
+        result["stream"] = best_time(
+            lambda: write_wrl_model(model, wrl_path, compress=compress), repeat
+        )
+        mesh_stats = write_wrl_model(model, wrl_path, mesh_options=MeshOptions(), compress=compress)
+        result["mesh_before"] = mesh_stats.wrl_size_before
+        result["mesh_after"] = mesh_stats.wrl_size_after
+        result["mesh_layout"] = mesh_stats.wrl_layout
+    result["rss_mb"] = get_rss_mb()
+    return result
+
+
+def profile_model(path: Path, output_dir: Path, profiler: str, compress: bool) -> None:
+    """对一个模型的完整导出做性能分析 / Profile the full export of one model"""
+    model = make_model(get_model_name(path), read_obj(path))
+    with tempfile.TemporaryDirectory() as temp_dir:
+        wrl_path = os.path.join(temp_dir, f"{model.name}.{get_wrl_extension(compress)}")
+        if profiler == "pyinstrument":
+            from pyinstrument import Profiler
+
+            pyinstrument_profiler = Profiler()
+            with pyinstrument_profiler:
+                write_wrl_model(model, wrl_path, compress=compress)
+            output_path = output_dir / f"{model.name}.html"
+            output_path.write_text(pyinstrument_profiler.output_html(), encoding="utf-8")
+        else:
+            cprofile_profiler = cProfile.Profile()
+            cprofile_profiler.runcall(write_wrl_model, model, wrl_path, compress=compress)
+            output_path = output_dir / f"{model.name}.prof"
+            cprofile_profiler.dump_stats(output_path)
+            stream = io.StringIO()
+            pstats.Stats(cprofile_profiler, stream=stream).sort_stats("cumulative").print_stats(12)
+            print(stream.getvalue())
+    print(f"{model.name}: profile written to {output_path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("models", nargs="*", type=Path, help="OBJ files, the corpus when empty")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compress", action="store_true", help="write .wrz files")
+    parser.add_argument("--profile", type=Path, metavar="DIR", help="write profiles to DIR")
+    parser.add_argument(
+        "--profiler", choices=("cprofile", "pyinstrument"), default="cprofile", help="profiler for --profile"
+    )
+    args = parser.parse_args()
+
+    paths = args.models or sorted(CORPUS_DIR.glob("*.obj.gz"))
+    if not paths:
+        raise SystemExit(f"No models given and no corpus in {CORPUS_DIR}")
+    if args.profile and args.profiler == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            raise SystemExit("pyinstrument is not installed, use --profiler cprofile")
+
+    print(
+        f"{'model':<24} {'faces':>8} {'obj MB':>7} {'WRL MB':>7}"
+        + "".join(f" {stage:>11}" for stage in STAGES)
+        + f" {'stream':>8} {'faces/s':>10} {'base MB':>8} {'RSS MB':>7} {'mesh':>7} {'layout':>9}"
+    )
+    # spawn 让每个子进程从干净的解释器开始，RSS不继承父进程
+    # spawn starts every child from a fresh interpreter, the RSS isn't inherited from the parent
+    context = multiprocessing.get_context("spawn")
+    larger_models = []
+    for path in paths:
+        with context.Pool(1) as pool:
+            result = pool.apply(measure_model, (path, args.repeat, args.compress))
+        print(
+            f"{get_model_name(path)[:24]:<24} {result['faces']:>8,} {result['obj_mb']:>7.2f} {result['wrl_mb']:>7.2f}"
+            + "".join(f" {result[stage] * 1e3:>9.1f}ms" for stage in STAGES)
+            + f" {result['stream']:>7.3f}s {result['faces'] / result['generate']:>10,.0f}"
+            f" {result['base_mb']:>8.1f} {result['rss_mb']:>7.1f}"
+            f" {1 - result['mesh_after'] / result['mesh_before']:>7.1%} {result['mesh_layout']:>9}"
+        )
+        if result["mesh_after"] > result["mesh_before"]:
+            larger_models.append(get_model_name(path))
+
+    if larger_models:
+        raise SystemExit(f"Mesh optimisation made the WRL larger: {', '.join(larger_models)}")
+
+    if args.profile:
+        args.profile.mkdir(parents=True, exist_ok=True)
+        print()
+        for path in paths:
+            profile_model(path, args.profile, args.profiler, args.compress)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+OBJ到WRL转换基准测试
+Benchmark of the OBJ to WRL conversion
+
+用法 / Usage:
+    python benchmarks/bench_3d_model.py [model.obj ...] [--faces N] [--soup] [--repeat N] [--memory]
+        [--mesh [--max-triangles N] [--decimation-tolerance T]] [--compress]
+
+传入从EasyEDA下载的OBJ文件（例如大型连接器模型）进行测试；不传文件时使用合成模型。
+每个模型分别用纯Python实现和NumPy实现转换，并检查两者输出完全相同。
+Pass OBJ files downloaded from EasyEDA (large connector models for instance), a synthetic
+model is used when no file is given. Every model is converted with the pure Python and the
+NumPy implementation, and both outputs are checked to be identical.
+
+--memory 额外用tracemalloc比较生成整个WRL字符串、流式写入文件以及从内存映射的OBJ文件
+（OBJ下载缓存的读取方式，映射的页面不计入tracemalloc）流式写入的内存峰值。
+--memory additionally compares the tracemalloc peak of building the whole WRL string
+with streaming it into a file, and of streaming it from a memory mapped OBJ file (the
+OBJ download cache path, whose mapped pages tracemalloc doesn't count).
+
+--mesh 额外报告网格优化（顶点焊接、删除退化面、共享顶点表）的耗时和WRL大小变化；
+--soup 让合成模型的每个三角形使用自己的顶点，和很多导出工具生成的OBJ一样。
+--mesh additionally reports the time and WRL size change of the mesh optimisation
+(vertex welding, degenerate face removal, shared vertex table). --soup gives every
+triangle of the synthetic model its own vertices, like the OBJ files of many exporters.
+--max-triangles 和 --decimation-tolerance 在网格优化报告中加入顶点聚类简化。
+--max-triangles and --decimation-tolerance add vertex clustering decimation to the mesh report.
+
+--compress 额外比较.wrl与gzip压缩的.wrz的文件大小和写入耗时。
+--compress additionally compares the file size and write time of .wrl and gzip compressed .wrz.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from src.core.easyeda.obj_cache import MappedObjFile
+from src.core.easyeda.parameters_easyeda import Ee3dModel, Ee3dModelBase
+from src.core.kicad.export_kicad_3d_model import generate_wrl_model, write_wrl_model
+from src.core.kicad.mesh_processing import MeshOptions
+
+
+def make_synthetic_obj(
+    faces: int, materials: int = 4, seed: int = 2024, soup: bool = False
+) -> str:
+    """
+    生成EasyEDA格式的合成OBJ（材质块 + 顶点 + "f 1// 2// 3//" 面）；
+    soup 为真时每个三角形使用自己的三个顶点
+    Build a synthetic OBJ in the EasyEDA flavour (material blocks, vertices, "f 1// 2// 3//"
+    faces), with soup every triangle gets three vertices of its own
+    """
+    rng = random.Random(seed)
+    grid = max(2, int((faces / 2) ** 0.5) + 1)
+    lines = []
+    for material in range(materials):
+        lines += [
+            f"newmtl mat{material}",
+            f"Ka {rng.random():.6f} {rng.random():.6f} {rng.random():.6f}",
+            f"Kd {rng.random():.6f} {rng.random():.6f} {rng.random():.6f}",
+            f"Ks {rng.random():.6f} {rng.random():.6f} {rng.random():.6f}",
+            "d 1",
+            "endmtl",
+        ]
+    grid_vertices = []
+    for row in range(grid):
+        for col in range(grid):
+            grid_vertices.append(
+                f"v {col * 0.254 + rng.uniform(-0.01, 0.01):.6f}"
+                f" {row * 0.254 + rng.uniform(-0.01, 0.01):.6f} {rng.uniform(0, 2):.6f}"
+            )
+
+    quads = [(row, col) for row in range(grid - 1) for col in range(grid - 1)]
+    quads = quads[: (faces + 1) // 2]
+    per_material = -(-len(quads) // materials)
+    face_lines = []
+    soup_vertices = []
+    for material in range(materials):
+        face_lines.append(f"usemtl mat{material}")
+        for row, col in quads[material * per_material:(material + 1) * per_material]:
+            a = row * grid + col + 1
+            b, c, d = a + 1, a + grid + 1, a + grid
+            for triangle in ((a, b, c), (a, c, d)):
+                if soup:
+                    soup_vertices += [grid_vertices[index - 1] for index in triangle]
+                    triangle = range(len(soup_vertices) - 2, len(soup_vertices) + 1)
+                face_lines.append("f {}// {}// {}//".format(*triangle))
+    return "\n".join(lines + (soup_vertices if soup else grid_vertices) + face_lines) + "\n"
+
+
+def make_model(name: str, raw_obj: bytes) -> Ee3dModel:
+    origin = Ee3dModelBase(x=0, y=0, z=0)
+    return Ee3dModel(name=name, uuid=name, translation=origin, rotation=origin, raw_obj=raw_obj)
+
+
+def time_conversion(model: Ee3dModel, use_numpy: bool, repeat: int):
+    best = float("inf")
+    output = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = generate_wrl_model(model, use_numpy=use_numpy)
+        best = min(best, time.perf_counter() - start)
+    return best, output
+
+
+def peak_memory(func) -> float:
+    """返回函数执行期间的内存峰值（MB） / Peak memory in MB while running func"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1] / 1e6
+    finally:
+        tracemalloc.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("models", nargs="*", type=Path, help="OBJ files to convert")
+    parser.add_argument("--faces", type=int, default=200_000, help="faces of the synthetic model")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--soup", action="store_true", help="synthetic triangles with their own vertices")
+    parser.add_argument("--memory", action="store_true", help="compare the peak memory")
+    parser.add_argument("--mesh", action="store_true", help="report the mesh optimisation")
+    parser.add_argument("--max-triangles", type=int, default=0, help="decimation triangle budget")
+    parser.add_argument("--decimation-tolerance", type=float, default=0.0, help="decimation cell size")
+    parser.add_argument("--compress", action="store_true", help="compare .wrl and .wrz output")
+    args = parser.parse_args()
+
+    models = [make_model(path.stem, path.read_bytes()) for path in args.models]
+    if not models:
+        name = f"synthetic_{args.faces}" + ("_soup" if args.soup else "")
+        models = [make_model(name, make_synthetic_obj(args.faces, soup=args.soup).encode())]
+
+    print(f"{'model':<32} {'faces':>9} {'python':>10} {'numpy':>10} {'speed-up':>9}")
+    for model in models:
+        faces = sum(1 for line in model.raw_obj.splitlines() if line.startswith(b"f "))
+        python_time, python_output = time_conversion(model, False, args.repeat)
+        numpy_time, numpy_output = time_conversion(model, True, args.repeat)
+        if python_output.raw_wrl != numpy_output.raw_wrl:
+            raise SystemExit(f"{model.name}: NumPy output differs from the Python output")
+        print(
+            f"{model.name[:32]:<32} {faces:>9,} {python_time:>9.3f}s {numpy_time:>9.3f}s"
+            f" {python_time / numpy_time:>8.1f}x"
+        )
+
+    if args.memory:
+        print(f"\n{'model':<32} {'obj MB':>9} {'string MB':>10} {'stream MB':>10} {'mapped MB':>10}")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for model in models:
+                string_peak = peak_memory(lambda: generate_wrl_model(model))
+                wrl_path = os.path.join(temp_dir, "model.wrl")
+                stream_peak = peak_memory(lambda: write_wrl_model(model, wrl_path))
+                obj_path = Path(temp_dir) / f"{model.uuid}.obj"
+                obj_path.write_bytes(model.raw_obj)
+                mapped_model = make_model(model.name, MappedObjFile(obj_path))
+                mapped_peak = peak_memory(lambda: write_wrl_model(mapped_model, wrl_path))
+                mapped_model.raw_obj.close()
+                print(
+                    f"{model.name[:32]:<32} {len(model.raw_obj) / 1e6:>9.1f}"
+                    f" {string_peak:>10.1f} {stream_peak:>10.1f} {mapped_peak:>10.1f}"
+                )
+
+    if args.mesh:
+        print(
+            f"\n{'model':<32} {'vertices':>17} {'faces':>17} {'WRL MB':>13}"
+            f" {'saved':>6} {'plain':>8} {'optimised':>9}"
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for model in models:
+                mesh_options = MeshOptions(
+                    max_triangles=args.max_triangles, decimation_tolerance=args.decimation_tolerance
+                )
+                python_output = generate_wrl_model(model, use_numpy=False, mesh_options=mesh_options)
+                if generate_wrl_model(model, mesh_options=mesh_options).raw_wrl != python_output.raw_wrl:
+                    raise SystemExit(f"{model.name}: NumPy mesh optimisation differs from the Python one")
+                # 两次写入不同的文件，第二次不会因为内容未改变而跳过
+                # Both writes go to different files so the second one is never skipped as unchanged
+                start = time.perf_counter()
+                write_wrl_model(model, os.path.join(temp_dir, "plain.wrl"))
+                plain_time = time.perf_counter() - start
+                start = time.perf_counter()
+                stats = write_wrl_model(model, os.path.join(temp_dir, "optimised.wrl"), mesh_options=mesh_options)
+                optimised_time = time.perf_counter() - start
+                print(
+                    f"{model.name[:32]:<32}"
+                    f" {stats.vertices_before:>8,}>{stats.vertices_after:<8,}"
+                    f" {stats.faces_before:>8,}>{stats.faces_after:<8,}"
+                    f" {stats.wrl_size_before / 1e6:>6.2f}>{stats.wrl_size_after / 1e6:<6.2f}"
+                    f" {stats.size_reduction:>6.1%} {plain_time:>7.3f}s {optimised_time:>8.3f}s"
+                )
+
+    if args.compress:
+        print(f"\n{'model':<32} {'wrl MB':>9} {'wrz MB':>9} {'ratio':>6} {'wrl':>8} {'wrz':>8}")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for model in models:
+                sizes = []
+                times = []
+                for compress in (False, True):
+                    path = os.path.join(temp_dir, f"model.{'wrz' if compress else 'wrl'}")
+                    start = time.perf_counter()
+                    write_wrl_model(model, path, compress=compress)
+                    times.append(time.perf_counter() - start)
+                    sizes.append(os.path.getsize(path))
+                print(
+                    f"{model.name[:32]:<32} {sizes[0] / 1e6:>9.2f} {sizes[1] / 1e6:>9.2f}"
+                    f" {sizes[0] / sizes[1]:>5.1f}x {times[0]:>7.3f}s {times[1]:>7.3f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
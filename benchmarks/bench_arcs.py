@@ -0,0 +1,121 @@
+"""
+圆弧几何计算基准测试
+Benchmark of the arc geometry computation of symbols and footprints
+
+用法 / Usage:
+    python benchmarks/bench_arcs.py [--arcs N ...] [--repeat N]
+
+先在随机圆弧和退化情况（半径为0、半径过小、起点与终点重合、acos之前需要限制的余弦、
+inf和NaN）上检查 compute_arcs 的每一项与 compute_arc 逐位相同（NaN只比较是否为NaN），
+然后比较逐个调用 compute_arc 和一次调用 compute_arcs 的耗时。
+compute_arcs is first checked to be bit-identical to compute_arc item by item (NaN
+only has to be NaN) on random arcs and degenerate cases (zero radii, radii too small,
+coinciding start and end points, cosines that need clamping before acos, inf and
+NaN), then calling compute_arc per arc is timed against one compute_arcs call.
+"""
+
+import argparse
+import random
+import struct
+import sys
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from src.core.kicad.export_kicad_footprint import compute_arc, compute_arcs, np
+
+DEGENERATE_VALUES = (0.0, -0.0, 1e-300, 1e300, float("inf"), float("nan"))
+
+
+def make_arcs(count: int, seed: int = 2024, degenerate: bool = False) -> list:
+    """随机圆弧参数，degenerate 时混入退化情况 / Random arc parameters, mixed with degenerate cases when degenerate is set"""
+    rng = random.Random(seed)
+
+    def value() -> float:
+        if degenerate and rng.random() < 0.1:
+            return rng.choice(DEGENERATE_VALUES)
+        if rng.random() < 0.2:
+            return float(rng.randint(-20, 20))
+        return round(rng.uniform(-50, 50), 2)
+
+    arcs = []
+    for _ in range(count):
+        start_x, start_y = value(), value()
+        if degenerate and rng.random() < 0.1:
+            end_x, end_y = start_x, start_y
+        else:
+            end_x, end_y = value(), value()
+        radius_x = value()
+        radius_y = radius_x if rng.random() < 0.7 else value()
+        angle = rng.choice((0.0, 0.0, 90.0, -30.0, 360.0, value()))
+        arcs.append(
+            (start_x, start_y, radius_x, radius_y, angle,
+             rng.random() < 0.5, rng.random() < 0.5, end_x, end_y)
+        )
+    return arcs
+
+
+def arc_key(arc: tuple) -> tuple:
+    """逐位比较用的键，类型也要相同 / Key for the bitwise comparison, the types have to match too"""
+    return tuple(
+        (type(value).__name__, "nan" if value != value else struct.pack("<d", value))
+        for value in arc
+    )
+
+
+def check_parity(arcs: list) -> int:
+    expected = [compute_arc(*arc) for arc in arcs]
+    actual = compute_arcs(*zip(*arcs))
+    if len(actual) != len(expected):
+        raise SystemExit(f"compute_arcs returned {len(actual)} arcs instead of {len(expected)}")
+    mismatches = 0
+    for arc, expected_arc, actual_arc in zip(arcs, expected, actual):
+        if arc_key(expected_arc) != arc_key(actual_arc):
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"mismatch for {arc}: {expected_arc} != {actual_arc}")
+    return mismatches
+
+
+def best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--arcs", type=int, nargs="+", default=[4, 32, 256, 4096])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if np is None:
+        raise SystemExit("NumPy is not installed")
+
+    for degenerate in (False, True):
+        arcs = make_arcs(50000, seed=7, degenerate=degenerate)
+        mismatches = check_parity(arcs)
+        print(f"parity{' (degenerate cases)' if degenerate else ''}: {len(arcs)} arcs, {mismatches} mismatches")
+        if mismatches:
+            raise SystemExit(1)
+
+    print(f"{'arcs':>6} {'compute_arc':>12} {'compute_arcs':>13} {'speedup':>8}")
+    for count in args.arcs:
+        arcs = make_arcs(count)
+        columns = list(zip(*arcs))
+        scalar_time = best_time(lambda: [compute_arc(*arc) for arc in arcs], args.repeat)
+        batched_time = best_time(lambda: compute_arcs(*columns), args.repeat)
+        print(
+            f"{count:>6} {scalar_time * 1e3:>10.3f}ms {batched_time * 1e3:>11.3f}ms"
+            f" {scalar_time / batched_time:>7.2f}x"
+        )
+    print("results identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+封装坐标换算基准测试
+Benchmark of the coordinate conversion of footprint tracks and custom pad polygons
+
+用法 / Usage:
+    python benchmarks/bench_footprint_points.py [--points N ...] [--repeat N]
+
+生成与大型丝印外框和自定义焊盘相似的EasyEDA坐标字符串，分别用逐点 fp_to_ki + round
+的原实现和NumPy一次解析、偏移和舍入的实现换算，并检查两者的结果逐位相同。
+EasyEDA point strings resembling big silkscreen outlines and custom pads are generated
+and converted with the original implementation (fp_to_ki + round per point) and the
+NumPy implementation that parses, offsets and rounds all points at once, both results
+are checked to be bit-identical.
+"""
+
+import argparse
+import random
+import struct
+import sys
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from src.core.kicad.export_kicad_footprint import fp_points_to_ki, fp_to_ki, np, round_array
+
+
+def make_points(count: int, seed: int = 2024) -> str:
+    """合成坐标字符串，EasyEDA单位，最多三位小数 / Synthetic point string in EasyEDA units with up to three decimals"""
+    rng = random.Random(seed)
+    return " ".join(f"{rng.uniform(3800, 4200):.{rng.randint(0, 3)}f}" for _ in range(count * 2))
+
+
+def convert_per_point(points: str, bbox_x: float, bbox_y: float):
+    """原实现：逐点换算和舍入 / Original implementation: convert and round point by point"""
+    point_list = [fp_to_ki(point) for point in points.split(" ") if point.strip()]
+    points_x = [round(point_list[i] - bbox_x, 2) for i in range(0, len(point_list) - 1, 2)]
+    points_y = [round(point_list[i + 1] - bbox_y, 2) for i in range(0, len(point_list) - 1, 2)]
+    return points_x, points_y
+
+
+def convert_batched(points: str, bbox_x: float, bbox_y: float):
+    """NumPy实现：一次换算、偏移和舍入 / NumPy implementation: convert, offset and round at once"""
+    point_list = fp_points_to_ki(points, skip_empty=True)
+    points_x = round_array(point_list[0::2] - bbox_x, 2).tolist()
+    points_y = round_array(point_list[1::2] - bbox_y, 2).tolist()
+    return points_x, points_y
+
+
+def best_time(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--points", type=int, nargs="+", default=[16, 256, 4096, 65536])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if np is None:
+        raise SystemExit("NumPy is not installed")
+
+    # 与实际bbox一样不是0.01的整数倍 / Not a multiple of 0.01, like real bboxes
+    bbox_x, bbox_y = 3987.3 * 0.254, 4012.7 * 0.254
+    print(f"{'points':>7} {'per point':>10} {'batched':>9} {'speedup':>8}")
+    for count in args.points:
+        points = make_points(count)
+        expected = convert_per_point(points, bbox_x, bbox_y)
+        actual = convert_batched(points, bbox_x, bbox_y)
+        pack = lambda values: struct.pack(f"<{len(values)}d", *values)
+        if any(pack(a) != pack(e) for a, e in zip(actual, expected)):
+            raise SystemExit(f"{count} points: batched result differs from the original implementation")
+
+        per_point_time = best_time(lambda: convert_per_point(points, bbox_x, bbox_y), args.repeat)
+        batched_time = best_time(lambda: convert_batched(points, bbox_x, bbox_y), args.repeat)
+        print(
+            f"{count:>7} {per_point_time * 1e3:>8.3f}ms {batched_time * 1e3:>7.3f}ms"
+            f" {per_point_time / batched_time:>7.2f}x"
+        )
+    print("results identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+封装文本生成基准测试
+Benchmark of the .kicad_mod rendering on footprints with many pads
+
+用法 / Usage:
+    python benchmarks/bench_footprint_render.py [--pads N] [--repeat N]
+
+生成与BGA和大型连接器相似的合成封装（默认1600个焊盘，另有丝印走线、圆、圆弧、
+文本和自定义形状焊盘），分别用逐个图元 += 拼接 format(**vars()) 的原实现和
+预编译模板的分批实现生成.kicad_mod，并检查两者输出逐字节相同；
+另外比较写入完整字符串和流式写入文件的耗时。两个实现交替测量，speedup 是每轮耗时比的中位数。
+A synthetic footprint resembling a BGA or a large connector is generated (1600 pads by
+default, plus silkscreen tracks, circles, arcs, texts and custom shaped pads) and the
+.kicad_mod is rendered with the original implementation (+= concatenation of
+format(**vars()) per primitive) and the batched implementation with precompiled
+templates, both outputs are checked to be byte-identical. Writing the whole string is
+compared with streaming it into the file as well. Both implementations are timed in
+alternating rounds, speedup is the median of the per round time ratios.
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import statistics
+import tempfile
+import timeit
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from src.core.kicad.export_kicad_footprint import ExporterFootprintKicad
+from src.core.kicad.parameters_kicad_footprint import *
+
+
+def make_footprint(pads: int, seed: int = 2024) -> KiFootprint:
+    """
+    合成封装：方形网格焊盘、每行一个自定义形状焊盘、丝印外框和1脚标记
+    Synthetic footprint: a square grid of pads, one custom shaped pad per row, a
+    silkscreen frame and a pin 1 mark
+    """
+    rng = random.Random(seed)
+    side = math.ceil(math.sqrt(pads))
+    footprint = KiFootprint(
+        info=KiFootprintInfo(name=f"BGA-{pads}", fp_type="smd"),
+        model_3d=Ki3dModel(
+            name=f"BGA-{pads}",
+            translation=Ki3dModelBase(0.0, 0.0, 0.0),
+            rotation=Ki3dModelBase(0.0, 0.0, 0.0),
+        ),
+    )
+    for index in range(pads):
+        row, col = divmod(index, side)
+        custom = col == 0
+        polygon = ""
+        if custom:
+            points = " ".join(
+                f"(xy {rng.uniform(-0.4, 0.4):.2f} {rng.uniform(-0.4, 0.4):.2f})" for _ in range(8)
+            )
+            polygon = f"\n\t\t(primitives \n\t\t\t(gr_poly \n\t\t\t\t(pts {points}\n\t\t\t\t) \n\t\t\t\t(width 0.1)\n\t\t\t)\n\t\t)\n\t"
+        footprint.pads.append(
+            KiFootprintPad(
+                type="smd",
+                shape="custom" if custom else "circle",
+                pos_x=(col - side / 2) * 0.8 + rng.uniform(-1e-3, 1e-3),
+                pos_y=(row - side / 2) * 0.8 + rng.uniform(-1e-3, 1e-3),
+                width=0.4,
+                height=0.4,
+                layers="F.Cu F.Paste F.Mask",
+                number=f"{chr(65 + row % 26)}{col + 1}",
+                drill="",
+                orientation=rng.choice((0.0, 90.0, 45.0)),
+                polygon=polygon,
+            )
+        )
+
+    half = side * 0.4 + 1
+    outline = KiFootprintTrack(stroke_width=0.15, layers="F.SilkS")
+    steps = side * 4
+    for step in range(steps):
+        angle = 2 * math.pi * step / steps
+        next_angle = 2 * math.pi * (step + 1) / steps
+        outline.points_start_x.append(round(half * math.cos(angle), 2))
+        outline.points_start_y.append(round(half * math.sin(angle), 2))
+        outline.points_end_x.append(round(half * math.cos(next_angle), 2))
+        outline.points_end_y.append(round(half * math.sin(next_angle), 2))
+    footprint.tracks.append(outline)
+    frame = KiFootprintRectangle(
+        points_start_x=[-half, half, half, -half],
+        points_start_y=[-half, -half, half, half],
+        points_end_x=[half, half, -half, -half],
+        points_end_y=[-half, half, half, -half],
+        stroke_width=0.05,
+        layers="F.Fab",
+    )
+    footprint.rectangles.append(frame)
+    for index in range(side):
+        footprint.circles.append(
+            KiFootprintCircle(
+                cx=-half - 0.5, cy=index * 0.8, end_x=-half - 0.3, end_y=index * 0.8,
+                layers="F.SilkS", stroke_width=0.1,
+            )
+        )
+        footprint.arcs.append(
+            KiFootprintArc(
+                start_x=half + 0.5, start_y=index * 0.8, end_x=half + 0.7, end_y=index * 0.8,
+                angle=180.0, layers="F.Fab", stroke_width=0.1,
+            )
+        )
+        footprint.holes.append(KiFootprintHole(pos_x=index * 0.8, pos_y=half + 1, size=0.3))
+        footprint.vias.append(KiFootprintVia(pos_x=index * 0.8, pos_y=-half - 1, size=0.2, diameter=0.4))
+    footprint.texts.append(
+        KiFootprintText(
+            pos_x=0.0, pos_y=half + 2, orientation=0.0, text="%R", layers="F.SilkS",
+            font_size=1.0, thickness=0.15, display="", mirror="",
+        )
+    )
+    return footprint
+
+
+def render_concat(ki: KiFootprint, model_3d_path: str, model_3d_extension: str = "wrl") -> str:
+    """原实现：逐个图元 += 拼接 / Original implementation: += concatenation per primitive"""
+    ki_lib = ""
+    ki_lib += KI_MODULE_INFO.format(package_lib="easyeda2kicad", package_name=ki.info.name, edit="5DC5F6A4")
+    if ki.info.fp_type:
+        ki_lib += KI_FP_TYPE.format(component_type=("smd" if ki.info.fp_type == "smd" else "through_hole"))
+    y_low = min(pad.pos_y for pad in ki.pads)
+    y_high = max(pad.pos_y for pad in ki.pads)
+    ki_lib += KI_REFERENCE.format(pos_x="0", pos_y=y_low - 4)
+    ki_lib += KI_PACKAGE_VALUE.format(package_name=ki.info.name, pos_x="0", pos_y=y_high + 4)
+    ki_lib += KI_FAB_REF
+    for track in ki.tracks + ki.rectangles:
+        for i in range(len(track.points_start_x)):
+            ki_lib += KI_LINE.format(
+                start_x=track.points_start_x[i],
+                start_y=track.points_start_y[i],
+                end_x=track.points_end_x[i],
+                end_y=track.points_end_y[i],
+                layers=track.layers,
+                stroke_width=track.stroke_width,
+            )
+    for pad in ki.pads:
+        ki_lib += KI_PAD.format(**vars(pad))
+    for hole in ki.holes:
+        ki_lib += KI_HOLE.format(**vars(hole))
+    for via in ki.vias:
+        ki_lib += KI_VIA.format(**vars(via))
+    for circle in ki.circles:
+        ki_lib += KI_CIRCLE.format(**vars(circle))
+    for arc in ki.arcs:
+        ki_lib += KI_ARC.format(**vars(arc))
+    for text in ki.texts:
+        ki_lib += KI_TEXT.format(**vars(text))
+    if ki.model_3d is not None:
+        model_file_path = f"{model_3d_path.replace(os.sep, '/')}.3dshapes/{ki.model_3d.name}.{model_3d_extension}"
+        ki_lib += KI_MODEL_3D.format(
+            file_3d=model_file_path,
+            pos_x=ki.model_3d.translation.x,
+            pos_y=ki.model_3d.translation.y,
+            pos_z=ki.model_3d.translation.z,
+            rot_x=ki.model_3d.rotation.x,
+            rot_y=ki.model_3d.rotation.y,
+            rot_z=ki.model_3d.rotation.z,
+        )
+    ki_lib += KI_END_FILE
+    return ki_lib
+
+
+def make_exporter(footprint: KiFootprint) -> ExporterFootprintKicad:
+    """不经过EasyEDA转换，直接包装合成的KiCad封装 / Wrap the synthetic KiCad footprint without the EasyEDA conversion"""
+    exporter = ExporterFootprintKicad.__new__(ExporterFootprintKicad)
+    exporter.output = footprint
+    return exporter
+
+
+def compare_times(baseline, candidate, repeat: int):
+    """
+    交替测量两个实现，返回各自每次调用的最短耗时和每轮耗时比的中位数
+    Time two implementations in alternating rounds, returns the shortest time per call of
+    each and the median of the per round time ratios
+
+    timeit 自动选择循环次数使每轮至少0.2秒，测量时关闭垃圾回收；两个实现在相邻的轮次中运行，
+    机器负载的变化对两者的影响相同，比值比单独的最短耗时稳定。
+    timeit picks the number of loops so that each round takes at least 0.2s and garbage
+    collection is off while timing; both implementations run in neighbouring rounds so
+    load changes on the machine hit both alike and the ratio is steadier than the
+    shortest times on their own.
+    """
+    timers = [timeit.Timer(baseline), timeit.Timer(candidate)]
+    numbers = [timer.autorange()[0] for timer in timers]
+    rounds = [[], []]
+    for _ in range(repeat):
+        for timer, number, times in zip(timers, numbers, rounds):
+            times.append(timer.timeit(number) / number)
+    return min(rounds[0]), min(rounds[1]), statistics.median(a / b for a, b in zip(*rounds))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--pads", type=int, nargs="+", default=[1024, 1600, 4096])
+    parser.add_argument("--repeat", type=int, default=15)
+    args = parser.parse_args()
+
+    model_3d_path = "/tmp/lib"
+    print(f"{'pads':>6} {'KB':>7} {'concat':>9} {'batched':>9} {'speedup':>8} {'write':>9} {'stream':>9}")
+    for pads in args.pads:
+        footprint = make_footprint(pads)
+        exporter = make_exporter(footprint)
+
+        expected = render_concat(footprint, model_3d_path)
+        actual = exporter.render(model_3d_path=model_3d_path)
+        if actual != expected:
+            raise SystemExit(f"{pads} pads: batched output differs from the original implementation")
+
+        concat_time, batched_time, speedup = compare_times(
+            lambda: render_concat(footprint, model_3d_path),
+            lambda: exporter.render(model_3d_path=model_3d_path),
+            args.repeat,
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            footprint_path = os.path.join(temp_dir, f"{footprint.info.name}.kicad_mod")
+
+            def write_string():
+                with open(footprint_path, "w", encoding="utf-8") as footprint_file:
+                    footprint_file.write(render_concat(footprint, model_3d_path))
+
+            write_time, stream_time, _ = compare_times(
+                write_string,
+                lambda: exporter.export(footprint_full_path=footprint_path, model_3d_path=model_3d_path),
+                args.repeat,
+            )
+            with open(footprint_path, encoding="utf-8") as footprint_file:
+                if footprint_file.read() != expected:
+                    raise SystemExit(f"{pads} pads: streamed file differs from the original implementation")
+
+        print(
+            f"{pads:>6} {len(expected) / 1e3:>7.1f} {concat_time * 1e3:>7.2f}ms {batched_time * 1e3:>7.2f}ms"
+            f" {speedup:>7.2f}x {write_time * 1e3:>7.2f}ms {stream_time * 1e3:>7.2f}ms"
+        )
+    print("outputs identical")
+
+
+if __name__ == "__main__":
+    main()
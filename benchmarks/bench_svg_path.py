@@ -0,0 +1,138 @@
+"""
+SVG路径解析基准测试
+Benchmark of the SVG path engine on path-heavy symbols
+
+用法 / Usage:
+    python benchmarks/bench_svg_path.py [--repeat N] [--symbols N]
+
+生成与EasyEDA符号相似的合成路径（Logo轮廓、连接器外框、圆弧），
+分别测量分词、绝对坐标归一化以及符号路径转换的耗时。
+Synthetic paths resembling EasyEDA symbols (logo outlines, connector frames, arcs)
+are generated and tokenizing, normalization and symbol path conversion are timed separately.
+"""
+
+import argparse
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+repo_root = Path(__file__).resolve().parent.parent
+if str(repo_root) not in sys.path:
+    sys.path.insert(0, str(repo_root))
+
+from src.core.easyeda.parameters_easyeda import EeSymbolBbox, EeSymbolPath
+from src.core.easyeda.svg_path_parser import (
+    iter_svg_path,
+    iter_svg_subpaths,
+    tokenize_svg_path,
+)
+from src.core.kicad.export_kicad_symbol import convert_ee_paths
+from src.core.kicad.parameters_kicad_symbol import KicadVersion
+
+
+def make_logo_path(rng: random.Random, curves: int = 120) -> str:
+    """Closed outline made of relative cubic and smooth beziers, like a vectorized logo"""
+    parts = [f"M {rng.uniform(380, 420):.2f} {rng.uniform(280, 320):.2f}"]
+    for index in range(curves):
+        if index % 3 == 0:
+            parts.append(
+                "c {:.2f} {:.2f} {:.2f} {:.2f} {:.2f} {:.2f}".format(
+                    *(rng.uniform(-4, 4) for _ in range(6))
+                )
+            )
+        elif index % 3 == 1:
+            parts.append(
+                "s {:.2f},{:.2f} {:.2f},{:.2f}".format(
+                    *(rng.uniform(-4, 4) for _ in range(4))
+                )
+            )
+        else:
+            parts.append(
+                "q {:.2f} {:.2f} {:.2f} {:.2f}".format(
+                    *(rng.uniform(-4, 4) for _ in range(4))
+                )
+            )
+    parts.append("Z")
+    return " ".join(parts)
+
+
+def make_connector_path(rng: random.Random, pins: int = 40) -> str:
+    """Connector outline with one notch per pin, absolute and relative H/V/L segments"""
+    x, y = 400, 300
+    parts = [f"M {x} {y}"]
+    for _ in range(pins):
+        parts.append(f"h {rng.choice((5, 10))} v 2 h 3 v -2")
+    parts.append(f"V {y + 60} H {x} L {x} {y} Z")
+    return " ".join(parts)
+
+
+def make_arc_path(rng: random.Random, arcs: int = 24) -> str:
+    """Rounded frame made of elliptical arcs, partly with packed flags"""
+    parts = ["M400,300"]
+    for index in range(arcs):
+        angle = 2 * math.pi * (index + 1) / arcs
+        end_x = 400 + 50 * math.cos(angle)
+        end_y = 300 + 50 * math.sin(angle)
+        if index % 2:
+            parts.append(f"A50 50 0 0 1 {end_x:.2f} {end_y:.2f}")
+        else:
+            parts.append(f"A50,50 0 01{end_x:.2f},{end_y:.2f}")
+    return "".join(parts)
+
+
+def make_corpus(symbols: int, seed: int = 2024) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(symbols):
+        corpus.append(make_logo_path(rng))
+        corpus.append(make_connector_path(rng))
+        corpus.append(make_arc_path(rng))
+    return corpus
+
+
+def bench(label: str, func, corpus: list, repeat: int, unit_count: int) -> None:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for path in corpus:
+            func(path)
+        best = min(best, time.perf_counter() - start)
+    print(
+        f"{label:<28} {best * 1000:9.2f} ms  {unit_count / best:12,.0f} commands/s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--symbols", type=int, default=200)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.symbols)
+    command_count = sum(len(list(tokenize_svg_path(path))) for path in corpus)
+    print(f"{len(corpus)} paths, {command_count} commands, best of {args.repeat}")
+
+    bench("tokenize", lambda path: list(tokenize_svg_path(path)), corpus, args.repeat, command_count)
+    bench("normalize (absolute)", lambda path: list(iter_svg_path(path)), corpus, args.repeat, command_count)
+    bench("flatten subpaths", lambda path: list(iter_svg_subpaths(path)), corpus, args.repeat, command_count)
+
+    ee_paths = [
+        EeSymbolPath(paths=path, stroke_color="#000", stroke_width="1", stroke_style="0",
+                     fill_color=False, id="gge1", is_locked=False)
+        for path in corpus
+    ]
+    bbox = EeSymbolBbox(x=400, y=300)
+    for version in (KicadVersion.v5, KicadVersion.v6):
+        bench(
+            f"convert_ee_paths ({version.name})",
+            lambda path: convert_ee_paths([path], bbox, version),
+            ee_paths,
+            args.repeat,
+            command_count,
+        )
+
+
+if __name__ == "__main__":
+    main()
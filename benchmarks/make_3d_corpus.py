@@ -0,0 +1,212 @@
+"""
+生成3D模型基准测试语料
+Generate the 3D model benchmark corpus
+
+用法 / Usage:
+    python benchmarks/make_3d_corpus.py [--output DIR]
+
+语料模仿EasyEDA导出的OBJ（材质块 + 顶点 + 每个零件一个usemtl块 + "f 1// 2// 3//" 面），
+包含四类典型元件：小型无源器件、QFN封装、大型连接器和模块。生成结果是确定的，
+gzip压缩后提交在 benchmarks/corpus/3d 中，修改本脚本后需要重新生成并提交。
+The corpus imitates the OBJ files exported by EasyEDA (material blocks, vertices, one usemtl
+block per part, "f 1// 2// 3//" faces) and covers four typical parts: a small passive, a QFN
+package, a large connector and a module. The output is deterministic and committed gzip
+compressed in benchmarks/corpus/3d, regenerate and commit it after changing this script.
+"""
+
+import argparse
+import gzip
+import math
+from pathlib import Path
+
+CORPUS_DIR = Path(__file__).resolve().parent / "corpus" / "3d"
+
+# EasyEDA模型常用的材质 / Materials commonly used by EasyEDA models
+MATERIALS = {
+    "body_black": ("0.147 0.147 0.147", "0.2 0.2 0.2", "1"),
+    "body_ceramic": ("0.82 0.78 0.68", "0.1 0.1 0.1", "1"),
+    "pin_tin": ("0.85 0.85 0.86", "0.9 0.9 0.9", "1"),
+    "pin_gold": ("0.86 0.73 0.33", "0.9 0.8 0.5", "1"),
+    "marking": ("0.9 0.9 0.9", "0.1 0.1 0.1", "1"),
+    "pcb_green": ("0.07 0.3 0.12", "0.2 0.2 0.2", "1"),
+    "copper": ("0.72 0.45 0.2", "0.6 0.5 0.4", "1"),
+    "shield": ("0.75 0.76 0.78", "0.95 0.95 0.95", "1"),
+    "window": ("0.7 0.8 0.9", "0.5 0.5 0.5", "0.6"),
+}
+
+
+class ObjBuilder:
+    """
+    收集零件的顶点和面，每个零件写成一个usemtl块
+    Collect the vertices and faces of parts, every part becomes one usemtl block
+    """
+
+    def __init__(self) -> None:
+        self.vertices = []
+        self.parts = []
+
+    def add_part(self, material: str, vertices: list, faces: list) -> None:
+        offset = len(self.vertices) + 1
+        self.vertices += vertices
+        self.parts.append((material, [[offset + index for index in face] for face in faces]))
+
+    def add_box(self, material: str, center: tuple, size: tuple, divisions: int = 1) -> None:
+        """轴对齐的长方体，每个面细分为 divisions x divisions 个四边形 / Axis aligned box, every side split into divisions x divisions quads"""
+        vertices = []
+        faces = []
+        for axis in range(3):
+            for direction in (-1, 1):
+                u_axis, v_axis = [other for other in range(3) if other != axis]
+                if direction < 0:
+                    u_axis, v_axis = v_axis, u_axis
+                base = len(vertices)
+                for row in range(divisions + 1):
+                    for col in range(divisions + 1):
+                        point = [0.0, 0.0, 0.0]
+                        point[axis] = center[axis] + direction * size[axis] / 2
+                        point[u_axis] = center[u_axis] + size[u_axis] * (col / divisions - 0.5)
+                        point[v_axis] = center[v_axis] + size[v_axis] * (row / divisions - 0.5)
+                        vertices.append(point)
+                for row in range(divisions):
+                    for col in range(divisions):
+                        a = base + row * (divisions + 1) + col
+                        b, c, d = a + 1, a + divisions + 2, a + divisions + 1
+                        faces += [[a, b, c], [a, c, d]]
+        self.add_part(material, vertices, faces)
+
+    def add_cylinder(
+        self, material: str, center: tuple, radius: float, height: float, segments: int, rings: int = 1
+    ) -> None:
+        """沿Z轴的带端盖圆柱 / Capped cylinder along the Z axis"""
+        cx, cy, cz = center
+        vertices = []
+        faces = []
+        for ring in range(rings + 1):
+            z = cz + height * ring / rings
+            for segment in range(segments):
+                angle = 2 * math.pi * segment / segments
+                vertices.append([cx + radius * math.cos(angle), cy + radius * math.sin(angle), z])
+        for ring in range(rings):
+            for segment in range(segments):
+                a = ring * segments + segment
+                b = ring * segments + (segment + 1) % segments
+                faces += [[a, b, b + segments], [a, b + segments, a + segments]]
+        for ring, z in ((0, cz), (rings, cz + height)):
+            center_index = len(vertices)
+            vertices.append([cx, cy, z])
+            for segment in range(segments):
+                a = ring * segments + segment
+                b = ring * segments + (segment + 1) % segments
+                faces.append([center_index, b, a] if ring == 0 else [center_index, a, b])
+        self.add_part(material, vertices, faces)
+
+    def to_obj(self) -> str:
+        lines = []
+        used = sorted({material for material, _ in self.parts})
+        for material in used:
+            diffuse, specular, dissolve = MATERIALS[material]
+            lines += [
+                f"newmtl {material}",
+                f"Ka {diffuse}",
+                f"Kd {diffuse}",
+                f"Ks {specular}",
+                f"d {dissolve}",
+                "endmtl",
+            ]
+        lines += ["v {:.6f} {:.6f} {:.6f}".format(*vertex) for vertex in self.vertices]
+        for material, faces in self.parts:
+            lines.append(f"usemtl {material}")
+            lines += ["f {}// {}// {}//".format(*face) for face in faces]
+        return "\n".join(lines) + "\n"
+
+
+def make_passive() -> ObjBuilder:
+    """0603电阻：陶瓷本体、丝印面和两个端电极 / 0603 resistor: ceramic body, marking and two terminals"""
+    obj = ObjBuilder()
+    obj.add_box("body_ceramic", (0, 0, 0.225), (1.0, 0.8, 0.45), divisions=2)
+    obj.add_box("body_black", (0, 0, 0.455), (0.9, 0.7, 0.01), divisions=2)
+    for x in (-0.65, 0.65):
+        obj.add_box("pin_tin", (x, 0, 0.225), (0.3, 0.82, 0.46), divisions=2)
+    return obj
+
+
+def make_qfn() -> ObjBuilder:
+    """QFN-32 5x5mm：本体、32个引脚、散热焊盘和1脚标记 / QFN-32 5x5mm: body, 32 pins, exposed pad and pin 1 mark"""
+    obj = ObjBuilder()
+    obj.add_box("body_black", (0, 0, 0.45), (5.0, 5.0, 0.9), divisions=16)
+    obj.add_box("pin_tin", (0, 0, 0.01), (3.1, 3.1, 0.02), divisions=8)
+    for side in range(4):
+        for pin in range(8):
+            offset = (pin - 3.5) * 0.5
+            x, y = ((-2.4, offset), (offset, -2.4), (2.4, offset), (offset, 2.4))[side]
+            size = (0.4, 0.25, 0.2) if side % 2 == 0 else (0.25, 0.4, 0.2)
+            obj.add_box("pin_tin", (x, y, 0.1), size, divisions=3)
+    obj.add_cylinder("marking", (-1.9, -1.9, 0.9), 0.2, 0.005, segments=32)
+    return obj
+
+
+def make_connector() -> ObjBuilder:
+    """2x40排针连接器：塑料外壳和80个带圆角引脚 / 2x40 pin header: plastic housing and 80 pins with rounded tails"""
+    obj = ObjBuilder()
+    obj.add_box("body_black", (0, 0, 1.25), (101.6, 5.08, 2.5), divisions=64)
+    for row in (-1.27, 1.27):
+        for pin in range(40):
+            x = (pin - 19.5) * 2.54
+            obj.add_box("pin_gold", (x, row, 5.0), (0.64, 0.64, 5.0), divisions=4)
+            obj.add_cylinder("pin_gold", (x, row, -3.0), 0.32, 3.0, segments=24, rings=8)
+    return obj
+
+
+def make_module() -> ObjBuilder:
+    """
+    WiFi模块：PCB、屏蔽罩、蛇形天线、半孔焊盘和一组无源器件，包含大量重复材质的usemtl块
+    WiFi module: PCB, shield can, meander antenna, castellated pads and a set of passives,
+    many usemtl blocks repeat the same materials
+    """
+    obj = ObjBuilder()
+    obj.add_box("pcb_green", (0, 0, 0.4), (18.0, 25.5, 0.8), divisions=24)
+    obj.add_box("shield", (0, -3.0, 1.9), (16.0, 17.0, 2.2), divisions=24)
+    obj.add_box("window", (0, 9.5, 0.9), (16.0, 5.0, 0.2), divisions=4)
+    for segment in range(24):
+        x = -7.0 + segment * 0.6
+        obj.add_box("copper", (x, 9.5, 0.82), (0.2, 3.6, 0.035), divisions=2)
+        obj.add_box("copper", (x + 0.3, 7.7 if segment % 2 else 11.3, 0.82), (0.8, 0.2, 0.035))
+    for side in (-9.0, 9.0):
+        for pad in range(14):
+            y = -11.0 + pad * 1.27
+            obj.add_cylinder("pin_gold", (side, y, 0.0), 0.45, 0.8, segments=32, rings=2)
+            obj.add_box("pin_gold", (side - math.copysign(0.5, side), y, 0.81), (1.0, 0.9, 0.02))
+    for part in range(40):
+        x = -6.5 + (part % 10) * 1.4
+        y = 12.0 - (part // 10) * 0.9
+        obj.add_box("body_ceramic" if part % 3 else "body_black", (x, y, -0.25), (0.5, 0.25, 0.35))
+        for end in (-0.3, 0.3):
+            obj.add_box("pin_tin", (x + end, y, -0.25), (0.12, 0.26, 0.36))
+    return obj
+
+
+CORPUS = {
+    "passive_0603": make_passive,
+    "qfn_32": make_qfn,
+    "connector_2x40": make_connector,
+    "module_wifi": make_module,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument("--output", type=Path, default=CORPUS_DIR)
+    args = parser.parse_args()
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    for name, make in CORPUS.items():
+        raw_obj = make().to_obj().encode()
+        path = args.output / f"{name}.obj.gz"
+        with gzip.GzipFile(path, mode="wb", compresslevel=9, mtime=0) as corpus_file:
+            corpus_file.write(raw_obj)
+        faces = raw_obj.count(b"\nf ")
+        print(f"{path}: {len(raw_obj) / 1e6:.2f} MB, {faces:,} faces")
+
+
+if __name__ == "__main__":
+    main()
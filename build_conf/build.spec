@@ -81,6 +81,7 @@ a = Analysis(
         'openpyxl.workbook.workbook',
         'openpyxl.worksheet',
         'openpyxl.worksheet.worksheet',
+        'orjson',
         'requests',
         'requests.adapters',
         'requests.auth',
@@ -1,7 +1,7 @@
 # EasyEDA模块初始化
 from .easyeda_api import EasyedaApi
 from .easyeda_importer import EasyedaSymbolImporter, EasyedaFootprintImporter, Easyeda3dModelImporter
-from .svg_path_parser import parse_svg_path
+from .svg_path_parser import iter_svg_path, parse_svg_path
 from .parameters_easyeda import *
 
 # 创建统一的EasyEDAImporter类
@@ -65,5 +65,6 @@ __all__ = [
     'EasyedaSymbolImporter',
     'EasyedaFootprintImporter', 
     'Easyeda3dModelImporter',
+    'iter_svg_path',
     'parse_svg_path'
 ]
\ No newline at end of file
@@ -7,6 +7,8 @@ import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from ..utils.json_utils import json_loads
+
 # 版本信息
 __version__ = "1.0.0"
 
@@ -86,8 +88,8 @@ class EasyedaApi:
                 print(f"响应内容: {r.text[:500]}")  # 打印前500个字符
                 return {}
             
-            # 解析JSON响应
-            api_response = r.json()
+            # 解析JSON响应（直接解析响应字节，不先解码为字符串）
+            api_response = json_loads(r.content)
             print(f"API响应结构: {type(api_response)}")
             print(f"响应键: {list(api_response.keys()) if isinstance(api_response, dict) else '不是字典'}")
             
@@ -138,10 +140,10 @@ class EasyedaApi:
             
         return cp_cad_info["result"]
 
-    def get_raw_3d_model_obj(self, uuid: str) -> str:
+    def get_raw_3d_model_obj(self, uuid: str) -> bytes:
         """
-        获取原始3D模型数据（OBJ格式）
-        Fetch raw 3D model data (OBJ format)
+        获取原始3D模型数据（OBJ格式），不解码直接返回响应字节
+        Fetch raw 3D model data (OBJ format) as the undecoded response bytes
         
         参数:
         Args:
@@ -149,7 +151,7 @@ class EasyedaApi:
             
         返回:
         Returns:
-            str: 3D模型OBJ文件内容，失败返回None / 3D model OBJ file content, None on failure
+            bytes: 3D模型OBJ文件内容，失败返回None / 3D model OBJ file content, None on failure
         """
         try:
             r = self.session.get(
@@ -160,7 +162,7 @@ class EasyedaApi:
             if r.status_code != requests.codes.ok:
                 logging.error(f"No raw 3D model data found for uuid:{uuid} on easyeda, status code: {r.status_code}")
                 return None
-            return r.content.decode()
+            return r.content
         except requests.exceptions.RequestException as e:
             logging.error(f"网络请求错误 (3D模型OBJ, UUID: {uuid}): {e}")
             # 尝试重试一次
@@ -174,7 +176,7 @@ class EasyedaApi:
                 if r.status_code != requests.codes.ok:
                     logging.error(f"重试后仍失败 - No raw 3D model data found for uuid:{uuid} on easyeda, status code: {r.status_code}")
                     return None
-                return r.content.decode()
+                return r.content
             except Exception as retry_error:
                 logging.error(f"重试后仍失败 - 网络请求错误 (3D模型OBJ, UUID: {uuid}): {retry_error}")
                 return None
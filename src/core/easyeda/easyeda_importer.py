@@ -1,8 +1,36 @@
-import json
 import logging
+import time
 
 from .easyeda_api import EasyedaApi
+from .obj_cache import ObjCache
 from .parameters_easyeda import *
+from ..utils.json_utils import json_loads
+
+
+class EasyedaShapeParseError(ValueError):
+    """
+    解析EasyEDA图形数据行失败
+    Raised when a shape line of the EasyEDA data can not be parsed
+
+    解析是确定性的，重试不会成功，因此调用方应立即报告该错误。
+    Parsing is deterministic, so callers should report this at once instead of retrying.
+    """
+
+    MAX_LINE_LENGTH = 120
+
+    def __init__(self, designator: str, line: str, index: int, reason: Exception):
+        self.designator = designator
+        self.line = line
+        self.index = index
+        self.reason = reason
+        shown_line = (
+            line
+            if len(line) <= self.MAX_LINE_LENGTH
+            else f"{line[:self.MAX_LINE_LENGTH]}..."
+        )
+        super().__init__(
+            f"Failed to parse {designator} shape at line {index}: {shown_line} ({reason})"
+        )
 
 
 def add_easyeda_pin(pin_data: str, ee_symbol: EeSymbol):
@@ -160,10 +188,13 @@ class EasyedaSymbolImporter:
             ),
         )
 
-        for line in ee_data["dataStr"]["shape"]:
+        for index, line in enumerate(ee_data["dataStr"]["shape"]):
             designator = line.split("~")[0]
             if designator in easyeda_handlers:
-                easyeda_handlers[designator](line, new_ee_symbol)
+                try:
+                    easyeda_handlers[designator](line, new_ee_symbol)
+                except (ValueError, TypeError, IndexError, KeyError) as e:
+                    raise EasyedaShapeParseError(designator, line, index, e) from e
             else:
                 logging.warning(f"Unknow symbol designator : {designator}")
 
@@ -199,62 +230,68 @@ class EasyedaFootprintImporter:
             model_3d=None,
         )
 
-        for line in ee_data_str["shape"]:
-            ee_designator = line.split("~")[0]
-            ee_fields = line.split("~")[1:]
-
-            if ee_designator == "PAD":
-                ee_pad = EeFootprintPad(
-                    **dict(zip(EeFootprintPad.model_fields.keys(), ee_fields[:18]))
-                )
-                new_ee_footprint.pads.append(ee_pad)
-            elif ee_designator == "TRACK":
-                ee_track = EeFootprintTrack(
-                    **dict(zip(EeFootprintTrack.model_fields.keys(), ee_fields))
-                )
-                new_ee_footprint.tracks.append(ee_track)
-            elif ee_designator == "HOLE":
-                ee_hole = EeFootprintHole(
-                    **dict(zip(EeFootprintHole.model_fields.keys(), ee_fields))
-                )
-                new_ee_footprint.holes.append(ee_hole)
-            elif ee_designator == "VIA":
-                ee_via = EeFootprintVia(
-                    **dict(zip(EeFootprintVia.model_fields.keys(), ee_fields))
-                )
-                new_ee_footprint.vias.append(ee_via)
-            elif ee_designator == "CIRCLE":
-                ee_circle = EeFootprintCircle(
-                    **dict(zip(EeFootprintCircle.model_fields.keys(), ee_fields))
-                )
-                new_ee_footprint.circles.append(ee_circle)
-            elif ee_designator == "ARC":
-                ee_arc = EeFootprintArc(
-                    **dict(zip(EeFootprintArc.model_fields.keys(), ee_fields))
-                )
-                new_ee_footprint.arcs.append(ee_arc)
-            elif ee_designator == "RECT":
-                ee_rectangle = EeFootprintRectangle(
-                    **dict(zip(EeFootprintRectangle.model_fields.keys(), ee_fields))
-                )
-                new_ee_footprint.rectangles.append(ee_rectangle)
-            elif ee_designator == "TEXT":
-                ee_text = EeFootprintText(
-                    **dict(zip(EeFootprintText.model_fields.keys(), ee_fields))
-                )
-                new_ee_footprint.texts.append(ee_text)
-            elif ee_designator == "SVGNODE":
-                new_ee_footprint.model_3d = Easyeda3dModelImporter(
-                    easyeda_cp_cad_data=[line], download_raw_3d_model=False
-                ).output
-
-            elif ee_designator == "SOLIDREGION":
-                ...
-            else:
-                logging.warning(f"Unknow footprint designator : {ee_designator}")
+        for index, line in enumerate(ee_data_str["shape"]):
+            try:
+                self.add_easyeda_shape(line=line, ee_footprint_data=new_ee_footprint)
+            except (ValueError, TypeError, IndexError, KeyError) as e:
+                raise EasyedaShapeParseError(line.split("~")[0], line, index, e) from e
 
         return new_ee_footprint
 
+    def add_easyeda_shape(self, line: str, ee_footprint_data: ee_footprint) -> None:
+        ee_designator = line.split("~")[0]
+        ee_fields = line.split("~")[1:]
+
+        if ee_designator == "PAD":
+            ee_pad = EeFootprintPad(
+                **dict(zip(EeFootprintPad.model_fields.keys(), ee_fields[:18]))
+            )
+            ee_footprint_data.pads.append(ee_pad)
+        elif ee_designator == "TRACK":
+            ee_track = EeFootprintTrack(
+                **dict(zip(EeFootprintTrack.model_fields.keys(), ee_fields))
+            )
+            ee_footprint_data.tracks.append(ee_track)
+        elif ee_designator == "HOLE":
+            ee_hole = EeFootprintHole(
+                **dict(zip(EeFootprintHole.model_fields.keys(), ee_fields))
+            )
+            ee_footprint_data.holes.append(ee_hole)
+        elif ee_designator == "VIA":
+            ee_via = EeFootprintVia(
+                **dict(zip(EeFootprintVia.model_fields.keys(), ee_fields))
+            )
+            ee_footprint_data.vias.append(ee_via)
+        elif ee_designator == "CIRCLE":
+            ee_circle = EeFootprintCircle(
+                **dict(zip(EeFootprintCircle.model_fields.keys(), ee_fields))
+            )
+            ee_footprint_data.circles.append(ee_circle)
+        elif ee_designator == "ARC":
+            ee_arc = EeFootprintArc(
+                **dict(zip(EeFootprintArc.model_fields.keys(), ee_fields))
+            )
+            ee_footprint_data.arcs.append(ee_arc)
+        elif ee_designator == "RECT":
+            ee_rectangle = EeFootprintRectangle(
+                **dict(zip(EeFootprintRectangle.model_fields.keys(), ee_fields))
+            )
+            ee_footprint_data.rectangles.append(ee_rectangle)
+        elif ee_designator == "TEXT":
+            ee_text = EeFootprintText(
+                **dict(zip(EeFootprintText.model_fields.keys(), ee_fields))
+            )
+            ee_footprint_data.texts.append(ee_text)
+        elif ee_designator == "SVGNODE":
+            ee_footprint_data.model_3d = Easyeda3dModelImporter(
+                easyeda_cp_cad_data=[line], download_raw_3d_model=False
+            ).output
+
+        elif ee_designator == "SOLIDREGION":
+            ...
+        else:
+            logging.warning(f"Unknow footprint designator : {ee_designator}")
+
 
 # ------------------------------------------------------------------------------
 
@@ -279,44 +316,7 @@ class Easyeda3dModelImporter:
                 model_3d: Ee3dModel = self.parse_3d_model_info(info=model_3d_info)
                 
                 if self.download_raw_3d_model:
-                    logging.info(f"Downloading 3D model data for UUID: {model_3d.uuid}")
-                    
-                    # 创建API实例用于下载
-                    api = EasyedaApi()
-                    
-                    # Download OBJ format with retry
-                    raw_obj = None
-                    for attempt in range(3):  # 最多尝试3次
-                        raw_obj = api.get_raw_3d_model_obj(uuid=model_3d.uuid)
-                        if raw_obj:
-                            model_3d.raw_obj = raw_obj
-                            logging.info(f"Successfully downloaded OBJ 3D model")
-                            break
-                        else:
-                            logging.warning(f"Failed to download OBJ 3D model for UUID: {model_3d.uuid}, attempt {attempt + 1}/3")
-                            if attempt < 2:  # 不是最后一次尝试，等待后重试
-                                import time
-                                time.sleep(2 ** attempt)  # 指数退避
-                    
-                    if not raw_obj:
-                        logging.warning(f"最终失败 - Failed to download OBJ 3D model for UUID: {model_3d.uuid} after 3 attempts")
-                    
-                    # Download STEP format with retry
-                    step_data = None
-                    for attempt in range(3):  # 最多尝试3次
-                        step_data = api.get_step_3d_model(uuid=model_3d.uuid)
-                        if step_data:
-                            model_3d.step = step_data
-                            logging.info(f"Successfully downloaded STEP 3D model")
-                            break
-                        else:
-                            logging.warning(f"Failed to download STEP 3D model for UUID: {model_3d.uuid}, attempt {attempt + 1}/3")
-                            if attempt < 2:  # 不是最后一次尝试，等待后重试
-                                import time
-                                time.sleep(2 ** attempt)  # 指数退避
-                    
-                    if not step_data:
-                        logging.warning(f"最终失败 - Failed to download STEP 3D model for UUID: {model_3d.uuid} after 3 attempts")
+                    self.download_model_data(model_3d=model_3d)
                 
                 return model_3d
             else:
@@ -327,12 +327,72 @@ class Easyeda3dModelImporter:
             logging.error(f"Error creating 3D model: {e}")
             return None
 
+    @staticmethod
+    def download_model_data(
+        model_3d: Ee3dModel,
+        max_retries: int = 2,
+        retry_delay: float = 1,
+        obj_cache: ObjCache = None,
+    ) -> None:
+        """
+        下载3D模型的OBJ和STEP数据（仅网络请求会重试）
+        Download OBJ and STEP data of a parsed 3D model, only the network fetch is retried
+
+        参数:
+        Args:
+            model_3d (Ee3dModel): 已解析的3D模型信息 / Parsed 3D model info
+            max_retries (int): 最大重试次数 / Maximum number of retries
+            retry_delay (float): 首次重试等待时间（秒），之后指数退避 / First retry delay in seconds, exponential backoff afterwards
+            obj_cache (ObjCache): OBJ下载缓存，命中时映射缓存文件而不下载 / OBJ download cache, a hit maps the cached file instead of downloading
+        """
+        logging.info(f"Downloading 3D model data for UUID: {model_3d.uuid}")
+
+        # 创建API实例用于下载
+        api = EasyedaApi()
+        attempts = max_retries + 1
+
+        # Download OBJ format with retry
+        raw_obj = obj_cache.load(model_3d.uuid) if obj_cache is not None else None
+        if raw_obj:
+            model_3d.raw_obj = raw_obj
+            logging.info(f"Loaded OBJ 3D model from the local cache")
+        for attempt in range(0 if raw_obj else attempts):
+            raw_obj = api.get_raw_3d_model_obj(uuid=model_3d.uuid)
+            if raw_obj:
+                model_3d.raw_obj = raw_obj
+                logging.info(f"Successfully downloaded OBJ 3D model")
+                if obj_cache is not None:
+                    obj_cache.store(model_3d.uuid, raw_obj)
+                break
+            else:
+                logging.warning(f"Failed to download OBJ 3D model for UUID: {model_3d.uuid}, attempt {attempt + 1}/{attempts}")
+                if attempt < max_retries:  # 不是最后一次尝试，等待后重试
+                    time.sleep(retry_delay * (2 ** attempt))  # 指数退避
+
+        if not raw_obj:
+            logging.warning(f"最终失败 - Failed to download OBJ 3D model for UUID: {model_3d.uuid} after {attempts} attempts")
+
+        # Download STEP format with retry
+        step_data = None
+        for attempt in range(attempts):
+            step_data = api.get_step_3d_model(uuid=model_3d.uuid)
+            if step_data:
+                model_3d.step = step_data
+                logging.info(f"Successfully downloaded STEP 3D model")
+                break
+            else:
+                logging.warning(f"Failed to download STEP 3D model for UUID: {model_3d.uuid}, attempt {attempt + 1}/{attempts}")
+                if attempt < max_retries:  # 不是最后一次尝试，等待后重试
+                    time.sleep(retry_delay * (2 ** attempt))  # 指数退避
+
+        if not step_data:
+            logging.warning(f"最终失败 - Failed to download STEP 3D model for UUID: {model_3d.uuid} after {attempts} attempts")
+
     def get_3d_model_info(self, ee_data: str) -> dict:
         for line in ee_data:
-            ee_designator = line.split("~")[0]
-            if ee_designator == "SVGNODE":
-                raw_json = line.split("~")[1:][0]
-                return json.loads(raw_json)["attrs"]
+            if line.startswith("SVGNODE~"):
+                raw_json = line.split("~", 2)[1]
+                return json_loads(raw_json)["attrs"]
         return {}
 
     def parse_3d_model_info(self, info: dict) -> Ee3dModel:
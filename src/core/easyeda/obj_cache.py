@@ -0,0 +1,92 @@
+"""
+OBJ下载缓存
+Local cache of downloaded 3D model OBJ files
+
+缓存的OBJ通过内存映射读取，转换器直接在映射的字节上解析，
+不需要把整个文件读入内存或解码为字符串。
+Cached OBJ files are read through a memory map and the converter parses the mapped
+bytes directly, without reading the whole file into memory or decoding it to a string.
+"""
+
+# Global imports
+import logging
+import mmap
+import re
+from pathlib import Path
+from typing import Union
+
+from ..utils.cache_utils import get_cache_root
+from ..utils.file_utils import write_file_atomic
+
+# UUID只用作文件名，不允许出现路径分隔符等字符
+# The UUID is used as a file name, path separators and the like are not allowed
+UUID_REGEX = re.compile(r"[0-9A-Za-z_-]+")
+
+
+class MappedObjFile(mmap.mmap):
+    """
+    只读映射的OBJ文件，序列化时只传递文件路径，在转换进程中重新映射
+    Read-only mapped OBJ file, pickled as its path and mapped again in the conversion process
+    """
+
+    def __new__(cls, path: Union[str, Path]):
+        with open(path, "rb") as obj_file:
+            mapped = super().__new__(cls, obj_file.fileno(), 0, access=mmap.ACCESS_READ)
+        mapped.path = str(path)
+        return mapped
+
+    def __reduce__(self):
+        return MappedObjFile, (self.path,)
+
+
+class ObjCache:
+    """
+    基于磁盘的OBJ下载缓存，以3D模型UUID为键
+    Disk backed cache of downloaded OBJ files, keyed by the 3D model UUID
+    """
+
+    def __init__(self, cache_dir: str = "") -> None:
+        self.cache_dir = get_cache_root(cache_dir) / "obj_cache"
+
+    def get_entry_path(self, uuid: str) -> Path:
+        return self.cache_dir / uuid[:2] / f"{uuid}.obj"
+
+    def load(self, uuid: str) -> Union[MappedObjFile, None]:
+        """
+        映射缓存的OBJ文件，未命中时返回None
+        Map a cached OBJ file, None on a miss
+
+        参数:
+        Args:
+            uuid (str): 3D模型UUID / 3D model UUID
+
+        返回:
+        Returns:
+            MappedObjFile: 只读映射的OBJ数据 / Read-only mapped OBJ data
+        """
+        if not UUID_REGEX.fullmatch(uuid or ""):
+            return None
+        entry_path = self.get_entry_path(uuid)
+        try:
+            return MappedObjFile(entry_path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            # 空文件无法映射，按未命中处理
+            # Empty files can't be mapped, they count as a miss
+            logging.debug(f"Ignoring unreadable OBJ cache entry {entry_path}: {e}")
+            return None
+
+    def store(self, uuid: str, raw_obj: bytes) -> None:
+        """
+        原子地写入OBJ数据，失败时只记录日志
+        Atomically write OBJ data, failures are only logged
+        """
+        if not UUID_REGEX.fullmatch(uuid or ""):
+            return
+        entry_path = self.get_entry_path(uuid)
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            write_file_atomic(entry_path, raw_obj)
+        except Exception as e:
+            logging.warning(f"Failed to write OBJ cache entry {entry_path}: {e}")
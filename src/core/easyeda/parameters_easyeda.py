@@ -615,7 +615,9 @@ class Ee3dModel:
     uuid: str
     translation: Ee3dModelBase
     rotation: Ee3dModelBase
-    raw_obj: str = None
+    # OBJ数据保持为字节（或内存映射的缓存文件），转换器不需要解码整个文件
+    # OBJ data stays bytes (or a memory mapped cache file), the converter never decodes the whole file
+    raw_obj: bytes = None
     step: bytes = None
 
     def convert_to_mm(self) -> None:
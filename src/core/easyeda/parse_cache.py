@@ -0,0 +1,102 @@
+"""
+解析结果缓存
+Persistent cache of parsed EasyEDA symbol, footprint and 3D model data
+
+缓存以元件数据的哈希为键，命中时直接反序列化 EeSymbol / ee_footprint / Ee3dModel，
+跳过图形数据的切分和 pydantic 模型构建。
+Entries are keyed by a hash of the component payload. A hit unpickles the parsed
+EeSymbol / ee_footprint / Ee3dModel directly, skipping shape tokenizing and pydantic validation.
+"""
+
+# Global imports
+import hashlib
+import logging
+import pickle
+from pathlib import Path
+from typing import Any, Tuple
+
+from ..utils.cache_utils import get_cache_root
+from ..utils.file_utils import write_file_atomic
+from ..utils.json_utils import json_dumps
+
+# 修改 parameters_easyeda 中的数据结构后必须增加此版本号，旧的缓存条目会被忽略
+# Bump whenever the classes in parameters_easyeda change, older entries are ignored
+PARSE_CACHE_SCHEMA_VERSION = 2
+
+PICKLE_PROTOCOL = 5
+
+# 导入器读取的所有字段，哈希必须覆盖它们
+# Every field read by the importers, the hash has to cover all of them
+PAYLOAD_KEYS = ("dataStr", "packageDetail", "lcsc", "SMT")
+
+# 封装导入器读取的字段 / Fields read by the footprint importer
+FOOTPRINT_PAYLOAD_KEYS = ("packageDetail", "SMT")
+
+
+def compute_payload_hash(easyeda_cp_cad_data: dict, keys: Tuple[str, ...] = PAYLOAD_KEYS) -> str:
+    """
+    计算元件数据的哈希值
+    Compute the hash of a component payload
+
+    参数:
+    Args:
+        easyeda_cp_cad_data (dict): EasyEDA API返回的元件数据 / Component data returned by the EasyEDA API
+        keys (tuple): 参与哈希的字段，默认为所有导入器读取的字段 / Fields covered by the hash, all fields read by the importers by default
+
+    返回:
+    Returns:
+        str: SHA-256十六进制摘要 / SHA-256 hex digest
+    """
+    payload = {key: easyeda_cp_cad_data.get(key) for key in keys}
+    return hashlib.sha256(json_dumps(payload, sort_keys=True)).hexdigest()
+
+
+class ParseCache:
+    """
+    基于磁盘的解析结果缓存
+    Disk backed cache of parse results
+    """
+
+    def __init__(self, cache_dir: str = "") -> None:
+        self.cache_dir = get_cache_root(cache_dir) / "parse_cache"
+
+    def get_entry_path(self, payload_hash: str, kind: str) -> Path:
+        return self.cache_dir / payload_hash[:2] / f"{payload_hash}.{kind}.pickle"
+
+    def load(self, payload_hash: str, kind: str) -> Tuple[bool, Any]:
+        """
+        读取缓存条目
+        Load a cache entry
+
+        返回:
+        Returns:
+            Tuple[bool, Any]: (是否命中, 解析结果)，结果本身可以是None / (hit, parsed value), the value itself may be None
+        """
+        entry_path = self.get_entry_path(payload_hash, kind)
+        try:
+            with open(entry_path, "rb") as entry_file:
+                schema_version, entry_kind, value = pickle.load(entry_file)
+        except FileNotFoundError:
+            return False, None
+        except Exception as e:
+            logging.debug(f"Ignoring unreadable parse cache entry {entry_path}: {e}")
+            return False, None
+
+        if schema_version != PARSE_CACHE_SCHEMA_VERSION or entry_kind != kind:
+            return False, None
+        return True, value
+
+    def store(self, payload_hash: str, kind: str, value: Any) -> None:
+        """
+        原子地写入缓存条目，失败时只记录日志
+        Atomically write a cache entry, failures are only logged
+        """
+        entry_path = self.get_entry_path(payload_hash, kind)
+        try:
+            entry_path.parent.mkdir(parents=True, exist_ok=True)
+            data = pickle.dumps(
+                (PARSE_CACHE_SCHEMA_VERSION, kind, value), protocol=PICKLE_PROTOCOL
+            )
+            write_file_atomic(entry_path, data)
+        except Exception as e:
+            logging.warning(f"Failed to write parse cache entry {entry_path}: {e}")
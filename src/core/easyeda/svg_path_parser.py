@@ -1,24 +1,41 @@
 # Global imports
 import logging
+import math
 import re
-from dataclasses import dataclass, field
-from enum import Enum
-from typing import List, Union
+from typing import Iterator, List, NamedTuple, Tuple, Union
 
-from pydantic import BaseModel, validator
+# SVG path engine : doc -> https://www.w3.org/TR/SVG11/paths.html#PathData
+# All commands (absolute and relative) are normalized to absolute coordinates
+# and yielded lazily as plain (named) tuples.
 
 
-class SvgPathMoveTo(BaseModel):
+class SvgPathMoveTo(NamedTuple):
     start_x: float
     start_y: float
 
 
-class SvgPathLineTo(BaseModel):
+class SvgPathLineTo(NamedTuple):
     pos_x: float
     pos_y: float
 
 
-class SvgPathEllipticalArc(BaseModel):
+class SvgPathCubicBezier(NamedTuple):
+    control1_x: float
+    control1_y: float
+    control2_x: float
+    control2_y: float
+    end_x: float
+    end_y: float
+
+
+class SvgPathQuadraticBezier(NamedTuple):
+    control_x: float
+    control_y: float
+    end_x: float
+    end_y: float
+
+
+class SvgPathEllipticalArc(NamedTuple):
     radius_x: float
     radius_y: float
     x_axis_rotation: float
@@ -28,41 +45,283 @@ class SvgPathEllipticalArc(BaseModel):
     end_y: float
 
 
-class SvgPathClosePath(BaseModel):
-    ...
+class SvgPathClosePath(NamedTuple):
+    pass
 
 
-svg_path_handlers = {
-    "M": (SvgPathMoveTo, 2),
-    "A": (SvgPathEllipticalArc, 7),
-    "L": (SvgPathLineTo, 2),
-    "Z": (SvgPathClosePath, 0),
+SvgPathCommand = Union[
+    SvgPathMoveTo,
+    SvgPathLineTo,
+    SvgPathCubicBezier,
+    SvgPathQuadraticBezier,
+    SvgPathEllipticalArc,
+    SvgPathClosePath,
+]
+
+# Number of arguments of each command
+svg_path_arguments = {
+    "M": 2,
+    "L": 2,
+    "H": 1,
+    "V": 1,
+    "C": 6,
+    "S": 4,
+    "Q": 4,
+    "T": 2,
+    "A": 7,
+    "Z": 0,
 }
 
+SVG_PATH_TOKEN_REGEX = re.compile(
+    r"([MmLlHhVvCcSsQqTtAaZz])|([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)"
+)
+
+# Number of line segments used when a curve has to be flattened
+CURVE_SEGMENTS = 8
+
+
+def tokenize_svg_path(svg_path: str) -> Iterator[Tuple[str, List[str]]]:
+    """
+    将SVG路径切分为 (命令, 参数列表)，多组参数会拆分为多个命令
+    Split a SVG path into (command, arguments), repeated argument groups give repeated commands
+    """
+    command = None
+    arguments: List[str] = []
+    for match in SVG_PATH_TOKEN_REGEX.finditer(svg_path):
+        letter, number = match.groups()
+        if letter:
+            if command is not None and arguments:
+                logging.warning(f"SVG command {command} has dangling arguments: {arguments}")
+            command, arguments = letter, []
+            if command in "Zz":
+                yield command, arguments
+            continue
+        if command is None:
+            logging.warning("SVG path doesn't start with a command")
+            return
+
+        # Arc flags may be packed without separator, e.g. "a1 1 0 0110 10"
+        if command in "Aa" and len(arguments) in (3, 4) and len(number) > 1:
+            while len(arguments) in (3, 4) and number and number[0] in "01":
+                arguments.append(number[0])
+                number = number[1:]
+            if not number:
+                if len(arguments) == 7:
+                    yield command, arguments
+                    arguments = []
+                continue
+
+        arguments.append(number)
+        if len(arguments) == svg_path_arguments[command.upper()]:
+            yield command, arguments
+            arguments = []
+            # Extra coordinate pairs after a moveto are implicit linetos
+            if command == "M":
+                command = "L"
+            elif command == "m":
+                command = "l"
+
+
+def iter_svg_path(svg_path: str) -> Iterator[SvgPathCommand]:
+    """
+    惰性解析SVG路径，所有命令都转换为绝对坐标
+    Lazily parse a SVG path, every command is converted to absolute coordinates
+
+    H/V 转换为 SvgPathLineTo，S/T 转换为带反射控制点的贝塞尔曲线。
+    H/V are yielded as SvgPathLineTo, S/T as beziers with the reflected control point.
+    """
+    current_x = current_y = 0.0
+    start_x = start_y = 0.0
+    last_control = None  # (command type, x, y) of the previous bezier control point
+
+    for command, raw_arguments in tokenize_svg_path(svg_path):
+        upper = command.upper()
+        relative = command != upper
+        arguments = [float(argument) for argument in raw_arguments]
+        offset_x, offset_y = (current_x, current_y) if relative else (0.0, 0.0)
+        control = None
+
+        if upper == "M":
+            current_x = start_x = arguments[0] + offset_x
+            current_y = start_y = arguments[1] + offset_y
+            yield SvgPathMoveTo(current_x, current_y)
+        elif upper in "LHV":
+            if upper == "H":
+                current_x = arguments[0] + offset_x
+            elif upper == "V":
+                current_y = arguments[0] + offset_y
+            else:
+                current_x = arguments[0] + offset_x
+                current_y = arguments[1] + offset_y
+            yield SvgPathLineTo(current_x, current_y)
+        elif upper in "CS":
+            if upper == "C":
+                control1_x = arguments[0] + offset_x
+                control1_y = arguments[1] + offset_y
+                arguments = arguments[2:]
+            elif last_control and last_control[0] == "C":
+                control1_x = 2 * current_x - last_control[1]
+                control1_y = 2 * current_y - last_control[2]
+            else:
+                control1_x, control1_y = current_x, current_y
+            control2_x = arguments[0] + offset_x
+            control2_y = arguments[1] + offset_y
+            current_x = arguments[2] + offset_x
+            current_y = arguments[3] + offset_y
+            control = ("C", control2_x, control2_y)
+            yield SvgPathCubicBezier(
+                control1_x, control1_y, control2_x, control2_y, current_x, current_y
+            )
+        elif upper in "QT":
+            if upper == "Q":
+                control_x = arguments[0] + offset_x
+                control_y = arguments[1] + offset_y
+                arguments = arguments[2:]
+            elif last_control and last_control[0] == "Q":
+                control_x = 2 * current_x - last_control[1]
+                control_y = 2 * current_y - last_control[2]
+            else:
+                control_x, control_y = current_x, current_y
+            current_x = arguments[0] + offset_x
+            current_y = arguments[1] + offset_y
+            control = ("Q", control_x, control_y)
+            yield SvgPathQuadraticBezier(control_x, control_y, current_x, current_y)
+        elif upper == "A":
+            current_x = arguments[5] + offset_x
+            current_y = arguments[6] + offset_y
+            yield SvgPathEllipticalArc(
+                arguments[0],
+                arguments[1],
+                arguments[2],
+                arguments[3] != 0,
+                arguments[4] != 0,
+                current_x,
+                current_y,
+            )
+        elif upper == "Z":
+            current_x, current_y = start_x, start_y
+            yield SvgPathClosePath()
+
+        last_control = control
+
 
 def parse_svg_path(svg_path: str) -> list:
-    if not svg_path.endswith(" "):
-        svg_path += " "
-    svg_path = svg_path.replace(",", " ")
-
-    path_splited = re.findall(r"([a-zA-Z])([ ,\-\+.\d]+)", svg_path)
-
-    parsed_path = []
-    for path_command in path_splited:
-        if cmd_class_info := svg_path_handlers.get(path_command[0]):
-            cmd_class, cmd_nb_arguments = cmd_class_info
-            arguments = path_command[1].strip().split(" ")
-            # if multiple (x y) in a command
-            parsed_path.extend(
-                cmd_class(
-                    **dict(
-                        zip(cmd_class.model_fields.keys(), arguments[i : i + cmd_nb_arguments])
+    return list(iter_svg_path(svg_path))
+
+
+# ---------------------------------------
+
+
+def flatten_elliptical_arc(
+    start_x: float, start_y: float, arc: SvgPathEllipticalArc, segments: int
+) -> Iterator[Tuple[float, float]]:
+    # Endpoint to center parameterization
+    # https://www.w3.org/TR/SVG11/implnote.html#ArcConversionEndpointToCenter
+    radius_x, radius_y = abs(arc.radius_x), abs(arc.radius_y)
+    if radius_x == 0 or radius_y == 0 or (start_x, start_y) == (arc.end_x, arc.end_y):
+        yield arc.end_x, arc.end_y
+        return
+
+    phi = math.radians(arc.x_axis_rotation % 360.0)
+    cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+    dx2 = (start_x - arc.end_x) / 2.0
+    dy2 = (start_y - arc.end_y) / 2.0
+    x1 = cos_phi * dx2 + sin_phi * dy2
+    y1 = -sin_phi * dx2 + cos_phi * dy2
+
+    radii_check = (x1 * x1) / (radius_x * radius_x) + (y1 * y1) / (radius_y * radius_y)
+    if radii_check > 1:
+        radius_x *= math.sqrt(radii_check)
+        radius_y *= math.sqrt(radii_check)
+
+    numerator = (
+        radius_x * radius_x * radius_y * radius_y
+        - radius_x * radius_x * y1 * y1
+        - radius_y * radius_y * x1 * x1
+    )
+    denominator = radius_x * radius_x * y1 * y1 + radius_y * radius_y * x1 * x1
+    coef = math.sqrt(max(numerator / denominator, 0)) if denominator else 0
+    if arc.flag_large_arc == arc.flag_sweep:
+        coef = -coef
+    cx1 = coef * radius_x * y1 / radius_y
+    cy1 = -coef * radius_y * x1 / radius_x
+    center_x = cos_phi * cx1 - sin_phi * cy1 + (start_x + arc.end_x) / 2.0
+    center_y = sin_phi * cx1 + cos_phi * cy1 + (start_y + arc.end_y) / 2.0
+
+    theta_start = math.atan2((y1 - cy1) / radius_y, (x1 - cx1) / radius_x)
+    theta_end = math.atan2((-y1 - cy1) / radius_y, (-x1 - cx1) / radius_x)
+    extent = theta_end - theta_start
+    if arc.flag_sweep and extent < 0:
+        extent += 2 * math.pi
+    elif not arc.flag_sweep and extent > 0:
+        extent -= 2 * math.pi
+
+    for step in range(1, segments):
+        theta = theta_start + extent * step / segments
+        x = radius_x * math.cos(theta)
+        y = radius_y * math.sin(theta)
+        yield center_x + cos_phi * x - sin_phi * y, center_y + sin_phi * x + cos_phi * y
+    yield arc.end_x, arc.end_y
+
+
+def iter_svg_subpaths(
+    svg_path: str, curve_segments: int = CURVE_SEGMENTS
+) -> Iterator[List[Tuple[float, float]]]:
+    """
+    将SVG路径展开为折线，每个子路径输出一个点列表，曲线和圆弧被分段近似
+    Flatten a SVG path to polylines, one point list per subpath, curves and arcs are approximated by segments
+
+    闭合的子路径以起点结尾。
+    Closed subpaths end with their first point.
+    """
+    points: List[Tuple[float, float]] = []
+    for command in iter_svg_path(svg_path):
+        if isinstance(command, SvgPathMoveTo):
+            if len(points) > 1:
+                yield points
+            points = [(command.start_x, command.start_y)]
+            continue
+        if not points:
+            # Path without an initial moveto starts at the origin
+            points = [(0.0, 0.0)]
+
+        current_x, current_y = points[-1]
+        if isinstance(command, SvgPathLineTo):
+            points.append((command.pos_x, command.pos_y))
+        elif isinstance(command, SvgPathCubicBezier):
+            for step in range(1, curve_segments + 1):
+                t = step / curve_segments
+                u = 1 - t
+                points.append(
+                    (
+                        u * u * u * current_x
+                        + 3 * u * u * t * command.control1_x
+                        + 3 * u * t * t * command.control2_x
+                        + t * t * t * command.end_x,
+                        u * u * u * current_y
+                        + 3 * u * u * t * command.control1_y
+                        + 3 * u * t * t * command.control2_y
+                        + t * t * t * command.end_y,
+                    )
+                )
+        elif isinstance(command, SvgPathQuadraticBezier):
+            for step in range(1, curve_segments + 1):
+                t = step / curve_segments
+                u = 1 - t
+                points.append(
+                    (
+                        u * u * current_x + 2 * u * t * command.control_x + t * t * command.end_x,
+                        u * u * current_y + 2 * u * t * command.control_y + t * t * command.end_y,
                     )
                 )
-                for i in range(0, len(arguments), cmd_nb_arguments or 1)
+        elif isinstance(command, SvgPathEllipticalArc):
+            points.extend(
+                flatten_elliptical_arc(current_x, current_y, command, curve_segments)
             )
-        else:
-            logging.warning("SVG command path not supported")
-
-    return parsed_path
+        elif isinstance(command, SvgPathClosePath):
+            points.append(points[0])
+            yield points
+            points = [points[0]]
 
+    if len(points) > 1:
+        yield points
@@ -1,12 +1,16 @@
 # KiCad模块初始化
+from .conversion_backend import ConversionExecutor
 from .export_kicad_3d_model import Exporter3dModelKicad as KiCad3DModelExporter
 from .export_kicad_footprint import ExporterFootprintKicad as KiCadFootprintExporter
 from .export_kicad_symbol import ExporterSymbolKicad as KiCadSymbolExporter
+from .mesh_processing import MeshOptions
 from .parameters_kicad_footprint import *
 from .parameters_kicad_symbol import *
 
 __all__ = [
+    'ConversionExecutor',
     'KiCad3DModelExporter',
     'KiCadFootprintExporter', 
-    'KiCadSymbolExporter'
+    'KiCadSymbolExporter',
+    'MeshOptions'
 ]
\ No newline at end of file
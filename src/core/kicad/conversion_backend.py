@@ -0,0 +1,140 @@
+"""
+转换执行后端
+Pluggable executor for the CPU-bound conversion stages
+
+符号转换、封装生成和OBJ到WRL的转换都是纯Python计算，在线程池中会被GIL串行化。
+ConversionExecutor 可以把这些阶段放到进程池中执行，网络请求和文件写入仍留在调用线程。
+Symbol conversion, footprint generation and OBJ to WRL conversion are pure Python and
+serialised by the GIL under threads. ConversionExecutor can run these stages in a process
+pool, network requests and file writes stay on the calling threads.
+
+提交到进程池的函数必须是模块级函数，参数会先序列化为紧凑的pickle数据。
+Functions submitted to the process pool must be module level, their arguments are
+serialized to a compact pickle payload first.
+"""
+
+# Global imports
+import logging
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from ..easyeda.parameters_easyeda import EeSymbol, ee_footprint
+from .export_kicad_footprint import ExporterFootprintKicad
+from .export_kicad_symbol import ExporterSymbolKicad
+from .parameters_kicad_symbol import KicadVersion
+
+CONVERSION_BACKENDS = ("auto", "process", "thread")
+
+# "auto" 模式下，元件数量达到此值才启动进程池，少量元件时进程启动开销大于收益
+# In "auto" mode the process pool is only started for batches of at least this size,
+# for a few components the process start-up costs more than it saves
+PROCESS_POOL_MIN_COMPONENTS = 8
+
+PICKLE_PROTOCOL = 5
+
+
+def render_symbol(
+    ee_symbol: EeSymbol, kicad_version: KicadVersion, footprint_lib_name: str
+) -> str:
+    """转换符号并生成KiCad符号文本 / Convert a symbol and render the KiCad symbol text"""
+    return ExporterSymbolKicad(symbol=ee_symbol, kicad_version=kicad_version).export(
+        footprint_lib_name=footprint_lib_name
+    )
+
+
+def render_footprint(
+    ee_footprint_data: ee_footprint, model_3d_path: str, model_3d_extension: str = "wrl"
+) -> str:
+    """转换封装并生成.kicad_mod文本 / Convert a footprint and render the .kicad_mod text"""
+    return ExporterFootprintKicad(footprint=ee_footprint_data).render(
+        model_3d_path=model_3d_path, model_3d_extension=model_3d_extension
+    )
+
+
+def run_pickled(func: Callable, payload: bytes) -> Any:
+    args, kwargs = pickle.loads(payload)
+    return func(*args, **kwargs)
+
+
+def get_conversion_workers(conversion_workers: int = 0) -> int:
+    """
+    获取转换进程数，0表示使用CPU核心数
+    Get the number of conversion processes, 0 means the CPU count
+    """
+    return conversion_workers if conversion_workers > 0 else (os.cpu_count() or 1)
+
+
+class ConversionExecutor:
+    """
+    CPU密集转换阶段的执行器
+    Executor of the CPU-bound conversion stages
+
+    参数:
+    Args:
+        backend (str): "process" 使用进程池，"thread" 在调用线程中直接执行 /
+            "process" runs in a process pool, "thread" runs inline on the calling thread
+        max_workers (int): 进程数，0表示CPU核心数 / Number of processes, 0 means the CPU count
+    """
+
+    def __init__(self, backend: str = "thread", max_workers: int = 0) -> None:
+        if backend not in ("process", "thread"):
+            raise ValueError(f"Unknown conversion backend: {backend}")
+        self.backend = backend
+        self.max_workers = get_conversion_workers(max_workers)
+        self.pool = None
+        self.pool_lock = threading.Lock()
+
+    @classmethod
+    def for_batch(
+        cls, backend: str, component_count: int, max_workers: int = 0
+    ) -> "ConversionExecutor":
+        """
+        根据配置和元件数量选择后端
+        Choose the backend from the configuration and the batch size
+        """
+        if backend == "auto":
+            use_processes = (
+                component_count >= PROCESS_POOL_MIN_COMPONENTS
+                and get_conversion_workers(max_workers) > 1
+            )
+            backend = "process" if use_processes else "thread"
+        return cls(backend=backend, max_workers=max_workers)
+
+    def get_pool(self) -> ProcessPoolExecutor:
+        with self.pool_lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self.pool
+
+    def run(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        执行一个转换阶段并返回结果，进程池损坏时回退到调用线程执行
+        Run a conversion stage and return its result, falls back to the calling
+        thread when the process pool is broken
+        """
+        if self.backend == "thread":
+            return func(*args, **kwargs)
+
+        payload = pickle.dumps((args, kwargs), protocol=PICKLE_PROTOCOL)
+        try:
+            return self.get_pool().submit(run_pickled, func, payload).result()
+        except BrokenProcessPool as e:
+            logging.warning(f"Conversion process pool is broken, running inline: {e}")
+            self.backend = "thread"
+            return func(*args, **kwargs)
+
+    def shutdown(self) -> None:
+        with self.pool_lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=True, cancel_futures=True)
+                self.pool = None
+
+    def __enter__(self) -> "ConversionExecutor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
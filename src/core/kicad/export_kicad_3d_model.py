@@ -5,193 +5,844 @@ Convert 3D model from .obj format to .wrl with colors
 from __future__ import annotations
 
 # Global imports
+import gzip
+import io
+import functools
+import itertools
+import mmap
 import re
 import textwrap
+from typing import IO, Iterator, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 from ..easyeda.parameters_easyeda import Ee3dModel
+from ..utils.file_utils import AtomicOutputFile, WriteResult, write_file_atomic
+from .mesh_processing import (
+    WRL_LAYOUT_PER_SHAPE,
+    WRL_LAYOUT_PLAIN,
+    WRL_LAYOUT_SHARED,
+    MeshOptions,
+    MeshStats,
+    decimate_mesh,
+    get_shape_tables,
+    optimize_mesh,
+    optimize_mesh_numpy,
+)
 from .parameters_kicad_footprint import Ki3dModel
 
 VRML_HEADER = """#VRML V2.0 utf8
 # 3D model generated by EasyKiConverter (https://github.com/tangsangsimida/EasyKiConverter)
 """
 
+# 面索引文本中只允许出现空格分隔的、最多18位的正整数
+# Only space separated positive integers of at most 18 digits may appear in the face indices
+INVALID_FACE_INDICES_REGEX = re.compile(rb"[^0-9 ]|[0-9]{19}")
+VERTEX_COORD_PATTERN = rb"-?(?:[0-9]+(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][-+]?[0-9]+)?"
+VERTEX_COORDS_REGEX = re.compile(b" ".join([VERTEX_COORD_PATTERN] * 3))
+
+# Shape模板，外观以DEF定义或以USE引用，由 format_shape_head 填入
+# The Shape template, its appearance is filled in by format_shape_head as a DEF
+# definition or a USE reference
+WRL_SHAPE = textwrap.dedent(
+    """
+    Shape{{
+        appearance {appearance}
+        geometry IndexedFaceSet {{
+            ccw TRUE
+            solid FALSE
+            coord DEF co Coordinate {{
+                point [
+                    {points}
+                ]
+            }}
+            coordIndex [
+                {coord_index}
+            ]
+        }}
+    }}"""
+)
+WRL_APPEARANCE = textwrap.dedent(
+    """\
+    Appearance {{
+            material  Material {{
+                diffuseColor {diffuse_color}
+                specularColor {specular_color}
+                ambientIntensity 0.2
+                transparency {transparency}
+                shininess 0.5
+            }}
+        }}"""
+)
+# 为流式输出在点列表和面索引处切开的三段
+# The three parts of the Shape template split at the point list and the face indices
+# for streaming output
+WRL_SHAPE_HEAD, WRL_SHAPE_MIDDLE, WRL_SHAPE_TAIL = re.split(
+    r"\{points\}|\{coord_index\}", WRL_SHAPE
+)
+WRL_SHAPE_MIDDLE = WRL_SHAPE_MIDDLE.format()
+WRL_SHAPE_TAIL = WRL_SHAPE_TAIL.format()
+
+# 网格优化后，除第一个Shape外都用USE引用第一个Shape定义的共享顶点表
+# After mesh optimisation every Shape but the first refers to the shared vertex table
+# defined by the first one with USE
+WRL_SHAPE_USE_HEAD = (
+    WRL_SHAPE_HEAD[:WRL_SHAPE_HEAD.index("coord DEF co")]
+    + "coord USE co"
+    + WRL_SHAPE_MIDDLE[WRL_SHAPE_MIDDLE.index("\n", WRL_SHAPE_MIDDLE.index("}")):]
+)
+
+# 材质块匹配和按文本缓存的材质解析结果；EasyEDA模型反复使用同样几种标准材质
+# Material block matching, and parsed materials cached by their text. EasyEDA models
+# use the same few standard materials over and over
+MATERIAL_BLOCK_REGEX = re.compile(rb"newmtl .*?endmtl", re.DOTALL)
+MATERIAL_CACHE_SIZE = 1024
+DEFAULT_MATERIAL = {
+    "diffuse_color": "0.8 0.8 0.8",
+    "specular_color": "0.2 0.2 0.2",
+    "transparency": "0",
+}
+DEFAULT_APPEARANCE = WRL_APPEARANCE.format(**DEFAULT_MATERIAL)
+
+# 流式输出时每个文本块包含的点或索引数量
+# Number of points or indices per text chunk when streaming
+WRL_CHUNK_SIZE = 8192
+
+# KiCad的VRML加载器可以直接读取gzip压缩的VRML（.wrz）
+# KiCad's VRML loader reads gzip compressed VRML (.wrz) directly
+WRL_EXTENSION = "wrl"
+WRZ_EXTENSION = "wrz"
+# 压缩级别6的压缩率与9几乎相同，耗时只有一半
+# Level 6 compresses almost as well as level 9 in half the time
+WRZ_COMPRESS_LEVEL = 6
+
+
+def get_obj_bytes(obj_data: Union[bytes, mmap.mmap, str]) -> Union[bytes, mmap.mmap]:
+    """
+    OBJ数据按字节处理；字节和映射的文件原样返回，只有字符串需要编码
+    OBJ data is handled as bytes. Bytes and mapped files are returned as they are,
+    only strings have to be encoded
+    """
+    return obj_data.encode("utf-8") if isinstance(obj_data, str) else obj_data
 
-def get_materials(obj_data: str) -> dict:
 
-    material_regex = "newmtl .*?endmtl"
-    matchs = re.findall(pattern=material_regex, string=obj_data, flags=re.DOTALL)
+def decode_obj_text(data: bytes) -> str:
+    return data.decode("utf-8", errors="replace")
 
+
+@functools.lru_cache(maxsize=MATERIAL_CACHE_SIZE)
+def parse_material_block(block: bytes) -> Tuple[str, str]:
+    """
+    单遍解析一个 newmtl ... endmtl 材质块，相同文本的材质块只解析一次
+    Parse one newmtl ... endmtl material block in a single pass, blocks with the same
+    text are only parsed once
+
+    返回:
+    Returns:
+        Tuple[str, str]: (材质名, Appearance节点文本) / (material name, Appearance node text)
+    """
+    material = dict(DEFAULT_MATERIAL)
+    material_id = None
+    for line in decode_obj_text(block).splitlines():
+        key, _, value = line.partition(" ")
+        if key == "newmtl":
+            material_id = value.split(" ")[0]
+        elif key == "Kd":
+            material["diffuse_color"] = value
+        elif key == "Ks":
+            material["specular_color"] = value
+        elif key == "d":
+            # This isn't exactly the same as transparency, is dissolve
+            # I.e. part C115366 (SW-TH_SPEF110100) has d=1, and isn't transparent
+            material["transparency"] = value.split(" ")[0] or DEFAULT_MATERIAL["transparency"]
+    return material_id, WRL_APPEARANCE.format(**material)
+
+
+def get_materials(obj_data: Union[bytes, mmap.mmap, str]) -> dict:
+    """
+    读取OBJ中的所有材质
+    Read all materials of an OBJ
+
+    返回:
+    Returns:
+        dict: 材质名 -> Appearance节点文本 / Material name -> Appearance node text
+    """
     materials = {}
-    for match in matchs:
-        material = {}
-        for value in match.splitlines():
-            if value.startswith("newmtl"):
-                material_id = value.split(" ")[1]
-            elif value.startswith("Ka"):
-                material["ambient_color"] = value.split(" ")[1:]
-            elif value.startswith("Kd"):
-                material["diffuse_color"] = value.split(" ")[1:]
-            elif value.startswith("Ks"):
-                material["specular_color"] = value.split(" ")[1:]
-            elif value.startswith("d"):
-                # This isn't exactly the same as transparency, is dissolve
-                # I.e. part C115366 (SW-TH_SPEF110100) has d=1, and isn't transparent
-                material["transparency"] = value.split(" ")[1]
-
-        materials[material_id] = material
+    for match in MATERIAL_BLOCK_REGEX.finditer(get_obj_bytes(obj_data)):
+        material_id, appearance = parse_material_block(match.group())
+        materials[material_id] = appearance
     return materials
 
 
-def get_vertices(obj_data: str) -> list:
-    vertices_regex = "v (.*?)\n"
-    matchs = re.findall(pattern=vertices_regex, string=obj_data, flags=re.DOTALL)
+def get_vertices(obj_data: Union[bytes, mmap.mmap, str]) -> list:
+    vertices_regex = rb"v (.*?)\n"
+    matchs = re.findall(pattern=vertices_regex, string=get_obj_bytes(obj_data), flags=re.DOTALL)
 
     return [
-        " ".join([str(round(float(coord) / 2.54, 4)) for coord in vertice.split(" ")])
+        " ".join([str(round(float(coord) / 2.54, 4)) for coord in decode_obj_text(vertice).split(" ")])
         for vertice in matchs
     ]
 
 
-def generate_wrl_model(model_3d: Ee3dModel) -> Ki3dModel:
-    """Generate WRL model with better error handling"""
-    if not model_3d.raw_obj:
+def round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """
+    按Python内置round()的结果对数组取整
+    Round an array exactly like the builtin round() does
+
+    np.round 先乘以10的幂再取整，乘法有舍入误差，接近.5的值可能与round()结果不同，
+    这些值会单独用round()重新计算。
+    np.round scales by a power of ten first, which is inexact, so values close to a
+    rounding tie can differ from round(). Those are recomputed with round().
+    """
+    scale = 10.0**ndigits
+    with np.errstate(invalid="ignore", over="ignore"):
+        scaled = values * scale
+        rounded = np.rint(scaled) / scale
+        # 超过2**52的值已经是整数，round()原样返回
+        # Values above 2**52 are already integers, round() returns them unchanged
+        exact = ~(np.abs(scaled) < 2.0**52)
+        rounded[exact] = values[exact]
+        near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for index in np.flatnonzero(near_tie):
+        rounded[index] = round(float(values[index]), ndigits)
+    return rounded
+
+
+def get_vertices_numpy(obj_data: Union[bytes, mmap.mmap, str]) -> Union[list, None]:
+    """
+    get_vertices 的NumPy实现，结果完全相同；顶点不是三个坐标时返回None
+    NumPy version of get_vertices with identical output, None when a vertex doesn't have three coordinates
+    """
+    vertices = read_vertices_numpy(obj_data)
+    return vertices[0] if vertices is not None else None
+
+
+def read_vertices_numpy(obj_data: Union[bytes, mmap.mmap, str]) -> Union[Tuple[list, np.ndarray], None]:
+    """
+    读取顶点字符串和对应的 (n, 3) 坐标数组，坐标等于字符串表示的数值
+    Read the vertex strings and the matching (n, 3) coordinate array, whose values equal
+    the numbers the strings represent
+    """
+    matchs = re.findall(pattern=rb"v (.*?)\n", string=get_obj_bytes(obj_data), flags=re.DOTALL)
+    if set(map(bytes.count, matchs, itertools.repeat(b" "))) - {2}:
         return None
-        
-    materials = get_materials(obj_data=model_3d.raw_obj)
-    vertices = get_vertices(obj_data=model_3d.raw_obj)
-
-    raw_wrl = VRML_HEADER
-    shapes = model_3d.raw_obj.split("usemtl")[1:]
-    
-    if not shapes:
-        # 如果没有usemtl，处理整个OBJ作为单个形状
-        shapes = [model_3d.raw_obj]
-    
-    for shape in shapes:
+
+    if not matchs:
+        return [], np.empty((0, 3))
+
+    # 常规的十进制坐标直接由NumPy解析，其它写法（如"1_0"、"nan"）逐个交给float()
+    # Plain decimal coordinates are parsed by NumPy directly, any other spelling
+    # ("1_0", "nan", ...) goes through float() one by one
+    plain_decimals = all(map(VERTEX_COORDS_REGEX.fullmatch, matchs))
+    coords_text = b" ".join(matchs)
+    del matchs
+    if plain_decimals:
+        coords = np.fromstring(coords_text, dtype=np.float64, sep=" ")
+    else:
+        tokens = decode_obj_text(coords_text).split(" ")
+        coords = np.fromiter(map(float, tokens), dtype=np.float64, count=len(tokens))
+        del tokens
+    del coords_text
+    coords = round_like_python(coords / 2.54, 4)
+
+    # 分块转换为字符串，避免同时持有所有坐标的float对象
+    # Converted to strings in chunks so that float objects for all coordinates never coexist
+    vertices = []
+    for start in range(0, coords.size, 3 * WRL_CHUNK_SIZE):
+        coord_strings = iter(map(str, coords[start:start + 3 * WRL_CHUNK_SIZE].tolist()))
+        vertices += map(" ".join, zip(coord_strings, coord_strings, coord_strings))
+    return vertices, coords.reshape(-1, 3)
+
+
+def iter_text_chunks(items: list, separator: str) -> Iterator[str]:
+    """
+    分块连接字符串，结果与 separator.join(items) 相同
+    Join strings in chunks, the concatenated output equals separator.join(items)
+    """
+    for start in range(0, len(items), WRL_CHUNK_SIZE):
+        chunk = separator.join(items[start:start + WRL_CHUNK_SIZE])
+        yield chunk if start == 0 else separator + chunk
+
+
+def get_shape_mesh(lines: list, vertices: list) -> Tuple[list, Iterator[str]]:
+    """
+    读取一个材质的面，按首次出现的顺序重新编号顶点
+    Read the faces of one material and renumber their vertices in order of first use
+
+    返回:
+    Returns:
+        Tuple[list, Iterator[str]]: (顶点字符串, coordIndex文本块) / (vertex strings, coordIndex text chunks)
+    """
+    index_counter = 0
+    link_dict = {}
+    coord_index = []
+    points = []
+
+    for line in lines:
+        if len(line) > 0 and line.startswith(b'f '):
+            try:
+                face = [int(index) for index in line.replace(b"//", b"").split(b" ")[1:]]
+                face_index = []
+                for index in face:
+                    if index not in link_dict:
+                        link_dict[index] = index_counter
+                        face_index.append(str(index_counter))
+                        if index - 1 < len(vertices):
+                            points.append(vertices[index - 1])
+                        else:
+                            points.append("0 0 0")  # 默认顶点
+                        index_counter += 1
+                    else:
+                        face_index.append(str(link_dict[index]))
+                face_index.append("-1")
+                coord_index.append(",".join(face_index) + ",")
+            except (ValueError, IndexError) as e:
+                print(f"Warning: Failed to process face line '{decode_obj_text(line)}': {e}")
+                continue
+
+    return points, iter_text_chunks(coord_index, "")
+
+
+def parse_faces_numpy(lines: list) -> Union[Tuple[np.ndarray, np.ndarray], None]:
+    """
+    一次性解析一个材质的所有面，返回 (所有OBJ索引, 每个面的顶点数)
+    Parse all faces of one material at once into (all OBJ indices, vertex count of every face)
+
+    遇到无法解析的面或非正索引时返回None。
+    Returns None on unparsable faces or non-positive indices.
+    """
+    face_lines = [line for line in lines if line.startswith(b"f ")]
+    if not face_lines:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # 去掉每行的"f"后只能剩下以单个空格分隔的正整数，否则回退；
+    # 出现空索引（连续空格）时解析出的数量会少于面的顶点数
+    # Without the leading "f" only single space separated integers may remain,
+    # anything else falls back. Empty indices (double spaces) show up as fewer
+    # parsed numbers than face vertices
+    face_sizes = np.fromiter(
+        map(bytes.count, face_lines, itertools.repeat(b" ")),
+        dtype=np.int64,
+        count=len(face_lines),
+    )
+    index_text = b" ".join(face_lines).replace(b"//", b"")[2:].replace(b" f ", b" ")
+    if INVALID_FACE_INDICES_REGEX.search(index_text):
+        return None
+    indices = np.fromstring(index_text, dtype=np.int64, sep=" ")
+    if indices.size != face_sizes.sum() or indices.min() < 1:
+        return None
+    return indices, face_sizes
+
+
+def get_shape_mesh_numpy(lines: list, vertices: list) -> Union[Tuple[list, Iterator[str]], None]:
+    """
+    get_shape_mesh 的NumPy实现，用 unique/searchsorted 批量重新编号顶点
+    NumPy version of get_shape_mesh, vertices are renumbered in bulk with unique/searchsorted
+
+    遇到无法解析的面或非正索引时返回None，由调用方回退到 get_shape_mesh。
+    Returns None on unparsable faces or non-positive indices, the caller then falls back to get_shape_mesh.
+    """
+    faces = parse_faces_numpy(lines)
+    if faces is None:
+        return None
+    indices, face_sizes = faces
+    if not indices.size:
+        return [], iter(())
+
+    # 按首次出现的顺序为每个OBJ顶点分配新编号
+    # Give every OBJ vertex a new number in order of first use
+    unique_indices, first_use = np.unique(indices, return_index=True)
+    use_order = np.argsort(first_use, kind="stable")
+    new_numbers = np.empty_like(use_order)
+    new_numbers[use_order] = np.arange(use_order.size)
+    remapped = new_numbers[np.searchsorted(unique_indices, indices)]
+
+    vertex_table = np.array(vertices + ["0 0 0"], dtype=object)
+    points = vertex_table[np.minimum(unique_indices[use_order] - 1, len(vertices))].tolist()
+
+    # 每个面以-1结尾，每个编号后都跟一个逗号
+    # Every face ends with -1 and every number is followed by a comma
+    coord_index = np.insert(remapped, np.cumsum(face_sizes), -1)
+    return points, (
+        ",".join(map(str, coord_index[start:start + WRL_CHUNK_SIZE].tolist())) + ","
+        for start in range(0, coord_index.size, WRL_CHUNK_SIZE)
+    )
+
+
+def iter_obj_shapes(obj_data: Union[bytes, mmap.mmap]) -> Iterator[bytes]:
+    """
+    逐个返回按"usemtl"切分的材质块，与 obj_data.split(b"usemtl")[1:] 相同但不一次性复制整个OBJ；
+    没有usemtl时整个OBJ作为一个形状
+    Yield the material blocks split at "usemtl" one at a time, same as
+    obj_data.split(b"usemtl")[1:] without copying the whole OBJ at once. Without any
+    usemtl the whole OBJ is a single shape
+    """
+    start = obj_data.find(b"usemtl")
+    if start < 0:
+        yield obj_data[:]
+        return
+    while start >= 0:
+        start += len(b"usemtl")
+        end = obj_data.find(b"usemtl", start)
+        yield obj_data[start:] if end < 0 else obj_data[start:end]
+        start = end
+
+
+def get_material_key(line: bytes) -> str:
+    """读取材质块第一行（usemtl之后）的材质名 / Read the material name from the first line of a material block (after usemtl)"""
+    return decode_obj_text(line.replace(b" ", b"")) if line else "default"
+
+
+def get_shape_faces(lines: list) -> list:
+    """
+    读取一个材质的面，返回OBJ顶点索引（从1开始）
+    Read the faces of one material as OBJ vertex indices (starting at 1)
+    """
+    faces = []
+    for line in lines:
+        if line.startswith(b'f '):
+            try:
+                faces.append([int(index) for index in line.replace(b"//", b"").split(b" ")[1:]])
+            except ValueError as e:
+                print(f"Warning: Failed to process face line '{decode_obj_text(line)}': {e}")
+    return faces
+
+
+def format_shape_head(
+    materials: dict, material_key: str, appearances: dict, template: str = WRL_SHAPE_HEAD
+) -> str:
+    """
+    用材质外观填写Shape模板的开头，材质不存在时使用默认材质；
+    每种外观在文件中第一次出现时以DEF定义，之后用USE引用
+    Fill in the start of the Shape template with the material appearance, a default
+    material is used when it doesn't exist. Every appearance is defined with DEF the
+    first time it appears in the file and referred to with USE afterwards
+
+    参数:
+    Args:
+        materials (dict): get_materials 的结果 / Result of get_materials
+        material_key (str): 材质名 / Material name
+        appearances (dict): 本文件中已定义的外观，Appearance文本 -> DEF名称 / Appearances defined in this file, Appearance text -> DEF name
+        template (str): Shape开头模板 / Shape head template
+    """
+    appearance = materials.get(material_key, DEFAULT_APPEARANCE)
+    name = appearances.get(appearance)
+    if name is not None:
+        return template.format(appearance=f"USE {name}")
+    name = appearances[appearance] = f"ap{len(appearances)}"
+    return template.format(appearance=f"DEF {name} {appearance}")
+
+
+def iter_face_index_chunks(faces) -> Iterator[str]:
+    """
+    分块生成coordIndex文本，faces 可以是元组列表或 (n, 3) 数组
+    Generate the coordIndex text in chunks, faces is a list of tuples or an (n, 3) array
+    """
+    if isinstance(faces, list):
+        yield from iter_text_chunks([",".join(map(str, face)) + ",-1," for face in faces], "")
+        return
+    coord_index = np.column_stack([faces, np.full(len(faces), -1)]).reshape(-1)
+    for start in range(0, coord_index.size, WRL_CHUNK_SIZE):
+        yield ",".join(map(str, coord_index[start:start + WRL_CHUNK_SIZE].tolist())) + ","
+
+
+def get_point_text_size(points: list) -> int:
+    """iter_text_chunks(points, ", ") 输出的字符数 / Character count of the iter_text_chunks(points, ", ") output"""
+    return sum(map(len, points)) + 2 * max(len(points) - 1, 0)
+
+
+def get_face_index_text_size(faces) -> int:
+    """
+    iter_face_index_chunks 输出的字符数，不生成文本
+    Character count of the iter_face_index_chunks output, without generating the text
+    """
+    if isinstance(faces, list):
+        return sum(len(",".join(map(str, face))) + len(",-1,") for face in faces)
+    # 每个非负索引占位数加一个逗号，每个面另有 "-1,"
+    # Every non-negative index takes its digits plus a comma, every face adds "-1,"
+    powers_of_ten = 10 ** np.arange(1, 19, dtype=np.int64)
+    return int((np.searchsorted(powers_of_ten, faces, side="right") + 2).sum()) + len("-1,") * len(faces)
+
+
+def iter_optimized_wrl_model(
+    model_3d: Ee3dModel, mesh_options: MeshOptions, stats: MeshStats, use_numpy: bool = True
+) -> Iterator[str]:
+    """
+    生成网格优化（以及可选的简化）后的WRL文本，所有Shape共享一个顶点表，统计写入 stats
+    Generate the WRL text of the optimised (and optionally simplified) mesh, all Shapes
+    share one vertex table and the statistics are written to stats
+
+    写入前先计算各布局的大小：共享顶点表不能让文件变小时改用每个Shape单独的顶点表，
+    仍不能变小时（未简化的网格）输出未优化的转换结果，优化不会让文件变大。
+    The size of every layout is computed before writing: a table per Shape is used when
+    the shared vertex table doesn't make the file smaller, and when that doesn't either
+    (for a mesh that isn't decimated) the unoptimised conversion is written, so the
+    optimisation never makes the file larger.
+    """
+    use_numpy = use_numpy and np is not None
+    obj_data = get_obj_bytes(model_3d.raw_obj)
+    materials = get_materials(obj_data=obj_data)
+    vertices = read_vertices_numpy(obj_data) if use_numpy else None
+    if vertices is None:
+        vertices, coords = get_vertices(obj_data), None
+    else:
+        vertices, coords = vertices
+
+    # 全部是三角形时用NumPy优化，否则使用纯Python实现
+    # The mesh is optimised with NumPy when all faces are triangles, otherwise in pure Python
+    shapes = []
+    for shape in iter_obj_shapes(obj_data):
+        lines = shape.splitlines()
+        if not lines:
+            continue
+        material_key = get_material_key(lines[0])
+        faces = parse_faces_numpy(lines[1:]) if use_numpy else None
+        if faces is not None and (faces[1] == 3).all():
+            shapes.append((material_key, faces[0].reshape(-1, 3)))
+        else:
+            shapes.append((material_key, get_shape_faces(lines[1:])))
+
+    mesh = None
+    if coords is not None and all(not isinstance(faces, list) for _, faces in shapes):
+        mesh = optimize_mesh_numpy(vertices, coords, shapes, mesh_options, stats)
+    if mesh is None:
+        shapes = [
+            (material_key, faces if isinstance(faces, list) else faces.tolist())
+            for material_key, faces in shapes
+        ]
+        mesh = optimize_mesh(vertices, shapes, mesh_options, stats)
+    del shapes, vertices, coords, obj_data
+    if mesh_options.decimation_enabled:
+        mesh = decimate_mesh(mesh, mesh_options)
+
+    # 未优化的输出按自己的顺序定义外观，计算它的大小时需要单独的外观表
+    # The unoptimised output defines its appearances in its own order, computing its
+    # size needs a separate appearance table
+    plain_appearances = {}
+    stats.wrl_size_before = len(VRML_HEADER) + sum(
+        len(format_shape_head(materials, shape.material_key, plain_appearances))
+        + shape.plain_text_size
+        + len(WRL_SHAPE_MIDDLE)
+        + len(WRL_SHAPE_TAIL)
+        for shape in mesh.shapes
+        if shape.plain_text_size
+    )
+
+    # 两种布局中外观的定义顺序相同 / Both layouts define the appearances in the same order
+    appearances = {}
+    shapes = [
+        (format_shape_head(materials, shape.material_key, appearances, "{appearance}"), shape.faces)
+        for shape in mesh.shapes
+        if len(shape.faces)
+    ]
+    # 共享的顶点表让每个coordIndex更长，只在输出确实变小时使用
+    # The shared vertex table makes every coordIndex longer, it's only used when the output really gets smaller
+    shared_size = len(VRML_HEADER) + sum(
+        len((WRL_SHAPE_USE_HEAD if position else WRL_SHAPE_HEAD).format(appearance=appearance))
+        + get_face_index_text_size(faces)
+        + len(WRL_SHAPE_TAIL)
+        for position, (appearance, faces) in enumerate(shapes)
+    )
+    if shapes:
+        shared_size += get_point_text_size(mesh.points) + len(WRL_SHAPE_MIDDLE)
+
+    shape_tables = None
+    layout = WRL_LAYOUT_SHARED
+    if shared_size >= stats.wrl_size_before:
+        # 与 shapes 对齐，去掉没有面的Shape / Aligned with shapes, Shapes without faces are dropped
+        shape_tables = [table for table in get_shape_tables(mesh) if len(table[1])]
+        per_shape_size = len(VRML_HEADER) + sum(
+            len(WRL_SHAPE_HEAD.format(appearance=appearance))
+            + get_point_text_size(points)
+            + len(WRL_SHAPE_MIDDLE)
+            + get_face_index_text_size(faces)
+            + len(WRL_SHAPE_TAIL)
+            for (appearance, _), (points, faces) in zip(shapes, shape_tables)
+        )
+        if per_shape_size < shared_size:
+            layout = WRL_LAYOUT_PER_SHAPE
+        # 简化后的网格总是写入，否则优化不能让文件变小时写入未优化的输出
+        # A decimated mesh is always written, otherwise the unoptimised output is written
+        # when the optimisation doesn't make the file smaller
+        if min(shared_size, per_shape_size) >= stats.wrl_size_before and not mesh_options.decimation_enabled:
+            layout = WRL_LAYOUT_PLAIN
+    stats.wrl_layout = layout
+
+    if layout == WRL_LAYOUT_PLAIN:
+        del mesh, shapes, shape_tables
+        stats.vertices_after = stats.vertices_before
+        stats.faces_after = stats.faces_before
+        stats.degenerate_faces = stats.duplicate_faces = 0
+        yield from iter_wrl_model(model_3d, use_numpy=use_numpy)
+        return
+
+    yield VRML_HEADER
+    if layout == WRL_LAYOUT_PER_SHAPE:
+        del mesh
+        stats.vertices_after = 0
+        for (appearance, _), (points, faces) in zip(shapes, shape_tables):
+            stats.vertices_after += len(points)
+            yield WRL_SHAPE_HEAD.format(appearance=appearance)
+            yield from iter_text_chunks(points, ", ")
+            yield WRL_SHAPE_MIDDLE
+            yield from iter_face_index_chunks(faces)
+            yield WRL_SHAPE_TAIL
+        return
+
+    for position, (appearance, faces) in enumerate(shapes):
+        if position:
+            yield WRL_SHAPE_USE_HEAD.format(appearance=appearance)
+        else:
+            yield WRL_SHAPE_HEAD.format(appearance=appearance)
+            yield from iter_text_chunks(mesh.points, ", ")
+            yield WRL_SHAPE_MIDDLE
+        yield from iter_face_index_chunks(faces)
+        yield WRL_SHAPE_TAIL
+
+
+def iter_wrl_model(
+    model_3d: Ee3dModel,
+    use_numpy: bool = True,
+    mesh_options: MeshOptions = None,
+    stats: MeshStats = None,
+) -> Iterator[str]:
+    """
+    逐块生成WRL文本，每个材质的Shape生成后立即输出，不在内存中拼接整个文档
+    Generate the WRL text chunk by chunk, every material's Shape is yielded as soon as
+    it is produced instead of building the whole document in memory
+
+    参数:
+    Args:
+        model_3d (Ee3dModel): 带原始OBJ数据的3D模型 / 3D model with raw OBJ data
+        use_numpy (bool): 可用时使用NumPy实现，输出与纯Python实现完全相同 /
+            Use the NumPy implementation when available, its output is identical to the pure Python one
+        mesh_options (MeshOptions): 网格优化选项，为空时不优化 / Mesh optimisation options, None disables optimisation
+        stats (MeshStats): 优化时接收网格统计 / Receives the mesh statistics when optimising
+    """
+    if mesh_options is not None:
+        yield from iter_optimized_wrl_model(
+            model_3d, mesh_options, stats if stats is not None else MeshStats(), use_numpy
+        )
+        return
+
+    use_numpy = use_numpy and np is not None
+    obj_data = get_obj_bytes(model_3d.raw_obj)
+    materials = get_materials(obj_data=obj_data)
+    vertices = get_vertices_numpy(obj_data=obj_data) if use_numpy else None
+    if vertices is None:
+        vertices = get_vertices(obj_data=obj_data)
+
+    appearances = {}
+    yield VRML_HEADER
+    for shape in iter_obj_shapes(obj_data):
         lines = shape.splitlines()
+        del shape
         if not lines:
             continue
             
-        # 获取材质，如果不存在则使用默认材质
-        material_key = lines[0].replace(" ", "") if lines[0] else "default"
-        material = materials.get(material_key, {
-            'diffuse_color': ['0.8', '0.8', '0.8'],
-            'specular_color': ['0.2', '0.2', '0.2'],
-            'transparency': '0'
-        })
-        
-        index_counter = 0
-        link_dict = {}
-        coord_index = []
-        points = []
-        
-        for line in lines[1:]:
-            if len(line) > 0 and line.startswith('f '):
-                try:
-                    face = [int(index) for index in line.replace("//", "").split(" ")[1:]]
-                    face_index = []
-                    for index in face:
-                        if index not in link_dict:
-                            link_dict[index] = index_counter
-                            face_index.append(str(index_counter))
-                            if index - 1 < len(vertices):
-                                points.append(vertices[index - 1])
-                            else:
-                                points.append("0 0 0")  # 默认顶点
-                            index_counter += 1
-                        else:
-                            face_index.append(str(link_dict[index]))
-                    face_index.append("-1")
-                    coord_index.append(",".join(face_index) + ",")
-                except (ValueError, IndexError) as e:
-                    print(f"Warning: Failed to process face line '{line}': {e}")
-                    continue
+        material_key = get_material_key(lines[0])
+        mesh = get_shape_mesh_numpy(lines[1:], vertices) if use_numpy else None
+        if mesh is None:
+            mesh = get_shape_mesh(lines[1:], vertices)
+        # 输出文本块之前释放这个材质的OBJ行
+        # Release this material's OBJ lines before the text chunks are yielded
+        del lines
+        points, coord_index_chunks = mesh
         
         if not points:
             continue
             
-        if points:
-            points.insert(-1, points[-1])
-
-        shape_str = textwrap.dedent(
-            f"""
-            Shape{{
-                appearance Appearance {{
-                    material  Material {{
-                        diffuseColor {' '.join(material.get('diffuse_color', ['0.8', '0.8', '0.8']))}
-                        specularColor {' '.join(material.get('specular_color', ['0.2', '0.2', '0.2']))}
-                        ambientIntensity 0.2
-                        transparency {material.get('transparency', '0')}
-                        shininess 0.5
-                    }}
-                }}
-                geometry IndexedFaceSet {{
-                    ccw TRUE
-                    solid FALSE
-                    coord DEF co Coordinate {{
-                        point [
-                            {(", ").join(points)}
-                        ]
-                    }}
-                    coordIndex [
-                        {"".join(coord_index)}
-                    ]
-                }}
-            }}"""
-        )
+        points.insert(-1, points[-1])
 
-        raw_wrl += shape_str
+        yield format_shape_head(materials, material_key, appearances)
+        yield from iter_text_chunks(points, ", ")
+        yield WRL_SHAPE_MIDDLE
+        yield from coord_index_chunks
+        yield WRL_SHAPE_TAIL
+
+
+def generate_wrl_model(
+    model_3d: Ee3dModel, use_numpy: bool = True, mesh_options: MeshOptions = None
+) -> Ki3dModel:
+    """
+    将OBJ模型转换为带颜色的WRL模型，整个文档保存在 raw_wrl 中
+    Convert an OBJ model to a WRL model with colors, the whole document is kept in raw_wrl
+
+    大模型应使用 write_wrl_model 直接写入文件。
+    Large models should be written straight to a file with write_wrl_model.
+    """
+    if not model_3d.raw_obj:
+        return None
 
     return Ki3dModel(
-        translation=None, rotation=None, name=model_3d.name, raw_wrl=raw_wrl
+        translation=None,
+        rotation=None,
+        name=model_3d.name,
+        raw_wrl="".join(
+            iter_wrl_model(model_3d, use_numpy=use_numpy, mesh_options=mesh_options)
+        ),
     )
 
 
+def get_wrl_extension(compress: bool = False) -> str:
+    """获取VRML模型文件扩展名 / Get the VRML model file extension"""
+    return WRZ_EXTENSION if compress else WRL_EXTENSION
+
+
+def open_wrl_file(wrl_path: str, compress: bool = False, fileobj: IO[bytes] = None) -> IO[str]:
+    """
+    打开用于写入的VRML文本文件，压缩时经gzip写入
+    Open a VRML text file for writing, through gzip when compressing
+
+    gzip头中的时间戳固定为0，相同的模型总是生成相同的.wrz文件
+    The gzip header timestamp is fixed to 0 so the same model always gives the same .wrz file
+
+    参数:
+    Args:
+        wrl_path (str): 输出文件路径 / Output file path
+        compress (bool): 是否gzip压缩 / Whether to gzip compress
+        fileobj (IO[bytes]): 写入此二进制文件而不是打开 wrl_path（例如原子写入的临时文件），
+            gzip头中的文件名仍取自 wrl_path / Write into this binary file instead of opening
+            wrl_path (the temporary file of an atomic write for instance), the file name in
+            the gzip header is still taken from wrl_path
+
+    返回:
+    Returns:
+        IO[str]: 文本文件对象 / Text file object
+    """
+    if not compress:
+        if fileobj is not None:
+            return io.TextIOWrapper(fileobj, encoding="utf-8")
+        return open(wrl_path, mode="w", encoding="utf-8")
+    gzip_file = gzip.GzipFile(
+        wrl_path, mode="wb", compresslevel=WRZ_COMPRESS_LEVEL, fileobj=fileobj, mtime=0
+    )
+    return io.TextIOWrapper(gzip_file, encoding="utf-8")
+
+
+def write_wrl_model(
+    model_3d: Ee3dModel,
+    wrl_path: str,
+    use_numpy: bool = True,
+    mesh_options: MeshOptions = None,
+    compress: bool = False,
+) -> MeshStats:
+    """
+    将OBJ模型流式转换并写入WRL文件，内存占用不随输出大小增长
+    Stream the converted OBJ model into a WRL file, memory use doesn't grow with the output size
+
+    参数:
+    Args:
+        model_3d (Ee3dModel): 带原始OBJ数据的3D模型 / 3D model with raw OBJ data
+        wrl_path (str): 输出文件路径 / Output file path
+        use_numpy (bool): 可用时使用NumPy实现 / Use the NumPy implementation when available
+        mesh_options (MeshOptions): 网格优化选项，为空时不优化 / Mesh optimisation options, None disables optimisation
+        compress (bool): 经gzip写入.wrz文件 / Write a .wrz file through gzip
+
+    返回:
+    Returns:
+        MeshStats: 网格统计，wrl_size_after 是写入的字符数（压缩前），write_result 是文件的写入结果 / Mesh statistics, wrl_size_after is the number of characters written (before compression), write_result the outcome of the file write
+    """
+    stats = MeshStats()
+    chunks = iter_wrl_model(model_3d, use_numpy=use_numpy, mesh_options=mesh_options, stats=stats)
+    # 先写入临时文件，内容未改变时不改写已有的WRL
+    # Written to a temporary file first, an existing WRL isn't rewritten when the content is unchanged
+    output = AtomicOutputFile(wrl_path, "wb")
+    with output as raw_file:
+        with open_wrl_file(wrl_path, compress, fileobj=raw_file) as wrl_file:
+            stats.wrl_size_after = write_wrl_chunks(chunks, wrl_file)
+    stats.write_result = output.result
+    if mesh_options is None:
+        stats.wrl_size_before = stats.wrl_size_after
+    return stats
+
+
+def write_wrl_chunks(chunks: Iterator[str], wrl_file: IO[str]) -> int:
+    written = 0
+    for chunk in chunks:
+        written += wrl_file.write(chunk)
+    return written
+
+
 class Exporter3dModelKicad:
-    def __init__(self, model_3d: Ee3dModel):
+    def __init__(
+        self,
+        model_3d: Ee3dModel,
+        output: Ki3dModel = None,
+        mesh_options: MeshOptions = None,
+        compress: bool = False,
+    ):
+        # output 可以是预先生成的WRL模型；为空时导出过程中直接把WRL流式写入文件，
+        # mesh_options 不为空时写入前先优化网格，compress 为真时写入gzip压缩的.wrz
+        # output may be a WRL model generated beforehand, otherwise the WRL is
+        # streamed straight into the file during export, optimising the mesh first
+        # when mesh_options is set; compress writes a gzip compressed .wrz instead
         self.input = model_3d
-        self.output = (
-            generate_wrl_model(model_3d=model_3d)
-            if model_3d and model_3d.raw_obj
-            else None
-        )
+        self.output = output
+        self.mesh_options = mesh_options
+        self.compress = compress
+        self.wrl_extension = get_wrl_extension(compress)
         self.output_step = model_3d.step
 
+    def get_model_path(self, lib_path: str, extension: str) -> str:
+        """获取模型文件路径并确保目录存在 / Get a model file path and make sure its directory exists"""
+        import os
+        shapes_dir = f"{lib_path}.3dshapes"
+        os.makedirs(shapes_dir, exist_ok=True)
+
+        # Sanitize model name for file system compatibility
+        import re
+        sanitized_name = re.sub(r'[<>:"/\\|?*]', '_', self.output.name if self.output else self.input.name)
+        return f"{shapes_dir}/{sanitized_name}.{extension}"
+
+    def export_wrl(self, lib_path: str) -> Optional[WriteResult]:
+        """写入WRL模型，返回写入结果，没有可写的内容时为None / Write the WRL model, returns the write result or None when there is nothing to write"""
+        write_result = None
+        if self.output and self.output.raw_wrl:
+            wrl_path = self.get_model_path(lib_path, self.wrl_extension)
+            output = AtomicOutputFile(wrl_path, "wb")
+            with output as raw_file:
+                with open_wrl_file(wrl_path, self.compress, fileobj=raw_file) as my_lib:
+                    my_lib.write(self.output.raw_wrl)
+            write_result = output.result
+            print(f"✅ Exported WRL 3D model: {wrl_path}")
+        elif self.input and self.input.raw_obj:
+            wrl_path = self.get_model_path(lib_path, self.wrl_extension)
+            write_result = write_wrl_model(
+                model_3d=self.input,
+                wrl_path=wrl_path,
+                mesh_options=self.mesh_options,
+                compress=self.compress,
+            ).write_result
+            print(f"✅ Exported WRL 3D model: {wrl_path}")
+        elif self.input:
+            print(f"⚠️  No WRL content available for model: {self.input.name}")
+        else:
+            print(f"⚠️  No 3D model output available")
+        return write_result
+
+    def export_step(self, lib_path: str) -> Optional[WriteResult]:
+        """写入STEP模型，返回写入结果，没有STEP数据时为None / Write the STEP model, returns the write result or None without STEP data"""
+        write_result = None
+        if self.output_step:
+            step_path = self.get_model_path(lib_path, "step")
+            write_result = write_file_atomic(step_path, self.output_step)
+            print(f"✅ Exported STEP 3D model: {step_path}")
+        elif self.input:
+            print(f"⚠️  No STEP content available for model: {self.input.name}")
+        else:
+            print(f"⚠️  No 3D model input available")
+        return write_result
+
     def export(self, lib_path: str) -> None:
         """Export 3D models in both WRL and STEP formats with enhanced logging"""
         try:
-            # Create 3D shapes directory if it doesn't exist
-            import os
-            shapes_dir = f"{lib_path}.3dshapes"
-            os.makedirs(shapes_dir, exist_ok=True)
-            print(f"3D shapes directory: {shapes_dir}")
-            
-            # Sanitize model name for file system compatibility
-            import re
-            sanitized_name = re.sub(r'[<>:"/\\|?*]', '_', self.output.name if self.output else self.input.name)
-            
-            # Export WRL format
-            if self.output and self.output.raw_wrl:
-                wrl_path = f"{shapes_dir}/{sanitized_name}.wrl"
-                with open(wrl_path, mode="w", encoding="utf-8") as my_lib:
-                    my_lib.write(self.output.raw_wrl)
-                print(f"✅ Exported WRL 3D model: {wrl_path}")
-            elif self.output:
-                print(f"⚠️  No WRL content available for model: {self.output.name}")
-            else:
-                print(f"⚠️  No 3D model output available")
-            
-            # Export STEP format
-            if self.output_step:
-                step_path = f"{shapes_dir}/{sanitized_name}.step"
-                with open(step_path, mode="wb") as my_lib:
-                    my_lib.write(self.output_step)
-                print(f"✅ Exported STEP 3D model: {step_path}")
-            elif self.input:
-                print(f"⚠️  No STEP content available for model: {self.input.name}")
-            else:
-                print(f"⚠️  No 3D model input available")
-                
+            print(f"3D shapes directory: {lib_path}.3dshapes")
+            self.export_wrl(lib_path)
+            self.export_step(lib_path)
         except Exception as e:
             print(f"❌ Error exporting 3D model: {e}")
             raise
@@ -1,9 +1,18 @@
 # Global imports
 import logging
+from itertools import repeat
 from math import acos, cos, isnan, pi, sin, sqrt
-from typing import Tuple, Union
+from operator import attrgetter
+from string import Formatter
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
 from ..easyeda.parameters_easyeda import ee_footprint
+from ..utils.file_utils import AtomicOutputFile, WriteResult
 from .parameters_kicad_footprint import *
 
 # 确保日志级别正确
@@ -115,6 +124,154 @@ def compute_arc(
     return cx, cy, angle_extent
 
 
+# 圆弧少于这个数时逐个计算更快（NumPy每次调用的固定开销）
+# Below this number of arcs computing them one by one is faster (fixed cost of every NumPy call)
+ARC_BATCH_MIN_SIZE = 48
+
+
+def compute_arcs(
+    start_x: Iterable[float],
+    start_y: Iterable[float],
+    radius_x: Iterable[float],
+    radius_y: Iterable[float],
+    angle: Iterable[float],
+    large_arc_flag: Iterable[bool],
+    sweep_flag: Iterable[bool],
+    end_x: Iterable[float],
+    end_y: Iterable[float],
+) -> List[Tuple[float, float, float]]:
+    """
+    一次计算一个符号或封装所有圆弧的圆心和角度范围，第i项与 compute_arc 对第i个圆弧的结果逐位相同
+    Compute the centres and angle extents of all arcs of a symbol or footprint at once,
+    item i is bit-identical to compute_arc on arc i
+
+    与 compute_arc 一样处理退化情况：半径为0时对应的商为0，acos 之前把余弦限制在[-1, 1]，
+    起点和终点重合（n == 0）时角度范围为整数-359。NumPy的SIMD arccos与 math.acos 相差1ulp，
+    所以acos和旋转角的三角函数（通常只有一两个不同的值）逐个值用 math 计算。
+    Degenerate cases are handled like compute_arc: quotients of zero radii are 0, the
+    cosine is clamped to [-1, 1] before acos and the extent is the integer -359 when the
+    start and end point coincide (n == 0). The SIMD arccos of NumPy is off by an ulp
+    from math.acos, so acos and the trigonometric functions of the rotation angles
+    (usually one or two distinct values) are computed per value with math.
+    少于 ARC_BATCH_MIN_SIZE 个圆弧或没有NumPy时逐个调用 compute_arc。
+    Fewer than ARC_BATCH_MIN_SIZE arcs or a missing NumPy call compute_arc per arc.
+
+    参数:
+    Args:
+        start_x, start_y (Iterable[float]): 起点坐标 / Start points
+        radius_x, radius_y (Iterable[float]): 椭圆半径 / Ellipse radii
+        angle (Iterable[float]): x轴旋转角（度） / x axis rotations in degrees
+        large_arc_flag, sweep_flag (Iterable[bool]): SVG圆弧标志 / SVG arc flags
+        end_x, end_y (Iterable[float]): 终点坐标 / End points
+
+    返回:
+    Returns:
+        List[Tuple[float, float, float]]: 每个圆弧的 (cx, cy, angle_extent)
+            / (cx, cy, angle_extent) of every arc
+    """
+    arcs = list(
+        zip(start_x, start_y, radius_x, radius_y, angle, large_arc_flag, sweep_flag, end_x, end_y)
+    )
+    if np is None or len(arcs) < ARC_BATCH_MIN_SIZE:
+        return [compute_arc(*arc) for arc in arcs]
+
+    start_x, start_y, radius_x, radius_y, angle, large_arc_flag, sweep_flag, end_x, end_y = zip(*arcs)
+    start_x = np.asarray(start_x, dtype=np.float64)
+    start_y = np.asarray(start_y, dtype=np.float64)
+    radius_x = np.asarray(radius_x, dtype=np.float64)
+    radius_y = np.asarray(radius_y, dtype=np.float64)
+    angle = np.asarray(angle, dtype=np.float64)
+    large_arc_flag = np.asarray(large_arc_flag, dtype=bool)
+    sweep_flag = np.asarray(sweep_flag, dtype=bool)
+    end_x = np.asarray(end_x, dtype=np.float64)
+    end_y = np.asarray(end_y, dtype=np.float64)
+
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Compute the half distance between the current and the final point
+        dx2 = (start_x - end_x) / 2.0
+        dy2 = (start_y - end_y) / 2.0
+
+        # 同一个旋转角只算一次三角函数 / Trigonometric functions once per distinct rotation
+        angles, angle_index = np.unique(
+            (np.mod(angle, 360.0) / 180.0) * pi, return_inverse=True
+        )
+        angle_values = angles.tolist()
+        cos_angle = np.array([cos(value) for value in angle_values])[angle_index]
+        sin_angle = np.array([sin(value) for value in angle_values])[angle_index]
+
+        # Step 1 : Compute (x1, y1)
+        x1 = cos_angle * dx2 + sin_angle * dy2
+        y1 = -sin_angle * dx2 + cos_angle * dy2
+
+        # Ensure radii are large enough
+        radius_x = np.abs(radius_x)
+        radius_y = np.abs(radius_y)
+        Pradius_x = radius_x * radius_x
+        Pradius_y = radius_y * radius_y
+        Px1 = x1 * x1
+        Py1 = y1 * y1
+
+        radiiCheck = np.where(
+            (Pradius_x != 0) & (Pradius_y != 0), Px1 / Pradius_x + Py1 / Pradius_y, 0.0
+        )
+        too_small = radiiCheck > 1
+        radius_x = np.where(too_small, np.sqrt(radiiCheck) * radius_x, radius_x)
+        radius_y = np.where(too_small, np.sqrt(radiiCheck) * radius_y, radius_y)
+        Pradius_x = radius_x * radius_x
+        Pradius_y = radius_y * radius_y
+        nonzero_x = radius_x != 0
+        nonzero_y = radius_y != 0
+
+        # Step 2 : Compute (cx1, cy1)
+        sign = np.where(large_arc_flag == sweep_flag, -1.0, 1.0)
+        denominator = Pradius_x * Py1 + Pradius_y * Px1
+        sq = np.where(
+            denominator > 0,
+            (Pradius_x * Pradius_y - Pradius_x * Py1 - Pradius_y * Px1) / denominator,
+            0.0,
+        )
+        # max(sq, 0) 保留NaN和-0.0 / max(sq, 0) keeps NaN and -0.0
+        sq = np.where(sq < 0, 0.0, sq)
+        coef = sign * np.sqrt(sq)
+        cx1 = np.where(nonzero_y, coef * ((radius_x * y1) / radius_y), 0.0)
+        cy1 = np.where(nonzero_x, coef * -((radius_y * x1) / radius_x), 0.0)
+
+        # Step 3 : Compute (cx, cy) from (cx1, cy1)
+        sx2 = (start_x + end_x) / 2.0
+        sy2 = (start_y + end_y) / 2.0
+        cx = sx2 + (cos_angle * cx1 - sin_angle * cy1)
+        cy = sy2 + (sin_angle * cx1 + cos_angle * cy1)
+
+        # Step 4 : Compute the angle_extent (dangle)
+        ux = np.where(nonzero_x, (x1 - cx1) / radius_x, 0.0)
+        uy = np.where(nonzero_y, (y1 - cy1) / radius_y, 0.0)
+        vx = np.where(nonzero_x, (-x1 - cx1) / radius_x, 0.0)
+        vy = np.where(nonzero_y, (-y1 - cy1) / radius_y, 0.0)
+
+        # Compute the angle extent
+        n = np.sqrt((ux * ux + uy * uy) * (vx * vx + vy * vy))
+        p = ux * vx + uy * vy
+        sign = np.where((ux * vy - uy * vx) < 0, -1.0, 1.0)
+        # 与 max(-1.0, min(1.0, p / n)) 相同，NaN限制为1.0 / Same as max(-1.0, min(1.0, p / n)), NaN becomes 1.0
+        cosine_value = p / n
+        cosine_value = np.where(cosine_value < 1.0, cosine_value, 1.0)
+        cosine_value = np.where(cosine_value > -1.0, cosine_value, -1.0)
+        degenerate = n == 0
+        arc_angle = np.array([acos(value) for value in cosine_value.tolist()])
+        angle_extent = np.where(degenerate, 719.0, ((sign * arc_angle) / pi) * 180.0)
+        angle_extent = np.where(~sweep_flag & (angle_extent > 0), angle_extent - 360, angle_extent)
+        angle_extent = np.where(sweep_flag & (angle_extent < 0), angle_extent + 360, angle_extent)
+
+        angleExtent_sign = np.where(angle_extent < 0, 1.0, -1.0)
+        angle_extent = np.mod(np.abs(angle_extent), 360) * angleExtent_sign
+
+    arcs = list(zip(cx.tolist(), cy.tolist(), angle_extent.tolist()))
+    # compute_arc 对退化的圆弧返回整数 / compute_arc returns an integer for degenerate arcs
+    for index in np.flatnonzero(degenerate).tolist():
+        arcs[index] = (arcs[index][0], arcs[index][1], int(arcs[index][2]))
+    return arcs
+
+
 # ---------------------------------------
 
 
@@ -140,6 +297,119 @@ def fp_to_ki(dim) -> float:
         return 0.0
 
 
+# 离最近的 .5 这么近时，数组的 rint(x * 10**n) 可能与 round(x, n) 的结果不同，改用 round
+# This close to the nearest .5 rint(x * 10**n) of the array may differ from round(x, n), round is used instead
+ROUND_TIE_TOLERANCE = 1e-6
+# 超过这个值时乘法的误差不再可以忽略 / Above this the error of the multiplication isn't negligible any more
+ROUND_MAX_SCALED = 1e9
+
+
+def round_array(values: "np.ndarray", ndigits: int = 2) -> "np.ndarray":
+    """
+    对数组逐元素做与 round(value, ndigits) 逐位相同的舍入
+    Round an array element-wise, bit-identical to round(value, ndigits)
+
+    rint(x * 10**n) / 10**n 与 round 只在 x * 10**n 接近 .5 时可能不同（乘法的舍入误差），
+    这些元素（以及非常大的值、inf和NaN）逐个用 round 计算。
+    rint(x * 10**n) / 10**n can only differ from round when x * 10**n is close to .5
+    (rounding error of the multiplication), those elements (and huge values, inf and
+    NaN) are computed one by one with round.
+
+    参数:
+    Args:
+        values (np.ndarray): float64数组 / float64 array
+        ndigits (int): 小数位数 / Number of decimals
+
+    返回:
+    Returns:
+        np.ndarray: 舍入后的数组 / Rounded array
+    """
+    scale = float(10**ndigits)
+    scaled = values * scale
+    rounded = np.rint(scaled) / scale
+    with np.errstate(invalid="ignore"):
+        unsafe = ~(np.abs(scaled) <= ROUND_MAX_SCALED) | (
+            np.abs(scaled - np.floor(scaled) - 0.5) < ROUND_TIE_TOLERANCE
+        )
+    if unsafe.any():
+        rounded[unsafe] = [round(value, ndigits) for value in values[unsafe].tolist()]
+    return rounded
+
+
+def fp_points_to_ki(points: str, skip_empty: bool = False) -> Optional["np.ndarray"]:
+    """
+    一次把图元的坐标字符串解析并换算为KiCad单位，结果与逐个 fp_to_ki 逐位相同
+    Parse the point string of a primitive and convert it to KiCad units in one pass,
+    bit-identical to fp_to_ki on every point
+
+    参数:
+    Args:
+        points (str): 空格分隔的EasyEDA坐标 / Space separated EasyEDA coordinates
+        skip_empty (bool): 跳过空白项，否则空项为0 / Skip blank items, otherwise empty items are 0
+
+    返回:
+    Returns:
+        np.ndarray: 换算后的坐标，没有NumPy或有无法批量解析的项时为None
+            / Converted coordinates, None without NumPy or when an item can't be parsed in bulk
+    """
+    if np is None:
+        return None
+    tokens = points.split(" ")
+    if skip_empty:
+        tokens = [token for token in tokens if token.strip()]
+    else:
+        # fp_to_ki("") 为0 / fp_to_ki("") is 0
+        tokens = [token or "0" for token in tokens]
+    try:
+        values = np.array(tokens, dtype=np.float64)
+    except ValueError:
+        # 交给 fp_to_ki 处理无效的项 / fp_to_ki handles the invalid items
+        return None
+    values[np.isnan(values)] = 0.0
+    return round_array(values * 10 * 0.0254, 2)
+
+
+def format_polygon_path(
+    point_list: Union[List[float], "np.ndarray"],
+    bbox_x: float,
+    bbox_y: float,
+    pos_x: float,
+    pos_y: float,
+) -> str:
+    """
+    生成相对焊盘位置的自定义焊盘多边形顶点 (xy x y)
+    Generate the (xy x y) points of a custom pad polygon relative to the pad position
+
+    参数:
+    Args:
+        point_list (list | np.ndarray): 换算后的坐标 x0 y0 x1 y1… / Converted coordinates x0 y0 x1 y1…
+        bbox_x (float): bbox 横坐标 / bbox x coordinate
+        bbox_y (float): bbox 纵坐标 / bbox y coordinate
+        pos_x (float): 焊盘横坐标 / Pad x coordinate
+        pos_y (float): 焊盘纵坐标 / Pad y coordinate
+
+    返回:
+    Returns:
+        str: 顶点列表 / Point list
+    """
+    if np is not None and isinstance(point_list, np.ndarray):
+        # 所有点一次减去偏移并舍入 / Offset and round all points at once
+        return "".join(
+            map(
+                "(xy {} {})".format,
+                round_array(point_list[0::2] - bbox_x - pos_x, 2).tolist(),
+                round_array(point_list[1::2] - bbox_y - pos_y, 2).tolist(),
+            )
+        )
+    return "".join(
+        "(xy {} {})".format(
+            round(point_list[i] - bbox_x - pos_x, 2),
+            round(point_list[i + 1] - bbox_y - pos_y, 2),
+        )
+        for i in range(0, len(point_list), 2)
+    )
+
+
 # ---------------------------------------
 
 
@@ -188,6 +458,73 @@ def rotate(x: float, y: float, degrees: float) -> Tuple[float, float]:
 # ---------------------------------------
 
 
+class FootprintTemplate:
+    """
+    预编译的图元模板：命名字段换成位置字段，字段值用attrgetter一次取出，
+    避免每个图元都构建 vars() 字典；输出与 template.format(**vars(item)) 完全相同
+    Precompiled primitive template: the named fields become positional ones and the
+    values are fetched at once by an attrgetter, so no vars() dict is built per
+    primitive; the output is identical to template.format(**vars(item))
+    """
+
+    def __init__(self, template: str) -> None:
+        self.field_names: List[str] = []
+        parts = []
+        for literal, field_name, format_spec, conversion in Formatter().parse(template):
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field_name is None:
+                continue
+            if field_name not in self.field_names:
+                self.field_names.append(field_name)
+            parts.append(
+                "{"
+                + str(self.field_names.index(field_name))
+                + (f"!{conversion}" if conversion else "")
+                + (f":{format_spec}" if format_spec else "")
+                + "}"
+            )
+        # 按 field_names 的顺序传入字段值 / Takes the field values in the order of field_names
+        self.format_values = "".join(parts).format
+
+        format_values = self.format_values
+        get_values = attrgetter(*self.field_names)
+        if len(self.field_names) == 1:
+            self.format = lambda item: format_values(get_values(item))
+        else:
+            self.format = lambda item: format_values(*get_values(item))
+
+    def format_all(self, items: Iterable) -> str:
+        """一次格式化一批图元 / Format a batch of primitives at once"""
+        return "".join(map(self.format, items))
+
+
+KI_PAD_TEMPLATE = FootprintTemplate(KI_PAD)
+KI_LINE_TEMPLATE = FootprintTemplate(KI_LINE)
+KI_HOLE_TEMPLATE = FootprintTemplate(KI_HOLE)
+KI_VIA_TEMPLATE = FootprintTemplate(KI_VIA)
+KI_CIRCLE_TEMPLATE = FootprintTemplate(KI_CIRCLE)
+KI_ARC_TEMPLATE = FootprintTemplate(KI_ARC)
+KI_TEXT_TEMPLATE = FootprintTemplate(KI_TEXT)
+
+
+def format_track_lines(track: KiFootprintTrack) -> str:
+    """把走线的所有线段一次格式化为 fp_line / Format all segments of a track as fp_line at once"""
+    values = {
+        "start_x": track.points_start_x,
+        "start_y": track.points_start_y,
+        "end_x": track.points_end_x,
+        "end_y": track.points_end_y,
+        "layers": repeat(track.layers),
+        "stroke_width": repeat(track.stroke_width),
+    }
+    return "".join(
+        map(KI_LINE_TEMPLATE.format_values, *(values[name] for name in KI_LINE_TEMPLATE.field_names))
+    )
+
+
+# ---------------------------------------
+
+
 class ExporterFootprintKicad:
     def __init__(self, footprint: ee_footprint):
         self.input = footprint
@@ -414,8 +751,11 @@ class ExporterFootprintKicad:
 
             # For custom polygon
             is_custom_shape = ki_pad.shape == "custom"
-            point_list = [fp_to_ki(point) for point in ee_pad.points.split(" ")]
             if is_custom_shape:
+                point_list = fp_points_to_ki(ee_pad.points)
+                if point_list is None or len(point_list) % 2:
+                    # 奇数个坐标仍由逐点实现处理 / An odd coordinate count is still left to the per point implementation
+                    point_list = [fp_to_ki(point) for point in ee_pad.points.split(" ")]
                 if len(point_list) <= 0:
                     logging.warning(
                         f"PAD ${ee_pad.id} is a polygon, but has no points defined"
@@ -431,14 +771,8 @@ class ExporterFootprintKicad:
                     ki_pad.orientation = 0
 
                     # Generate polygon with coordinates relative to the base pad's position.
-                    path = "".join(
-                        "(xy {} {})".format(
-                            round(point_list[i] - self.input.bbox.x - ki_pad.pos_x, 2),
-                            round(
-                                point_list[i + 1] - self.input.bbox.y - ki_pad.pos_y, 2
-                            ),
-                        )
-                        for i in range(0, len(point_list), 2)
+                    path = format_polygon_path(
+                        point_list, self.input.bbox.x, self.input.bbox.y, ki_pad.pos_x, ki_pad.pos_y
                     )
                     ki_pad.polygon = (
                         "\n\t\t(primitives \n\t\t\t(gr_poly \n\t\t\t\t(pts"
@@ -457,9 +791,21 @@ class ExporterFootprintKicad:
             )
 
             # Generate line
-            point_list = [fp_to_ki(point) for point in ee_track.points.split(" ") if point.strip()]
+            point_list = fp_points_to_ki(ee_track.points, skip_empty=True)
+            if point_list is None:
+                point_list = [fp_to_ki(point) for point in ee_track.points.split(" ") if point.strip()]
             # Ensure we have at least 4 points (2 coordinate pairs) to form a line
-            if len(point_list) >= 4:
+            if len(point_list) >= 4 and np is not None and isinstance(point_list, np.ndarray):
+                # 所有点一次减去bbox并舍入，相邻的点组成线段
+                # Subtract the bbox from all points and round them at once, neighbouring points form the segments
+                point_count = len(point_list) // 2
+                points_x = round_array(point_list[0 : 2 * point_count : 2] - self.input.bbox.x, 2).tolist()
+                points_y = round_array(point_list[1 : 2 * point_count : 2] - self.input.bbox.y, 2).tolist()
+                ki_track.points_start_x = points_x[:-1]
+                ki_track.points_start_y = points_y[:-1]
+                ki_track.points_end_x = points_x[1:]
+                ki_track.points_end_y = points_y[1:]
+            elif len(point_list) >= 4:
                 for i in range(0, len(point_list) - 3, 2):
                     ki_track.points_start_x.append(
                         round(point_list[i] - self.input.bbox.x, 2)
@@ -552,6 +898,7 @@ class ExporterFootprintKicad:
             self.output.rectangles.append(ki_rectangle)
 
         # For arcs
+        arc_parameters_list = []
         for ee_arc in self.input.arcs:
             arc_path = (
                 ee_arc.path.replace(",", " ").replace("M ", "M").replace("A ", "A")
@@ -575,8 +922,8 @@ class ExporterFootprintKicad:
 
             end_x = fp_to_ki(end_x) - self.input.bbox.x
             end_y = fp_to_ki(end_y) - self.input.bbox.y
-            if ry != 0:
-                cx, cy, extent = compute_arc(
+            arc_parameters_list.append(
+                (
                     start_x,
                     start_y,
                     rx,
@@ -587,6 +934,15 @@ class ExporterFootprintKicad:
                     end_x,
                     end_y,
                 )
+            )
+
+        # 一次计算封装所有圆弧的圆心和角度范围 / Centres and extents of all arcs of the footprint at once
+        curved_arcs = [arc for arc in arc_parameters_list if arc[3] != 0]
+        computed_arcs = iter(compute_arcs(*zip(*curved_arcs)) if curved_arcs else [])
+        for ee_arc, arc in zip(self.input.arcs, arc_parameters_list):
+            end_x, end_y = arc[7], arc[8]
+            if arc[3] != 0:
+                cx, cy, extent = next(computed_arcs)
             else:
                 cx = 0.0
                 cy = 0.0
@@ -631,16 +987,25 @@ class ExporterFootprintKicad:
     def get_ki_footprint(self) -> KiFootprint:
         return self.output
 
-    def export(self, footprint_full_path: str, model_3d_path: str) -> None:
+    def render(self, model_3d_path: str, model_3d_extension: str = "wrl") -> str:
+        return "".join(
+            self.iter_render(model_3d_path=model_3d_path, model_3d_extension=model_3d_extension)
+        )
+
+    def iter_render(self, model_3d_path: str, model_3d_extension: str = "wrl") -> Iterator[str]:
+        """
+        按图元类型分批生成.kicad_mod文本，可以直接写入文件
+        Generate the .kicad_mod text in batches per primitive type, ready to be
+        streamed to a file
+        """
         ki = self.output
-        ki_lib = ""
 
-        ki_lib += KI_MODULE_INFO.format(
+        yield KI_MODULE_INFO.format(
             package_lib="easyeda2kicad", package_name=ki.info.name, edit="5DC5F6A4"
         )
 
         if ki.info.fp_type:
-            ki_lib += KI_FP_TYPE.format(
+            yield KI_FP_TYPE.format(
                 component_type=("smd" if ki.info.fp_type == "smd" else "through_hole")
             )
 
@@ -648,52 +1013,32 @@ class ExporterFootprintKicad:
         y_low = min(pad.pos_y for pad in ki.pads)
         y_high = max(pad.pos_y for pad in ki.pads)
 
-        ki_lib += KI_REFERENCE.format(pos_x="0", pos_y=y_low - 4)
+        yield KI_REFERENCE.format(pos_x="0", pos_y=y_low - 4)
 
-        ki_lib += KI_PACKAGE_VALUE.format(
+        yield KI_PACKAGE_VALUE.format(
             package_name=ki.info.name, pos_x="0", pos_y=y_high + 4
         )
-        ki_lib += KI_FAB_REF
+        yield KI_FAB_REF
 
         # ---------------------------------------
 
-        for track in ki.tracks + ki.rectangles:
-            for i in range(len(track.points_start_x)):
-                ki_lib += KI_LINE.format(
-                    start_x=track.points_start_x[i],
-                    start_y=track.points_start_y[i],
-                    end_x=track.points_end_x[i],
-                    end_y=track.points_end_y[i],
-                    layers=track.layers,
-                    stroke_width=track.stroke_width,
-                )
-
-        for pad in ki.pads:
-            ki_lib += KI_PAD.format(**vars(pad))
-
-        for hole in ki.holes:
-            ki_lib += KI_HOLE.format(**vars(hole))
-
-        for via in ki.vias:
-            ki_lib += KI_VIA.format(**vars(via))
-
-        for circle in ki.circles:
-            ki_lib += KI_CIRCLE.format(**vars(circle))
-
-        for arc in ki.arcs:
-            ki_lib += KI_ARC.format(**vars(arc))
-
-        for text in ki.texts:
-            ki_lib += KI_TEXT.format(**vars(text))
+        yield "".join(map(format_track_lines, ki.tracks + ki.rectangles))
+        yield KI_PAD_TEMPLATE.format_all(ki.pads)
+        yield KI_HOLE_TEMPLATE.format_all(ki.holes)
+        yield KI_VIA_TEMPLATE.format_all(ki.vias)
+        yield KI_CIRCLE_TEMPLATE.format_all(ki.circles)
+        yield KI_ARC_TEMPLATE.format_all(ki.arcs)
+        yield KI_TEXT_TEMPLATE.format_all(ki.texts)
 
         if ki.model_3d is not None:
-            # 构建3D模型路径：用户导出路径 + 库名.3dshapes/模型名.wrl
+            # 构建3D模型路径：用户导出路径 + 库名.3dshapes/模型名.wrl（压缩输出时为.wrz）
             # Build 3D model path: user export path + lib_name.3dshapes/model_name.wrl
+            # (.wrz for compressed output)
             # 使用正斜杠以确保在Windows和Linux上都能正确显示
             import os
             model_3d_path_normalized = model_3d_path.replace(os.sep, "/")
-            model_file_path = f"{model_3d_path_normalized}.3dshapes/{ki.model_3d.name}.wrl"
-            ki_lib += KI_MODEL_3D.format(
+            model_file_path = f"{model_3d_path_normalized}.3dshapes/{ki.model_3d.name}.{model_3d_extension}"
+            yield KI_MODEL_3D.format(
                 file_3d=model_file_path,
                 pos_x=ki.model_3d.translation.x,
                 pos_y=ki.model_3d.translation.y,
@@ -703,11 +1048,16 @@ class ExporterFootprintKicad:
                 rot_z=ki.model_3d.rotation.z,
             )
 
-        ki_lib += KI_END_FILE
-
-        with open(
-            file=footprint_full_path,
-            mode="w",
-            encoding="utf-8",
-        ) as my_lib:
-            my_lib.write(ki_lib)
+        yield KI_END_FILE
+
+    def export(
+        self, footprint_full_path: str, model_3d_path: str, model_3d_extension: str = "wrl"
+    ) -> WriteResult:
+        # 流式写入临时文件，内容未改变时不改写已有的封装文件
+        # Streamed into a temporary file, an unchanged footprint file isn't rewritten
+        output = AtomicOutputFile(footprint_full_path, "w", encoding="utf-8")
+        with output as my_lib:
+            my_lib.writelines(
+                self.iter_render(model_3d_path=model_3d_path, model_3d_extension=model_3d_extension)
+            )
+        return output.result
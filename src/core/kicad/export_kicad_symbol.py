@@ -15,9 +15,13 @@ from ..easyeda.parameters_easyeda import (
     EeSymbolPolyline,
     EeSymbolRectangle,
 )
-from ..easyeda.svg_path_parser import SvgPathEllipticalArc, SvgPathMoveTo
+from ..easyeda.svg_path_parser import (
+    SvgPathEllipticalArc,
+    SvgPathMoveTo,
+    iter_svg_subpaths,
+)
 from ..utils.geometry_utils import get_middle_arc_pos
-from .export_kicad_footprint import compute_arc
+from .export_kicad_footprint import compute_arcs
 from .parameters_kicad_symbol import *
 
 ee_pin_type_to_ki_pin_type = {
@@ -189,10 +193,12 @@ def convert_ee_arcs(
     to_ki: Callable = px_to_mil if kicad_version == KicadVersion.v5 else px_to_mm
 
     kicad_arcs = []
+    arc_paths = []
     for ee_arc in ee_arcs:
         if not (
-            isinstance(ee_arc.path[0], SvgPathMoveTo)
-            or isinstance(ee_arc.path[1], SvgPathEllipticalArc)
+            len(ee_arc.path) >= 2
+            and isinstance(ee_arc.path[0], SvgPathMoveTo)
+            and isinstance(ee_arc.path[1], SvgPathEllipticalArc)
         ):
             logging.error("Can't convert this arc")
         else:
@@ -206,40 +212,40 @@ def convert_ee_arcs(
                 end_x=to_ki(ee_arc.path[1].end_x - ee_bbox.x),
                 end_y=to_ki(ee_arc.path[1].end_y - ee_bbox.y),
             )
+            kicad_arcs.append(ki_arc)
+            arc_paths.append(ee_arc.path[1])
+
+    # 一次计算符号所有圆弧的圆心和角度范围 / Centres and extents of all arcs of the symbol at once
+    computed_arcs = compute_arcs(
+        start_x=[ki_arc.start_x for ki_arc in kicad_arcs],
+        start_y=[ki_arc.start_y for ki_arc in kicad_arcs],
+        radius_x=[to_ki(arc_path.radius_x) for arc_path in arc_paths],
+        radius_y=[to_ki(arc_path.radius_y) for arc_path in arc_paths],
+        angle=[ki_arc.angle_start for ki_arc in kicad_arcs],
+        large_arc_flag=[arc_path.flag_large_arc for arc_path in arc_paths],
+        sweep_flag=[arc_path.flag_sweep for arc_path in arc_paths],
+        end_x=[ki_arc.end_x for ki_arc in kicad_arcs],
+        end_y=[ki_arc.end_y for ki_arc in kicad_arcs],
+    )
+    for ki_arc, arc_path, (center_x, center_y, angle_end) in zip(
+        kicad_arcs, arc_paths, computed_arcs
+    ):
+        ki_arc.center_x = center_x
+        ki_arc.center_y = center_y if arc_path.flag_large_arc else -center_y
+        ki_arc.angle_end = (
+            (360 - angle_end) if arc_path.flag_large_arc else angle_end
+        )
 
-            center_x, center_y, angle_end = compute_arc(
-                start_x=ki_arc.start_x,
-                start_y=ki_arc.start_y,
-                radius_x=to_ki(ee_arc.path[1].radius_x),
-                radius_y=to_ki(ee_arc.path[1].radius_y),
-                angle=ki_arc.angle_start,
-                large_arc_flag=ee_arc.path[1].flag_large_arc,
-                sweep_flag=ee_arc.path[1].flag_sweep,
-                end_x=ki_arc.end_x,
-                end_y=ki_arc.end_y,
-            )
-            ki_arc.center_x = center_x
-            ki_arc.center_y = center_y if ee_arc.path[1].flag_large_arc else -center_y
-            ki_arc.angle_end = (
-                (360 - angle_end) if ee_arc.path[1].flag_large_arc else angle_end
-            )
-
-            ki_arc.middle_x, ki_arc.middle_y = get_middle_arc_pos(
-                center_x=ki_arc.center_x,
-                center_y=ki_arc.center_y,
-                radius=ki_arc.radius,
-                angle_start=ki_arc.angle_start,
-                angle_end=ki_arc.angle_end,
-            )
-
-            ki_arc.start_y = (
-                ki_arc.start_y if ee_arc.path[1].flag_large_arc else -ki_arc.start_y
-            )
-            ki_arc.end_y = (
-                ki_arc.end_y if ee_arc.path[1].flag_large_arc else -ki_arc.end_y
-            )
+        ki_arc.middle_x, ki_arc.middle_y = get_middle_arc_pos(
+            center_x=ki_arc.center_x,
+            center_y=ki_arc.center_y,
+            radius=ki_arc.radius,
+            angle_start=ki_arc.angle_start,
+            angle_end=ki_arc.angle_end,
+        )
 
-            kicad_arcs.append(ki_arc)
+        ki_arc.start_y = ki_arc.start_y if arc_path.flag_large_arc else -ki_arc.start_y
+        ki_arc.end_y = ki_arc.end_y if arc_path.flag_large_arc else -ki_arc.end_y
 
     return kicad_arcs
 
@@ -302,41 +308,22 @@ def convert_ee_paths(
     to_ki: Callable = px_to_mil if kicad_version == KicadVersion.v5 else px_to_mm
 
     for ee_path in ee_paths:
-        raw_pts = ee_path.paths.split(" ")
-
-        x_points = []
-        y_points = []
-
-        # Small svg path parser : doc -> https://www.w3.org/TR/SVG11/paths.html#PathElement
-
-        for i in range(len(raw_pts)):
-            if raw_pts[i] in ["M", "L"]:
-                x_points.append(to_ki(int(float(raw_pts[i + 1])) - int(ee_bbox.x)))
-                y_points.append(-to_ki(int(float(raw_pts[i + 2])) - int(ee_bbox.y)))
-                i += 2
-            elif raw_pts[i] == "Z":
-                x_points.append(x_points[0])
-                y_points.append(y_points[0])
-            elif raw_pts[i] == "C":
-                ...
-                # TODO : Add bezier support
-
-        # if ee_path.fill_color:
-        #     x_points.append(x_points[0])
-        #     y_points.append(y_points[0])
-        if len(x_points) > 0 and len(y_points) > 0:
+        # Curves and arcs are flattened, each subpath gives its own polygon
+        subpaths = list(iter_svg_subpaths(ee_path.paths))
+        if not subpaths:
+            logging.warning("Skipping path with no parseable points")
+
+        for subpath in subpaths:
+            points = [
+                [to_ki(x - ee_bbox.x), -to_ki(y - ee_bbox.y)] for x, y in subpath
+            ]
             ki_polygon = KiSymbolPolygon(
-                points=[
-                    [x_points[i], y_points[i]]
-                    for i in range(min(len(x_points), len(y_points)))
-                ],
-                points_number=min(len(x_points), len(y_points)),
-                is_closed=x_points[0] == x_points[-1] and y_points[0] == y_points[-1],
+                points=points,
+                points_number=len(points),
+                is_closed=points[0] == points[-1],
             )
 
             kicad_polygons.append(ki_polygon)
-        else:
-            logging.warning("Skipping path with no parseable points")
 
     return kicad_polygons, kicad_beziers
 
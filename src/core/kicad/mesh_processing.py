@@ -0,0 +1,589 @@
+"""
+3D网格优化
+Mesh optimisation for the OBJ to WRL conversion
+
+EasyEDA的OBJ模型按材质分块，转换后每个材质的Shape都有自己的顶点表，
+相同位置的顶点会被重复输出，退化（零面积）和重复的面也会原样保留。
+optimize_mesh 在输出前对网格做以下处理：
+The OBJ models from EasyEDA are split by material and every material's Shape gets its
+own vertex table after conversion, so vertices at the same position are written again
+and degenerate (zero-area) and duplicate faces are kept as they are. optimize_mesh
+processes the mesh before it is written:
+
+- 顶点焊接：坐标落在同一个容差网格内的顶点合并为一个 /
+  Vertex welding: vertices whose coordinates fall into the same tolerance grid cell are merged
+- 删除焊接后顶点少于3个、面积为零或在同一材质中重复的面 /
+  Faces with fewer than three vertices after welding, zero area or repeated within a material are removed
+- 所有材质共享一个顶点表，WRL中第一个Shape用DEF定义，其余Shape用USE引用 /
+  All materials share one vertex table, the first Shape of the WRL defines it with DEF
+  and the others refer to it with USE
+
+decimate_mesh 可选地用顶点聚类简化网格（细节层次），用于三角形数量很大的连接器和模块模型；
+STEP模型不受影响。
+decimate_mesh optionally simplifies the mesh by vertex clustering (level of detail) for
+connector and module models with huge triangle counts, STEP models are not affected.
+"""
+
+# Global imports
+import math
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from ..utils.file_utils import WriteResult
+
+# 默认焊接容差，单位与WRL输出相同（0.1英寸），等于输出坐标的精度
+# Default welding tolerance, in the WRL output unit (0.1 inch), equal to the precision of
+# the written coordinates
+DEFAULT_WELD_TOLERANCE = 0.0001
+
+# 按三角形预算搜索聚类网格大小时的最多二分次数，以及上下界之比达到多少时停止
+# Maximum bisection steps when searching the clustering cell size for a triangle budget,
+# and the ratio of the bounds at which the search stops
+DECIMATION_SEARCH_STEPS = 16
+DECIMATION_SEARCH_PRECISION = 1.05
+
+# 超出OBJ顶点范围的索引使用的默认顶点，与未优化的转换相同
+# Default vertex for indices past the OBJ vertices, same as the unoptimised conversion
+DEFAULT_VERTEX = "0 0 0"
+
+# WRL的顶点表布局：所有Shape共享一个顶点表、每个Shape单独的顶点表、未优化的转换输出
+# WRL vertex table layouts: one table shared by all Shapes, a table per Shape, the
+# unoptimised conversion output
+WRL_LAYOUT_SHARED = "shared"
+WRL_LAYOUT_PER_SHAPE = "per_shape"
+WRL_LAYOUT_PLAIN = "plain"
+
+
+@dataclass
+class MeshOptions:
+    """
+    网格优化选项
+    Mesh optimisation options
+
+    参数:
+    Args:
+        weld_tolerance (float): 焊接容差，0表示只合并坐标完全相同的顶点 /
+            Welding tolerance, 0 only merges vertices with identical coordinates
+        max_triangles (int): 简化后的三角形预算，0表示不限制 / Triangle budget of the simplified mesh, 0 means no limit
+        decimation_tolerance (float): 简化的聚类网格大小（最大误差），0表示不按误差简化 /
+            Clustering cell size (maximum error) of the simplification, 0 means no error based simplification
+    """
+
+    weld_tolerance: float = DEFAULT_WELD_TOLERANCE
+    max_triangles: int = 0
+    decimation_tolerance: float = 0.0
+
+    @property
+    def decimation_enabled(self) -> bool:
+        return self.max_triangles > 0 or self.decimation_tolerance > 0
+
+
+@dataclass
+class MeshStats:
+    """
+    网格优化统计，wrl_size_before 是未优化转换输出的字符数
+    Mesh optimisation statistics, wrl_size_before is the character count of the
+    unoptimised conversion output
+
+    未启用优化时只填写两个大小字段，两者相同。write_wrl_model 在 write_result 中返回
+    WRL文件的写入结果，可以从转换进程传回。wrl_layout 是实际写入的顶点表布局：
+    共享顶点表不能让文件变小时改用每个Shape单独的顶点表，仍不能变小（且未简化）时写入未优化的输出。
+    Without optimisation only the two size fields are filled in, and they are equal.
+    write_wrl_model returns the outcome of the WRL file write in write_result, so it
+    travels back from the conversion process. wrl_layout is the vertex table layout
+    actually written: a table per Shape when the shared table doesn't make the file
+    smaller, the unoptimised output when that doesn't either (and there is no decimation).
+    """
+
+    vertices_before: int = 0
+    vertices_after: int = 0
+    faces_before: int = 0
+    faces_after: int = 0
+    degenerate_faces: int = 0
+    duplicate_faces: int = 0
+    decimated_faces: int = 0
+    decimation_cell_size: float = 0.0
+    wrl_size_before: int = 0
+    wrl_size_after: int = 0
+    wrl_layout: str = WRL_LAYOUT_SHARED
+    write_result: Optional[WriteResult] = None
+
+    @property
+    def size_reduction(self) -> float:
+        """WRL大小减少的比例（0到1） / Fraction by which the WRL got smaller (0 to 1)"""
+        if not self.wrl_size_before:
+            return 0.0
+        return 1 - self.wrl_size_after / self.wrl_size_before
+
+
+@dataclass
+class MeshShape:
+    """
+    优化后一个材质的面，顶点编号指向共享顶点表
+    Faces of one material after optimisation, vertex numbers refer to the shared vertex table
+
+    plain_text_size 是未优化转换中这个Shape的点和索引文本的字符数。
+    plain_text_size is the character count of this Shape's point and index text in the
+    unoptimised conversion.
+    """
+
+    material_key: str
+    # 纯Python实现为元组列表，NumPy实现为 (n, 3) 数组
+    # A list of tuples from the pure Python implementation, an (n, 3) array from the NumPy one
+    faces: Union[List[Tuple[int, ...]], "np.ndarray"] = field(default_factory=list)
+    plain_text_size: int = 0
+
+
+@dataclass
+class OptimizedMesh:
+    points: List[str]
+    shapes: List[MeshShape]
+    stats: MeshStats
+
+
+def get_face_area(corners: list) -> float:
+    """
+    用Newell法计算多边形面积，非平面多边形得到投影面积
+    Polygon area with Newell's method, non-planar polygons get their projected area
+    """
+    normal_x = normal_y = normal_z = 0.0
+    previous_x, previous_y, previous_z = corners[-1]
+    for x, y, z in corners:
+        normal_x += (previous_y - y) * (previous_z + z)
+        normal_y += (previous_z - z) * (previous_x + x)
+        normal_z += (previous_x - x) * (previous_y + y)
+        previous_x, previous_y, previous_z = x, y, z
+    return 0.5 * math.sqrt(normal_x * normal_x + normal_y * normal_y + normal_z * normal_z)
+
+
+def get_min_face_area(tolerance: float) -> float:
+    # 边长和高都小于容差的三角形视为零面积
+    # Triangles whose base and height are both below the tolerance count as zero area
+    return tolerance * tolerance / 2
+
+
+def optimize_mesh(
+    vertices: List[str],
+    shapes: List[Tuple[str, List[List[int]]]],
+    options: MeshOptions,
+    stats: MeshStats = None,
+) -> OptimizedMesh:
+    """
+    焊接顶点、删除退化和重复的面，并为所有材质生成共享顶点表
+    Weld vertices, remove degenerate and duplicate faces and build a vertex table shared
+    by all materials
+
+    参数:
+    Args:
+        vertices (List[str]): 已转换单位的顶点字符串（"x y z"） / Vertex strings already in the output unit ("x y z")
+        shapes (List[Tuple[str, List[List[int]]]]): 每个材质的名称和面，面是OBJ顶点索引（从1开始） /
+            Material name and faces of every material, faces are OBJ vertex indices (starting at 1)
+        options (MeshOptions): 优化选项 / Optimisation options
+        stats (MeshStats): 接收统计的对象，为空时新建 / Object receiving the statistics, a new one when None
+
+    返回:
+    Returns:
+        OptimizedMesh: 共享顶点表、每个材质的面和统计 / Shared vertex table, faces of every material and statistics
+    """
+    tolerance = options.weld_tolerance
+    min_area = get_min_face_area(tolerance)
+    stats = stats if stats is not None else MeshStats()
+    weld_keys = {}  # OBJ索引 -> (焊接键, 顶点字符串) / OBJ index -> (weld key, vertex string)
+    key_vertices = {}  # 焊接键 -> (顶点字符串, 坐标) / weld key -> (vertex string, coordinates)
+    key_numbers = {}  # 焊接键 -> 共享顶点编号 / weld key -> shared vertex number
+    points = []
+    optimized_shapes = []
+
+    def get_weld_key(index: int):
+        weld_key = weld_keys.get(index)
+        if weld_key is None:
+            vertex = vertices[index - 1] if index - 1 < len(vertices) else DEFAULT_VERTEX
+            coords = tuple(map(float, vertex.split(" ")))
+            if not all(map(math.isfinite, coords)):
+                key = vertex
+            elif tolerance > 0:
+                key = tuple(round(coord / tolerance) for coord in coords)
+            else:
+                key = coords
+            key_vertices.setdefault(key, (vertex, (coords + (0.0, 0.0, 0.0))[:3]))
+            weld_key = weld_keys[index] = (key, vertex)
+        return weld_key[0]
+
+    for material_key, faces in shapes:
+        shape = MeshShape(material_key=material_key)
+        plain_numbers = {}  # 未优化转换中这个Shape的顶点编号 / vertex numbers of this Shape without optimisation
+        last_plain_vertex = ""
+        seen_faces = set()
+
+        for face in faces:
+            try:
+                keys = [get_weld_key(index) for index in face]
+            except IndexError:
+                continue
+            stats.faces_before += 1
+
+            for index in face:
+                if index not in plain_numbers:
+                    plain_numbers[index] = len(plain_numbers)
+                    last_plain_vertex = weld_keys[index][1]
+                    shape.plain_text_size += len(last_plain_vertex) + 2
+                shape.plain_text_size += len(str(plain_numbers[index])) + 1
+            shape.plain_text_size += len("-1,")
+
+            # 去掉焊接后相邻的重复顶点 / Drop neighbouring vertices that were welded together
+            welded = [key for position, key in enumerate(keys) if key != keys[position - 1]]
+            if len(welded) < 3 or get_face_area([key_vertices[key][1] for key in welded]) <= min_area:
+                stats.degenerate_faces += 1
+                continue
+            signature = tuple(sorted(welded))
+            if signature in seen_faces:
+                stats.duplicate_faces += 1
+                continue
+            seen_faces.add(signature)
+
+            numbers = []
+            for key in welded:
+                number = key_numbers.get(key)
+                if number is None:
+                    number = key_numbers[key] = len(points)
+                    points.append(key_vertices[key][0])
+                numbers.append(number)
+            shape.faces.append(tuple(numbers))
+
+        if plain_numbers:
+            # 未优化的转换会重复输出最后一个顶点 / The unoptimised conversion writes the last vertex twice
+            shape.plain_text_size += len(last_plain_vertex)
+            stats.vertices_before += len(plain_numbers) + 1
+        stats.faces_after += len(shape.faces)
+        optimized_shapes.append(shape)
+
+    stats.vertices_after = len(points)
+    return OptimizedMesh(points=points, shapes=optimized_shapes, stats=stats)
+
+
+def get_valid_triangles(triangles: "np.ndarray", corners: "np.ndarray", min_area: float) -> "np.ndarray":
+    """
+    三个顶点互不相同且面积大于下限的三角形，面积的计算顺序与 get_face_area 相同
+    Triangles with three distinct vertices and an area above the minimum, the area is
+    computed in the same order as get_face_area
+
+    参数:
+    Args:
+        triangles (np.ndarray): (n, 3) 顶点编号 / (n, 3) vertex numbers
+        corners (np.ndarray): (n, 3, 3) 顶点坐标 / (n, 3, 3) vertex coordinates
+        min_area (float): 面积下限 / Minimum area
+    """
+    last, first, second = corners[:, 2], corners[:, 0], corners[:, 1]
+    normal = (
+        (last[:, [1, 2, 0]] - first[:, [1, 2, 0]]) * (last[:, [2, 0, 1]] + first[:, [2, 0, 1]])
+        + (first[:, [1, 2, 0]] - second[:, [1, 2, 0]]) * (first[:, [2, 0, 1]] + second[:, [2, 0, 1]])
+        + (second[:, [1, 2, 0]] - last[:, [1, 2, 0]]) * (second[:, [2, 0, 1]] + last[:, [2, 0, 1]])
+    )
+    area = 0.5 * np.sqrt(
+        normal[:, 0] * normal[:, 0] + normal[:, 1] * normal[:, 1] + normal[:, 2] * normal[:, 2]
+    )
+    return (
+        (triangles[:, 0] != triangles[:, 1])
+        & (triangles[:, 1] != triangles[:, 2])
+        & (triangles[:, 2] != triangles[:, 0])
+        & (area > min_area)
+    )
+
+
+def group_rows(rows: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    把相同的行分为一组，返回 (每行的组号, 每组第一行的位置)
+    Group identical rows, returns (group number of every row, position of the first row of every group)
+
+    比 np.unique(axis=0) 快，后者要对整行做字节排序。
+    Faster than np.unique(axis=0), which sorts whole rows as bytes.
+    """
+    order = np.lexsort(rows.T[::-1])
+    sorted_rows = rows[order]
+    group_starts = np.ones(len(rows), dtype=bool)
+    group_starts[1:] = (sorted_rows[1:] != sorted_rows[:-1]).any(axis=1)
+    groups = np.empty(len(rows), dtype=np.int64)
+    groups[order] = np.cumsum(group_starts) - 1
+    # lexsort 是稳定排序，每组在排序结果中的第一行就是原顺序中的第一行
+    # lexsort is stable, so the first row of every group in sorted order comes first in the original order too
+    return groups, order[group_starts]
+
+
+def optimize_mesh_numpy(
+    vertices: List[str],
+    coords: "np.ndarray",
+    shapes: List[Tuple[str, "np.ndarray"]],
+    options: MeshOptions,
+    stats: MeshStats = None,
+) -> Union[OptimizedMesh, None]:
+    """
+    optimize_mesh 的NumPy实现，只处理三角形网格，结果完全相同
+    NumPy version of optimize_mesh for triangle meshes, with identical results
+
+    coords 是与 vertices 对应的 (n, 3) 坐标数组，每个材质的面是 (n, 3) 的OBJ索引数组。
+    坐标不是有限值或索引不是正数时返回None，由调用方回退到 optimize_mesh。
+    coords is the (n, 3) coordinate array matching vertices, the faces of every material
+    are an (n, 3) array of OBJ indices. Returns None when a coordinate isn't finite or
+    an index isn't positive, the caller then falls back to optimize_mesh.
+    """
+    if np is None or coords.shape != (len(vertices), 3) or not np.isfinite(coords).all():
+        return None
+    all_faces = np.concatenate([faces for _, faces in shapes]) if shapes else np.empty((0, 3), np.int64)
+    if all_faces.size and all_faces.min() < 1:
+        return None
+
+    vertex_table = vertices + [DEFAULT_VERTEX]
+    coords = np.vstack([coords, np.zeros((1, 3))])
+    tolerance = options.weld_tolerance
+    if tolerance > 0:
+        grid = np.rint(coords / tolerance)
+        if not (np.abs(grid) < 2.0**62).all():
+            return None
+        weld_rows = grid.astype(np.int64)
+    else:
+        # 加0.0把-0.0变为0.0，与Python中 -0.0 == 0.0 一致
+        # Adding 0.0 turns -0.0 into 0.0, matching -0.0 == 0.0 in Python
+        weld_rows = (coords + 0.0).view(np.int64)
+    row_keys = group_rows(weld_rows)[0]
+
+    stats = stats if stats is not None else MeshStats()
+    vertex_lengths = np.fromiter(map(len, vertex_table), dtype=np.int64, count=len(vertex_table))
+    powers_of_ten = 10 ** np.arange(1, 19, dtype=np.int64)
+
+    # 每个焊接键的代表顶点是面中第一个出现的、属于这个键的顶点
+    # The representative vertex of every weld key is the first vertex of that key used by a face
+    face_rows = np.minimum(all_faces - 1, len(vertices))
+    face_keys = row_keys[face_rows]
+    used_keys, first_use = np.unique(face_keys.reshape(-1), return_index=True)
+    key_rows = np.zeros(row_keys.max() + 1 if row_keys.size else 0, dtype=np.int64)
+    key_rows[used_keys] = face_rows.reshape(-1)[first_use]
+
+    # 退化的面：焊接后有重复顶点，或用代表顶点算出的面积不超过下限
+    # Degenerate faces: repeated vertices after welding, or an area from the
+    # representative vertices that doesn't exceed the minimum
+    valid = get_valid_triangles(face_keys, coords[key_rows[face_keys]], get_min_face_area(tolerance))
+
+    # 同一材质中顶点集合相同的面只保留第一个
+    # Only the first face with a given vertex set is kept within a material
+    shape_sizes = [len(faces) for _, faces in shapes]
+    shape_ids = np.repeat(np.arange(len(shapes)), shape_sizes)
+    signatures = np.column_stack([shape_ids, np.sort(face_keys, axis=1)])[valid]
+    first_faces = group_rows(signatures)[1]
+    kept = np.zeros(len(face_keys), dtype=bool)
+    kept[np.flatnonzero(valid)[first_faces]] = True
+
+    # 共享顶点表按首次使用的顺序编号
+    # The shared vertex table is numbered in order of first use
+    kept_keys = face_keys[kept]
+    used_keys, first_use = np.unique(kept_keys.reshape(-1), return_index=True)
+    use_order = np.argsort(first_use, kind="stable")
+    key_numbers = np.zeros(key_rows.size, dtype=np.int64)
+    key_numbers[used_keys[use_order]] = np.arange(use_order.size)
+    table = np.array(vertex_table, dtype=object)
+    points = table[key_rows[used_keys[use_order]]].tolist()
+    numbered_faces = key_numbers[kept_keys]
+
+    optimized_shapes = []
+    start = 0
+    for (material_key, faces), size in zip(shapes, shape_sizes):
+        shape = MeshShape(material_key=material_key)
+        shape_kept = kept[start:start + size]
+        shape.faces = numbered_faces[np.count_nonzero(kept[:start]):][: np.count_nonzero(shape_kept)]
+        start += size
+        if size:
+            # 未优化转换中的顶点编号和文本长度 / Vertex numbers and text length of the unoptimised conversion
+            indices = faces.reshape(-1)
+            unique_indices, first_index = np.unique(indices, return_index=True)
+            index_order = np.argsort(first_index, kind="stable")
+            plain_numbers = np.empty_like(index_order)
+            plain_numbers[index_order] = np.arange(index_order.size)
+            numbers = plain_numbers[np.searchsorted(unique_indices, indices)]
+            rows = np.minimum(unique_indices - 1, len(vertices))
+            shape.plain_text_size = int(
+                vertex_lengths[rows].sum()
+                + 2 * rows.size
+                + vertex_lengths[rows[index_order[-1]]]
+                + (np.searchsorted(powers_of_ten, numbers, side="right") + 2).sum()
+                + len("-1,") * size
+            )
+            stats.vertices_before += rows.size + 1
+        stats.faces_before += size
+        stats.faces_after += len(shape.faces)
+        optimized_shapes.append(shape)
+
+    stats.degenerate_faces += int(np.count_nonzero(~valid))
+    stats.duplicate_faces += int(np.count_nonzero(valid) - np.count_nonzero(kept))
+    stats.vertices_after = len(points)
+    return OptimizedMesh(points=points, shapes=optimized_shapes, stats=stats)
+
+
+def get_shape_tables(mesh: OptimizedMesh) -> List[Tuple[List[str], Union[List[Tuple[int, ...]], "np.ndarray"]]]:
+    """
+    把共享顶点表拆成每个Shape单独的顶点表，按首次使用的顺序重新编号
+    Split the shared vertex table into a table per Shape, renumbered in order of first use
+
+    每个Shape的顶点编号较小，coordIndex更短；顶点在Shape之间共用不多时总输出更小。
+    The vertex numbers of every Shape are smaller and so is the coordIndex text, the
+    whole output gets smaller when few vertices are shared between Shapes.
+
+    返回:
+    Returns:
+        list: 每个Shape的 (顶点字符串, 面) / (vertex strings, faces) of every Shape
+    """
+    tables = []
+    for shape in mesh.shapes:
+        faces = shape.faces
+        if isinstance(faces, list):
+            numbers = {}
+            local_faces = [
+                tuple(numbers.setdefault(number, len(numbers)) for number in face) for face in faces
+            ]
+            tables.append(([mesh.points[number] for number in numbers], local_faces))
+            continue
+        used, first_use = np.unique(faces.reshape(-1), return_index=True)
+        use_order = np.argsort(first_use, kind="stable")
+        local_numbers = np.empty(used.size, dtype=np.int64)
+        local_numbers[use_order] = np.arange(used.size)
+        tables.append((
+            [mesh.points[number] for number in used[use_order].tolist()],
+            local_numbers[np.searchsorted(used, faces)],
+        ))
+    return tables
+
+
+def get_shape_triangles(faces) -> "np.ndarray":
+    """
+    把一个材质的面转为 (n, 3) 三角形数组，多边形按扇形拆分
+    Turn the faces of one material into an (n, 3) triangle array, polygons are split into fans
+    """
+    if not isinstance(faces, list):
+        return faces
+    triangles = [
+        (face[0], face[corner], face[corner + 1])
+        for face in faces
+        for corner in range(1, len(face) - 1)
+    ]
+    return np.array(triangles, dtype=np.int64).reshape(-1, 3)
+
+
+def cluster_mesh(
+    coords: "np.ndarray", shape_triangles: list, cell_size: float, min_area: float
+) -> Tuple["np.ndarray", list]:
+    """
+    顶点聚类：同一网格单元中的顶点合并到它们的平均位置，删除退化和重复的三角形
+    Vertex clustering: the vertices in one grid cell are merged at their mean position,
+    degenerate and duplicate triangles are removed
+
+    返回:
+    Returns:
+        Tuple[np.ndarray, list]: (聚类中心坐标, 每个材质的三角形聚类编号) /
+            (cluster centre coordinates, cluster numbers of the triangles of every material)
+    """
+    cells = np.floor((coords - coords.min(axis=0)) / cell_size).astype(np.int64)
+    clusters = group_rows(cells)[0]
+    cluster_count = int(clusters.max()) + 1
+    sizes = np.bincount(clusters, minlength=cluster_count)
+    centres = np.column_stack([
+        np.bincount(clusters, weights=coords[:, axis], minlength=cluster_count) / sizes
+        for axis in range(3)
+    ])
+
+    clustered = []
+    for triangles in shape_triangles:
+        triangles = clusters[triangles]
+        triangles = triangles[get_valid_triangles(triangles, centres[triangles], min_area)]
+        clustered.append(triangles[np.sort(group_rows(np.sort(triangles, axis=1))[1])])
+    return centres, clustered
+
+
+def decimate_mesh(mesh: OptimizedMesh, options: MeshOptions) -> OptimizedMesh:
+    """
+    用顶点聚类简化网格，直到满足误差容差和三角形预算
+    Simplify the mesh by vertex clustering to meet the error tolerance and the triangle budget
+
+    聚类网格大小取 decimation_tolerance；三角形仍超过 max_triangles 时，在更大的网格大小中
+    二分搜索满足预算的最小值。需要NumPy，不可用时网格保持不变。
+    The clustering cell size is decimation_tolerance. When the triangles still exceed
+    max_triangles, the smallest larger cell size meeting the budget is found by bisection.
+    Requires NumPy, the mesh is left unchanged without it.
+
+    参数:
+    Args:
+        mesh (OptimizedMesh): 焊接后的网格 / Welded mesh
+        options (MeshOptions): 简化选项 / Simplification options
+
+    返回:
+    Returns:
+        OptimizedMesh: 简化后的网格，统计更新为简化后的数量 / Simplified mesh, with statistics updated to the simplified counts
+    """
+    if np is None:
+        print("Warning: NumPy is not available, 3D model decimation is skipped")
+        return mesh
+    coords = np.fromstring(" ".join(mesh.points), dtype=np.float64, sep=" ")
+    if not mesh.points or coords.size != 3 * len(mesh.points):
+        return mesh
+    coords = coords.reshape(-1, 3)
+    shape_triangles = [get_shape_triangles(shape.faces) for shape in mesh.shapes]
+    triangle_count = sum(len(triangles) for triangles in shape_triangles)
+    min_area = get_min_face_area(options.weld_tolerance)
+
+    def cluster(cell_size: float):
+        centres, clustered = cluster_mesh(coords, shape_triangles, cell_size, min_area)
+        return cell_size, centres, clustered, sum(len(triangles) for triangles in clustered)
+
+    result = None
+    if options.decimation_tolerance > 0:
+        result = cluster(options.decimation_tolerance)
+    if options.max_triangles > 0 and (result[3] if result else triangle_count) > options.max_triangles:
+        # 三角形数量随网格变大而减少（大致单调），先找到满足预算的上界再二分
+        # The triangle count drops as the cells grow (roughly monotonic), an upper
+        # bound meeting the budget is found first and then bisected
+        extent = float(np.ptp(coords, axis=0).max()) or 1.0
+        lower = max(options.decimation_tolerance, extent * 1e-6)
+        upper = extent
+        result = cluster(upper)
+        while result[3] > options.max_triangles:
+            upper *= 2
+            result = cluster(upper)
+        for _ in range(DECIMATION_SEARCH_STEPS):
+            if upper / lower <= DECIMATION_SEARCH_PRECISION:
+                break
+            middle = math.sqrt(lower * upper)
+            candidate = cluster(middle)
+            if candidate[3] <= options.max_triangles:
+                upper, result = middle, candidate
+            else:
+                lower = middle
+    if result is None:
+        return mesh
+
+    cell_size, centres, clustered, _ = result
+    stats = mesh.stats
+    # 共享顶点表按首次使用的顺序编号 / The shared vertex table is numbered in order of first use
+    all_triangles = np.concatenate(clustered) if clustered else np.empty((0, 3), np.int64)
+    used, first_use = np.unique(all_triangles.reshape(-1), return_index=True)
+    use_order = np.argsort(first_use, kind="stable")
+    numbers = np.zeros(len(centres), dtype=np.int64)
+    numbers[used[use_order]] = np.arange(use_order.size)
+    points = [
+        " ".join(str(round(coord, 4)) for coord in centre)
+        for centre in centres[used[use_order]].tolist()
+    ]
+
+    shapes = []
+    for shape, triangles in zip(mesh.shapes, clustered):
+        shapes.append(MeshShape(
+            material_key=shape.material_key,
+            faces=numbers[triangles],
+            plain_text_size=shape.plain_text_size,
+        ))
+    stats.decimated_faces = triangle_count - len(all_triangles)
+    stats.decimation_cell_size = cell_size
+    stats.faces_after = len(all_triangles)
+    stats.vertices_after = len(points)
+    return OptimizedMesh(points=points, shapes=shapes, stats=stats)
@@ -0,0 +1,160 @@
+"""
+3D模型清单
+Sidecar manifest of the 3D models exported into a <lib>.3dshapes directory
+
+清单记录每个模型的来源UUID、导出选项以及写入文件的大小和SHA-256。
+模型已是最新时，增量导出可以完全跳过OBJ/STEP的下载和WRL转换。
+The manifest records the source UUID, the export options and the size and SHA-256
+of the written files of every model. Incremental exports skip the OBJ/STEP download
+and the WRL conversion completely for models that are up to date.
+
+<lib>.pretty 使用同样的清单（easykiconverter_footprints.json）记录封装，来源为封装数据的哈希。
+<lib>.pretty uses the same kind of manifest (easykiconverter_footprints.json) for the
+footprints, their source is the hash of the footprint payload.
+"""
+
+# Global imports
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from ..utils.file_utils import compute_file_hash, write_file_atomic
+from ..utils.json_utils import json_dumps, json_loads
+
+MANIFEST_FILE_NAME = "easykiconverter_models.json"
+FOOTPRINT_MANIFEST_FILE_NAME = "easykiconverter_footprints.json"
+
+# 修改WRL/STEP或封装的输出格式后必须增加此版本号，旧清单中的文件会重新导出
+# Bump whenever the WRL/STEP or footprint output changes, files of older manifests are exported again
+MANIFEST_VERSION = 3
+
+
+def compute_options_hash(options: Dict[str, Any]) -> str:
+    """
+    计算导出选项的哈希，选项改变时模型需要重新导出
+    Compute the hash of the export options, models are exported again when they change
+
+    参数:
+    Args:
+        options (dict): 影响输出文件的选项，值必须可以JSON序列化 / Options affecting the output files, values have to be JSON serializable
+
+    返回:
+    Returns:
+        str: SHA-256十六进制摘要 / SHA-256 hex digest
+    """
+    return hashlib.sha256(json_dumps(options, sort_keys=True)).hexdigest()
+
+
+class ModelManifest:
+    """
+    线程安全的3D模型清单，record 后需要调用 save 写回磁盘
+    Thread safe 3D model manifest, call save after record to write it back to disk
+    """
+
+    def __init__(self, shapes_dir: Path, file_name: str = MANIFEST_FILE_NAME) -> None:
+        self.shapes_dir = Path(shapes_dir)
+        self.path = self.shapes_dir / file_name
+        self.lock = threading.Lock()
+        self.models = self.load()
+        self.dirty = False
+
+    def load(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, "rb") as manifest_file:
+                manifest = json_loads(manifest_file.read())
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable 3D model manifest {self.path}: {e}")
+            return {}
+
+        if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+            return {}
+        models = manifest.get("models")
+        return models if isinstance(models, dict) else {}
+
+    def get_up_to_date_files(self, name: str, uuid: str, options_hash: str) -> List[Path]:
+        """
+        获取已是最新的模型文件
+        Get the files of a model when they are up to date
+
+        大小和修改时间与记录一致的文件直接视为未改变，否则重新计算哈希比较。
+        Files whose size and modification time match the record are taken as unchanged,
+        otherwise their hash is computed and compared.
+
+        参数:
+        Args:
+            name (str): 模型或封装文件名（不含扩展名） / Model or footprint file name without extension
+            uuid (str): EasyEDA 3D模型UUID（封装为封装数据的哈希） / EasyEDA 3D model UUID (the footprint payload hash for footprints)
+            options_hash (str): 导出选项哈希 / Export options hash
+
+        返回:
+        Returns:
+            List[Path]: 最新时返回模型文件列表，否则返回空列表 / The model files when up to date, an empty list otherwise
+        """
+        with self.lock:
+            entry = self.models.get(name)
+        if (
+            not entry
+            or entry.get("uuid") != uuid
+            or entry.get("options") != options_hash
+            or not entry.get("files")
+        ):
+            return []
+
+        paths = []
+        for file_name, record in entry["files"].items():
+            path = self.shapes_dir / file_name
+            try:
+                stat = path.stat()
+            except OSError:
+                return []
+            if stat.st_size != record.get("size"):
+                return []
+            if stat.st_mtime_ns != record.get("mtime_ns"):
+                if compute_file_hash(path) != record.get("sha256"):
+                    return []
+            paths.append(path)
+        return paths
+
+    def record(self, name: str, uuid: str, options_hash: str, paths: Iterable[Path]) -> None:
+        """
+        记录刚导出的模型文件
+        Record the files of a model that was just exported
+
+        参数:
+        Args:
+            name (str): 模型或封装文件名（不含扩展名） / Model or footprint file name without extension
+            uuid (str): EasyEDA 3D模型UUID（封装为封装数据的哈希） / EasyEDA 3D model UUID (the footprint payload hash for footprints)
+            options_hash (str): 导出选项哈希 / Export options hash
+            paths (Iterable[Path]): 写入的模型文件 / Written model files
+        """
+        files = {}
+        for path in paths:
+            path = Path(path)
+            stat = path.stat()
+            files[path.name] = {
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": compute_file_hash(path),
+            }
+        with self.lock:
+            self.models[name] = {"uuid": uuid, "options": options_hash, "files": files}
+            self.dirty = True
+
+    def save(self) -> None:
+        """
+        有改动时原子地写回清单，失败时只记录日志
+        Atomically write the manifest back when it changed, failures are only logged
+        """
+        with self.lock:
+            if not self.dirty:
+                return
+            data = json_dumps({"version": MANIFEST_VERSION, "models": self.models}, sort_keys=True)
+            self.dirty = False
+        try:
+            write_file_atomic(self.path, data)
+        except Exception as e:
+            logging.warning(f"Failed to write 3D model manifest {self.path}: {e}")
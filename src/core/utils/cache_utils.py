@@ -0,0 +1,35 @@
+"""
+缓存工具模块
+包含本地缓存目录相关函数
+"""
+import os
+import sys
+from pathlib import Path
+
+CACHE_DIR_NAME = "EasyKiConverter"
+
+
+def get_cache_root(cache_dir: str = "") -> Path:
+    """
+    获取本地缓存根目录
+    Get the root directory of the local cache
+
+    参数:
+    Args:
+        cache_dir (str): 用户配置的缓存目录，为空时使用系统默认位置 / User configured cache directory, platform default when empty
+
+    返回:
+    Returns:
+        Path: 缓存根目录 / Cache root directory
+    """
+    if cache_dir:
+        return Path(cache_dir)
+
+    if sys.platform.startswith("win"):
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+
+    return Path(base) / CACHE_DIR_NAME
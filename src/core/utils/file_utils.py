@@ -0,0 +1,264 @@
+"""
+文件输出工具模块
+包含所有导出器共用的原子写入：先写入同目录的临时文件，与已有文件比较SHA-256，
+内容未改变时丢弃临时文件、不改动原文件（修改时间不变），否则用os.replace原子地替换。
+进程中途被终止时不会留下写了一半的文件。
+Shared output layer of all exporters: the content is written to a temporary file in
+the same directory and compared with the existing file by SHA-256. Unchanged content
+drops the temporary file and leaves the original untouched (its modification time
+stays), otherwise os.replace swaps it in atomically. A killed process never leaves a
+half written file behind.
+"""
+import hashlib
+import os
+import stat
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Optional, Union
+
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def read_umask() -> int:
+    """
+    读取进程的umask，只在导入时调用一次
+    Read the umask of the process, only called once on import
+
+    umask是整个进程共享的，读取它需要先设置再恢复；在导出线程运行时这样做会让其它线程
+    在这期间创建的文件和目录所有人可写，所以只在导入模块时读取一次（Linux上从/proc读取，不修改umask）。
+    The umask is shared by the whole process and reading it means setting and restoring
+    it; doing that while export threads run would make files and directories other
+    threads create meanwhile world writable, so it's read once on import (from /proc on
+    Linux, without touching the umask).
+    """
+    try:
+        with open("/proc/self/status", encoding="ascii") as status_file:
+            for line in status_file:
+                if line.startswith("Umask:"):
+                    return int(line.split()[1], 8)
+    except (OSError, ValueError, IndexError):
+        pass
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# 新文件的默认权限 / Default permissions of a new file
+DEFAULT_FILE_MODE = 0o666 & ~read_umask()
+
+
+@dataclass
+class WriteResult:
+    """
+    一次写入的结果，written 为False表示内容未改变、文件没有被改写
+    Result of one write, written is False when the content was unchanged and the
+    file wasn't rewritten
+    """
+
+    path: str
+    size: int
+    written: bool
+
+
+class WriteStats:
+    """
+    线程安全的写入统计：写入和跳过的文件数及字节数
+    Thread safe write statistics: files and bytes written and skipped
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.written_files = 0
+        self.written_bytes = 0
+        self.skipped_files = 0
+        self.skipped_bytes = 0
+
+    def add(self, result: Optional[WriteResult]) -> None:
+        if result is None:
+            return
+        with self.lock:
+            if result.written:
+                self.written_files += 1
+                self.written_bytes += result.size
+            else:
+                self.skipped_files += 1
+                self.skipped_bytes += result.size
+
+
+def compute_file_hash(path: Union[str, Path]) -> str:
+    """
+    计算文件的SHA-256
+    Compute the SHA-256 of a file
+
+    参数:
+    Args:
+        path (str | Path): 文件路径 / File path
+
+    返回:
+    Returns:
+        str: SHA-256十六进制摘要 / SHA-256 hex digest
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as hashed_file:
+        for chunk in iter(lambda: hashed_file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_file_mode(path: Union[str, Path]) -> int:
+    """原文件的权限，文件不存在时为新文件的默认权限 / Permissions of the original file, the default ones of a new file when it doesn't exist"""
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        return DEFAULT_FILE_MODE
+
+
+def has_same_content(path: Union[str, Path], size: int, content_hash: str) -> bool:
+    """已有普通文件的大小和SHA-256是否与给定的相同 / Whether the existing regular file has the given size and SHA-256"""
+    try:
+        file_stat = os.stat(path)
+        # 设备和管道不能读取比较 / Devices and pipes can't be read back for comparison
+        if not stat.S_ISREG(file_stat.st_mode) or file_stat.st_size != size:
+            return False
+        return compute_file_hash(path) == content_hash
+    except FileNotFoundError:
+        return False
+
+
+def commit_temp_file(tmp_path: str, path: Union[str, Path]) -> WriteResult:
+    """
+    内容未改变时删除临时文件，否则以原文件的权限原子地替换原文件
+    Delete the temporary file when the content is unchanged, otherwise atomically
+    replace the original with it, keeping the permissions of the original
+    """
+    try:
+        size = os.stat(tmp_path).st_size
+        if has_same_content(path, size, compute_file_hash(tmp_path)):
+            os.unlink(tmp_path)
+            return WriteResult(str(path), size, False)
+        # mkstemp创建的文件只有所有者可读写 / mkstemp creates files readable by the owner only
+        os.chmod(tmp_path, get_file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return WriteResult(str(path), size, True)
+
+
+class AtomicOutputFile:
+    """
+    原子写入的输出文件，用法与open相同；退出with块后 result 记录写入结果
+    Atomically written output file used like open, result holds the outcome after
+    the with block
+
+        output = AtomicOutputFile(path, "w", encoding="utf-8")
+        with output as output_file:
+            output_file.write(text)
+        output.result.written
+
+    with块中发生异常时丢弃临时文件，原文件保持不变。已存在但不是普通文件的目标（设备、管道等）
+    直接打开写入，不会被临时文件替换。
+    An exception inside the with block drops the temporary file and leaves the
+    original unchanged. Targets that exist but aren't regular files (devices, pipes…)
+    are opened and written directly, they are never replaced by the temporary file.
+    """
+
+    def __init__(self, path: Union[str, Path], mode: str = "wb", encoding: Optional[str] = None) -> None:
+        if mode not in ("w", "wb"):
+            raise ValueError(f"Unsupported mode for an atomic output file: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.encoding = encoding
+        self.tmp_path = None
+        self.file = None
+        self.result: Optional[WriteResult] = None
+
+    def __enter__(self) -> IO:
+        if os.path.exists(self.path) and not os.path.isfile(self.path):
+            self.file = open(self.path, self.mode, encoding=self.encoding)
+            return self.file
+        fd, self.tmp_path = tempfile.mkstemp(
+            dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp"
+        )
+        try:
+            self.file = os.fdopen(fd, self.mode, encoding=self.encoding)
+        except BaseException:
+            os.close(fd)
+            os.unlink(self.tmp_path)
+            raise
+        return self.file
+
+    def __exit__(self, exc_type, exc_value, traceback) -> bool:
+        if self.tmp_path is None:
+            size = self.get_written_size()
+            self.file.close()
+            if exc_type is None:
+                self.result = WriteResult(str(self.path), size, True)
+            return False
+        try:
+            # 外层的包装（TextIOWrapper等）可能已经关闭了文件 / Wrappers around it may have closed the file already
+            if not self.file.closed:
+                self.file.close()
+        except BaseException:
+            os.unlink(self.tmp_path)
+            raise
+        if exc_type is not None:
+            os.unlink(self.tmp_path)
+            return False
+        self.result = commit_temp_file(self.tmp_path, self.path)
+        return False
+
+    def get_written_size(self) -> int:
+        """直接写入时已写入的字节数，无法获取时为0 / Bytes written when writing directly, 0 when it can't be told"""
+        try:
+            return 0 if self.file.closed else self.file.tell()
+        except OSError:
+            return 0
+
+
+def write_file_atomic(path: Union[str, Path], data: bytes) -> WriteResult:
+    """
+    原子地写入字节内容，内容与已有文件相同时不写入
+    Atomically write bytes, nothing is written when the existing file has the same content
+
+    参数:
+    Args:
+        path (str | Path): 文件路径 / File path
+        data (bytes): 文件内容 / File content
+
+    返回:
+    Returns:
+        WriteResult: 写入结果 / Write result
+    """
+    # 内容已知，先与已有文件比较，未改变时连临时文件也不需要
+    # The content is known, so it's compared first and unchanged content needs no temporary file at all
+    if has_same_content(path, len(data), hashlib.sha256(data).hexdigest()):
+        return WriteResult(str(path), len(data), False)
+    output = AtomicOutputFile(path, "wb")
+    with output as output_file:
+        output_file.write(data)
+    return output.result
+
+
+def write_text_atomic(path: Union[str, Path], text: str, encoding: str = "utf-8") -> WriteResult:
+    """
+    原子地写入文本，换行符转换与 open(path, "w") 相同
+    Atomically write text, newlines are translated like open(path, "w") does
+
+    参数:
+    Args:
+        path (str | Path): 文件路径 / File path
+        text (str): 文件内容 / File content
+        encoding (str): 文本编码 / Text encoding
+
+    返回:
+    Returns:
+        WriteResult: 写入结果 / Write result
+    """
+    output = AtomicOutputFile(path, "w", encoding=encoding)
+    with output as output_file:
+        output_file.write(text)
+    return output.result
@@ -0,0 +1,58 @@
+"""
+JSON工具模块
+包含可选的快速JSON后端（orjson），未安装时回退到标准库json
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+# orjson.JSONDecodeError 是 json.JSONDecodeError 的子类，两种后端都可以用它捕获
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so it catches both backends
+JSONDecodeError = json.JSONDecodeError
+
+
+def json_loads(data: Union[bytes, bytearray, memoryview, str]) -> Any:
+    """
+    解析JSON数据，可以直接传入响应的字节内容
+    Parse JSON data, raw response bytes can be passed directly
+
+    参数:
+    Args:
+        data (bytes | bytearray | memoryview | str): UTF-8编码的JSON / UTF-8 encoded JSON
+
+    返回:
+    Returns:
+        Any: 解析后的对象 / Parsed object
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def json_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """
+    将对象序列化为紧凑的UTF-8 JSON字节
+    Serialize an object to compact UTF-8 JSON bytes
+
+    参数:
+    Args:
+        obj (Any): 要序列化的对象 / Object to serialize
+        sort_keys (bool): 是否按键排序 / Whether to sort the keys
+
+    返回:
+    Returns:
+        bytes: JSON数据 / JSON data
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(
+        obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
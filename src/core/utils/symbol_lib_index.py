@@ -0,0 +1,293 @@
+"""
+符号库索引模块
+Byte offset index of the top level elements of a KiCad v6 symbol library
+
+扫描器在内存映射的文件上按层级查找顶层元素，记录每个符号的名称和字节范围。
+索引缓存在符号库旁边的 <符号库>.index.json 中，以文件的修改时间和大小为键，
+文件未改变时直接读取缓存，检查符号是否存在是O(1)的字典查找，替换符号是一次拼接。
+The scanner walks the nesting levels of the memory mapped file and records the name and
+byte range of every top level symbol. The index is cached next to the library in
+<library>.index.json keyed by the modification time and size of the file, so for an
+unchanged file the cache is read directly, checking for a symbol is a dict lookup and
+replacing one is a single splice.
+"""
+import hashlib
+import logging
+import mmap
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .file_utils import write_file_atomic
+from .json_utils import json_dumps, json_loads
+
+SYMBOL_INDEX_SUFFIX = ".index.json"
+
+# 修改索引格式或扫描规则后必须增加此版本号
+# Bump whenever the index format or the scanning rules change
+SYMBOL_INDEX_VERSION = 2
+
+# 字符串和括号；字符串中的括号不计入层级
+# Strings and parentheses, parentheses inside strings don't count for the nesting
+SEXPR_TOKEN_REGEX = re.compile(rb'"(?:[^"\\]|\\.)*"|[()]')
+SYMBOL_HEAD_REGEX = re.compile(rb'\(symbol\s+"((?:[^"\\]|\\.)*)"')
+
+# NumPy扫描器每次处理的字节数，内存占用不随文件大小增长
+# Bytes the NumPy scanner processes at a time, memory use doesn't grow with the file size
+SCAN_CHUNK_SIZE = 1 << 24
+
+# 顶层元素：(符号名或None, 起始偏移, 结束偏移, 是否接在其它内容之后, 内容的SHA-256)
+# Top level element: (symbol name or None, start offset, end offset, follows other content, SHA-256 of the content)
+IndexElement = Tuple[Optional[str], int, int, bool, str]
+
+
+def compute_symbol_hash(content: Union[bytes, str]) -> str:
+    """
+    计算符号内容的SHA-256，字符串按UTF-8编码
+    Compute the SHA-256 of symbol content, strings are UTF-8 encoded
+    """
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+def scan_symbol_lib(data: Union[bytes, mmap.mmap]) -> Tuple[int, int, List[IndexElement]]:
+    """
+    扫描v6符号库的顶层元素
+    Scan the top level elements of a v6 symbol library
+
+    头部（版本、生成器）之后的每个顶层元素从所在行的行首开始（元素单独成行时包含缩进），
+    到对应的右括号结束。
+    Every top level element after the header (version, generator) starts at the beginning
+    of its line (including the indentation when the element is on a line of its own) and
+    ends at its closing parenthesis.
+
+    参数:
+    Args:
+        data (bytes | mmap): 符号库文件内容 / Symbol library file content
+
+    返回:
+    Returns:
+        Tuple[int, int, List[IndexElement]]: (头部结束偏移, 库右括号的偏移, 顶层元素) / (header end offset, offset of the closing parenthesis of the library, top level elements)
+    """
+    if np is not None:
+        spans, lib_end = find_top_level_spans_numpy(data)
+    else:
+        spans, lib_end = find_top_level_spans(data)
+
+    elements = []
+    header_end = None
+    for element_start, element_end in spans:
+        name_match = SYMBOL_HEAD_REGEX.match(data, element_start)
+        if name_match is None and header_end is None:
+            continue
+        line_start = data.rfind(b"\n", 0, element_start) + 1
+        glued = bool(data[line_start:element_start].strip(b" \t"))
+        start = element_start if glued else line_start
+        if header_end is None:
+            header_end = start
+        name = name_match.group(1).decode("utf-8", errors="replace") if name_match else None
+        elements.append((name, start, element_end, glued, compute_symbol_hash(data[start:element_end])))
+    return (lib_end if header_end is None else header_end), lib_end, elements
+
+
+def find_top_level_spans(data: Union[bytes, mmap.mmap]) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    逐个记号查找顶层元素的 (左括号, 右括号之后) 偏移和库右括号的偏移
+    Find the (opening parenthesis, after the closing parenthesis) offsets of the top
+    level elements and the offset of the closing parenthesis of the library token by token
+    """
+    spans = []
+    depth = 0
+    element_start = 0
+    for match in SEXPR_TOKEN_REGEX.finditer(data):
+        token = match.group()
+        if token == b"(":
+            depth += 1
+            if depth == 2:
+                element_start = match.start()
+        elif token == b")":
+            depth -= 1
+            if depth == 1:
+                spans.append((element_start, match.end()))
+            elif depth == 0:
+                return spans, match.start()
+    return spans, len(data)
+
+
+def find_top_level_spans_numpy(data: Union[bytes, mmap.mmap]) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    find_top_level_spans 的NumPy实现，对引号成对的文件结果完全相同
+    NumPy version of find_top_level_spans, the results are identical for files whose quotes are balanced
+
+    文件按块读取，只收集括号、引号和反斜杠的位置；字符串范围由未转义的引号配对得到，
+    字符串外括号的层级用累加和计算。
+    The file is read in chunks and only the positions of parentheses, quotes and
+    backslashes are collected. Strings are the pairs of unescaped quotes, the nesting
+    of the parentheses outside strings is a cumulative sum.
+    """
+    parens = []
+    quotes = []
+    has_backslash = False
+    for offset in range(0, len(data), SCAN_CHUNK_SIZE):
+        chunk = np.frombuffer(data, dtype=np.uint8, count=min(SCAN_CHUNK_SIZE, len(data) - offset), offset=offset)
+        parens.append(np.flatnonzero((chunk == ord("(")) | (chunk == ord(")"))) + offset)
+        quotes.append(np.flatnonzero(chunk == ord('"')) + offset)
+        has_backslash = has_backslash or bool((chunk == ord("\\")).any())
+        del chunk
+    parens = np.concatenate(parens) if parens else np.empty(0, dtype=np.intp)
+    quotes = np.concatenate(quotes) if quotes else np.empty(0, dtype=np.intp)
+
+    if has_backslash and quotes.size:
+        # 前面有奇数个反斜杠的引号被转义，这样的引号很少，逐个检查
+        # Quotes after an odd number of backslashes are escaped, they are rare and checked one by one
+        escaped = []
+        for position in quotes[np.frombuffer(data, dtype=np.uint8)[np.maximum(quotes - 1, 0)] == ord("\\")].tolist():
+            run = 0
+            while position - run - 1 >= 0 and data[position - run - 1] == ord("\\"):
+                run += 1
+            if run % 2:
+                escaped.append(position)
+        quotes = np.setdiff1d(quotes, escaped)
+
+    # 前面有奇数个引号的括号在字符串中 / Parentheses after an odd number of quotes are inside a string
+    parens = parens[np.searchsorted(quotes, parens) % 2 == 0]
+    is_open = np.frombuffer(data, dtype=np.uint8)[parens] == ord("(")
+    depth = np.cumsum(np.where(is_open, 1, -1), dtype=np.int64)
+
+    closed = np.flatnonzero(depth == 0)
+    if closed.size:
+        lib_end = int(parens[closed[0]])
+        parens, is_open, depth = parens[:closed[0]], is_open[:closed[0]], depth[:closed[0]]
+    else:
+        lib_end = len(data)
+    starts = parens[is_open & (depth == 2)].tolist()
+    ends = (parens[~is_open & (depth == 1)] + 1).tolist()
+    return list(zip(starts, ends)), lib_end
+
+
+class SymbolLibIndex:
+    """
+    符号库的顶层元素索引
+    Index of the top level elements of a symbol library
+    """
+
+    def __init__(self, header_end: int, lib_end: int, elements: List[IndexElement]) -> None:
+        self.header_end = header_end
+        self.lib_end = lib_end
+        self.elements = elements
+        # 同名符号出现多次时以最后一个为准 / The last one wins when a name appears twice
+        self.symbols: Dict[str, int] = {
+            element[0]: position for position, element in enumerate(elements) if element[0] is not None
+        }
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.symbols
+
+    def get_range(self, name: str) -> Optional[Tuple[int, int]]:
+        """获取符号的字节范围 / Get the byte range of a symbol"""
+        position = self.symbols.get(name)
+        if position is None:
+            return None
+        _, start, end, _, _ = self.elements[position]
+        return start, end
+
+    def get_hash(self, name: str) -> Optional[str]:
+        """获取符号内容的SHA-256 / Get the SHA-256 of the symbol content"""
+        position = self.symbols.get(name)
+        return self.elements[position][4] if position is not None else None
+
+    def replace_range(self, name: str, content: bytes) -> None:
+        """
+        符号被替换为新内容后更新偏移和哈希
+        Update the offsets and the hash after a symbol was replaced by new content
+        """
+        position = self.symbols[name]
+        _, start, end, _, _ = self.elements[position]
+        delta = len(content) - (end - start)
+        self.elements[position] = (name, start, start + len(content), False, compute_symbol_hash(content))
+        for later in range(position + 1, len(self.elements)):
+            later_name, later_start, later_end, glued, content_hash = self.elements[later]
+            self.elements[later] = (later_name, later_start + delta, later_end + delta, glued, content_hash)
+        self.lib_end += delta
+
+    @classmethod
+    def scan(cls, lib_path: Path) -> "SymbolLibIndex":
+        """内存映射符号库文件并扫描 / Memory map the library file and scan it"""
+        with open(lib_path, "rb") as lib_file:
+            if os.fstat(lib_file.fileno()).st_size == 0:
+                return cls(0, 0, [])
+            with mmap.mmap(lib_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                return cls(*scan_symbol_lib(data))
+
+    @classmethod
+    def load(cls, lib_path: Union[str, Path]) -> "SymbolLibIndex":
+        """
+        读取符号库的索引，缓存过期或不存在时重新扫描并写入缓存
+        Load the index of a symbol library, it's scanned again and cached when the
+        cache is stale or missing
+
+        参数:
+        Args:
+            lib_path (str | Path): 符号库文件路径 / Symbol library file path
+
+        返回:
+        Returns:
+            SymbolLibIndex: 符号库索引 / Symbol library index
+        """
+        lib_path = Path(lib_path)
+        stat = lib_path.stat()
+        index_path = get_index_path(lib_path)
+        try:
+            with open(index_path, "rb") as index_file:
+                cached = json_loads(index_file.read())
+            if (
+                cached.get("version") == SYMBOL_INDEX_VERSION
+                and cached.get("size") == stat.st_size
+                and cached.get("mtime_ns") == stat.st_mtime_ns
+            ):
+                return cls(
+                    cached["header_end"],
+                    cached["lib_end"],
+                    [tuple(element) for element in cached["elements"]],
+                )
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.debug(f"Ignoring unreadable symbol library index {index_path}: {e}")
+
+        index = cls.scan(lib_path)
+        index.save(lib_path)
+        return index
+
+    def save(self, lib_path: Union[str, Path]) -> None:
+        """
+        把索引和符号库当前的修改时间、大小一起缓存，失败时只记录日志
+        Cache the index together with the current modification time and size of the
+        library, failures are only logged
+        """
+        lib_path = Path(lib_path)
+        index_path = get_index_path(lib_path)
+        try:
+            stat = lib_path.stat()
+            data = json_dumps({
+                "version": SYMBOL_INDEX_VERSION,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "header_end": self.header_end,
+                "lib_end": self.lib_end,
+                "elements": self.elements,
+            })
+            write_file_atomic(index_path, data)
+        except Exception as e:
+            logging.warning(f"Failed to write symbol library index {index_path}: {e}")
+
+
+def get_index_path(lib_path: Path) -> Path:
+    return lib_path.with_name(lib_path.name + SYMBOL_INDEX_SUFFIX)
@@ -0,0 +1,244 @@
+"""
+符号库分片模块
+Route symbols into several shard libraries and register them in a sym-lib-table
+
+分片策略决定符号写入哪个符号库：none 全部写入一个库；prefix 按位号前缀（R、C、U…）
+写入 <库名>_<前缀>；count 按顺序写入 <库名>_001、<库名>_002…，每个库最多 shard_size 个符号，
+只有写入线程确认添加的符号才计入分片。
+分片库在第一次用到时创建，批量结束时登记到导出目录的 sym-lib-table 中。
+The sharding policy decides which library a symbol goes to: none writes everything to one
+library, prefix writes to <lib>_<prefix> by the reference prefix (R, C, U…), count fills
+<lib>_001, <lib>_002… in order with at most shard_size symbols each, only symbols the
+writer thread confirms to have stored count toward a shard. Shard libraries are
+created when they are first used and registered in the sym-lib-table of the export folder
+at the end of the batch.
+"""
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from ..kicad.parameters_kicad_symbol import KicadVersion
+from .file_utils import write_file_atomic
+from .symbol_lib_index import SymbolLibIndex
+from .symbol_lib_utils import SymbolLibrary
+
+SHARDING_POLICIES = ("none", "prefix", "count")
+DEFAULT_SHARD_SIZE = 500
+
+SYM_LIB_TABLE_NAME = "sym-lib-table"
+
+# 前缀中不适合作为文件名的字符 / Characters of a prefix that don't belong in a file name
+SHARD_KEY_REGEX = re.compile(r"[^A-Za-z0-9_-]+")
+SYM_LIB_TABLE_NAME_REGEX = re.compile(r'\(lib\s+\(name\s+"?((?:[^"\\]|\\.)*?)"?\)')
+
+
+def get_symbol_lib_extension(kicad_version: KicadVersion) -> str:
+    return "lib" if kicad_version == KicadVersion.v5 else "kicad_sym"
+
+
+def get_prefix_shard_key(prefix: Optional[str]) -> str:
+    """
+    把位号前缀转换为分片名，没有可用字符时为 other
+    Turn a reference prefix into a shard name, other when no usable character is left
+    """
+    shard_key = SHARD_KEY_REGEX.sub("", (prefix or "").replace("?", ""))
+    return shard_key or "other"
+
+
+class SymbolLibSharding:
+    """
+    把一个导出库的符号分配到分片符号库
+    Assign the symbols of one export library to shard libraries
+
+    get_lib_path 是线程安全的。count 策略启动时读取已有分片的符号名（v6符号库读取缓存的索引），
+    已有的符号始终分配到所在的分片，新符号写入第一个未满的分片。新符号在 get_lib_path 中只预留位置，
+    写入线程通过 record_stored 确认后才计入分片，没有写入的符号释放预留的位置，分片不会因此未满。
+    get_lib_path is thread safe. The count policy reads the symbol names of the existing
+    shards on start (the cached index for v6 libraries), existing symbols always go to the
+    shard holding them and new symbols to the first shard that isn't full. get_lib_path
+    only reserves a slot for a new symbol, it counts toward the shard once the writer
+    thread confirms it through record_stored, symbols that weren't written release their
+    slot so shards don't end up under-filled.
+    """
+
+    def __init__(
+        self,
+        base_folder: Path,
+        lib_name: str,
+        kicad_version: KicadVersion,
+        policy: str = "none",
+        shard_size: int = DEFAULT_SHARD_SIZE,
+    ) -> None:
+        if policy not in SHARDING_POLICIES:
+            raise ValueError(f"Unknown symbol library sharding policy: {policy}")
+        self.base_folder = Path(base_folder)
+        self.lib_name = lib_name
+        self.kicad_version = kicad_version
+        self.policy = policy
+        self.shard_size = max(1, shard_size)
+        self.lock = threading.Lock()
+        self.used_paths: List[Path] = []  # 本批量用到的分片，按首次使用的顺序
+        self.symbol_paths: Dict[str, Path] = {}  # count策略：符号名 -> 所在分片
+        self.shard_counts: List[int] = []  # count策略：每个分片已写入的符号数
+        self.shard_reserved: List[int] = []  # count策略：每个分片预留、尚未确认的位置数
+        self.reserved: Dict[str, int] = {}  # count策略：预留了位置的符号名 -> 分片序号（从0开始）
+        if policy == "count":
+            self.load_count_shards()
+
+    @property
+    def enabled(self) -> bool:
+        return self.policy != "none"
+
+    def get_shard_path(self, shard_name: Optional[str] = None) -> Path:
+        """分片名对应的符号库路径，None为不分片的库 / Library path of a shard name, None for the unsharded library"""
+        lib_name = self.lib_name if shard_name is None else f"{self.lib_name}_{shard_name}"
+        return self.base_folder / f"{lib_name}.{get_symbol_lib_extension(self.kicad_version)}"
+
+    def get_count_shard_path(self, shard_number: int) -> Path:
+        return self.get_shard_path(f"{shard_number:03d}")
+
+    def load_count_shards(self) -> None:
+        """读取已有的 <库名>_001、<库名>_002… 中的符号名 / Read the symbol names of the existing <lib>_001, <lib>_002…"""
+        while True:
+            shard_path = self.get_count_shard_path(len(self.shard_counts) + 1)
+            if not shard_path.exists():
+                break
+            if self.kicad_version == KicadVersion.v5:
+                symbol_names = list(SymbolLibrary(shard_path, self.kicad_version).index)
+            else:
+                symbol_names = list(SymbolLibIndex.load(shard_path).symbols)
+            for symbol_name in symbol_names:
+                self.symbol_paths.setdefault(symbol_name, shard_path)
+            self.shard_counts.append(len(symbol_names))
+            self.shard_reserved.append(0)
+
+    def get_free_shard_index(self) -> int:
+        """第一个未满的分片的序号，全部已满时新建一个分片，调用时必须持有锁 / Index of the first shard that isn't full, a new shard when all are full, must be called with the lock held"""
+        for shard_index, (count, reserved) in enumerate(zip(self.shard_counts, self.shard_reserved)):
+            if count + reserved < self.shard_size:
+                return shard_index
+        self.shard_counts.append(0)
+        self.shard_reserved.append(0)
+        return len(self.shard_counts) - 1
+
+    def get_lib_path(self, symbol_name: Optional[str], prefix: Optional[str] = None) -> Path:
+        """
+        获取符号应写入的符号库路径
+        Get the path of the library a symbol should be written to
+
+        参数:
+        Args:
+            symbol_name (str): 渲染后的符号名 / Rendered symbol name
+            prefix (str): 符号的位号前缀 / Reference prefix of the symbol
+
+        返回:
+        Returns:
+            Path: 符号库文件路径 / Symbol library file path
+        """
+        with self.lock:
+            if self.policy == "prefix":
+                lib_path = self.get_shard_path(get_prefix_shard_key(prefix))
+            elif self.policy == "count":
+                lib_path = self.symbol_paths.get(symbol_name) if symbol_name is not None else None
+                if lib_path is None:
+                    shard_index = self.get_free_shard_index()
+                    lib_path = self.get_count_shard_path(shard_index + 1)
+                    # 没有名字的符号不会被写入，不预留位置
+                    # A symbol without a name is never written, no slot is reserved for it
+                    if symbol_name is not None:
+                        self.shard_reserved[shard_index] += 1
+                        self.reserved[symbol_name] = shard_index
+                        self.symbol_paths[symbol_name] = lib_path
+            else:
+                lib_path = self.get_shard_path()
+            if lib_path not in self.used_paths:
+                self.used_paths.append(lib_path)
+            return lib_path
+
+    def record_stored(self, stored_names: Iterable[Optional[str]], dropped_names: Iterable[Optional[str]]) -> None:
+        """
+        写入线程的回调：已存入符号库的符号计入分片，没有写入的符号释放预留的位置
+        Callback of the writer thread: symbols stored in the library count toward their
+        shard, symbols that weren't written release their reserved slot
+
+        参数:
+        Args:
+            stored_names (Iterable[str]): 已在符号库中的符号名 / Names of the symbols now in the library
+            dropped_names (Iterable[str]): 没有写入的符号名 / Names of the symbols that weren't written
+        """
+        if self.policy != "count":
+            return
+        with self.lock:
+            for symbol_name in stored_names:
+                shard_index = self.reserved.pop(symbol_name, None)
+                if shard_index is not None:
+                    self.shard_reserved[shard_index] -= 1
+                    self.shard_counts[shard_index] += 1
+            for symbol_name in dropped_names:
+                shard_index = self.reserved.pop(symbol_name, None)
+                if shard_index is not None:
+                    self.shard_reserved[shard_index] -= 1
+                    del self.symbol_paths[symbol_name]
+
+    def register(self) -> List[str]:
+        """
+        把本批量用到的分片登记到导出目录的 sym-lib-table
+        Register the shards used by this batch in the sym-lib-table of the export folder
+
+        返回:
+        Returns:
+            List[str]: 新登记的库名 / Names of the newly registered libraries
+        """
+        if not self.enabled:
+            return []
+        with self.lock:
+            lib_paths = [lib_path for lib_path in self.used_paths if lib_path.exists()]
+        return register_symbol_libs(self.base_folder / SYM_LIB_TABLE_NAME, lib_paths, self.kicad_version)
+
+
+def register_symbol_libs(
+    table_path: Path, lib_paths: Iterable[Path], kicad_version: KicadVersion
+) -> List[str]:
+    """
+    在sym-lib-table中登记符号库，保留已有条目，只在有新条目时原子地写回
+    Register symbol libraries in a sym-lib-table, existing entries are kept and the
+    table is only written back atomically when there are new entries
+
+    参数:
+    Args:
+        table_path (Path): sym-lib-table 文件路径 / sym-lib-table file path
+        lib_paths (Iterable[Path]): 符号库文件路径 / Symbol library file paths
+        kicad_version (KicadVersion): KiCad版本枚举 / KiCad version enum
+
+    返回:
+    Returns:
+        List[str]: 新登记的库名 / Names of the newly registered libraries
+    """
+    try:
+        table = table_path.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        table = "(sym_lib_table\n)\n"
+    registered = set(SYM_LIB_TABLE_NAME_REGEX.findall(table))
+
+    lib_type = "Legacy" if kicad_version == KicadVersion.v5 else "KiCad"
+    added = []
+    entries = []
+    for lib_path in lib_paths:
+        lib_name = lib_path.stem
+        if lib_name in registered or lib_name in added:
+            continue
+        uri = Path(lib_path).absolute().as_posix()
+        entries.append(f'  (lib (name "{lib_name}")(type "{lib_type}")(uri "{uri}")(options "")(descr ""))\n')
+        added.append(lib_name)
+    if not entries:
+        return []
+
+    table_end = table.rfind(")")
+    if table_end < 0:
+        raise ValueError(f"Invalid sym-lib-table: {table_path}")
+    head = table[:table_end]
+    if not head.endswith("\n"):
+        head += "\n"
+    write_file_atomic(table_path, (head + "".join(entries) + table[table_end:]).encode("utf-8"))
+    return added
@@ -3,9 +3,15 @@
 包含所有符号库操作相关函数
 """
 import logging
+import queue
 import re
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
 
 from ..kicad.parameters_kicad_symbol import KicadVersion
+from .file_utils import WriteStats, write_file_atomic, write_text_atomic
+from .symbol_lib_index import SymbolLibIndex, compute_symbol_hash
 
 
 def add_component_in_symbol_lib_file(
@@ -75,8 +81,7 @@ def add_component_in_symbol_lib_file(
         
         new_lib_data = '\n'.join(result_lines) + '\n'
 
-        with open(file=lib_path, mode="w", encoding="utf-8") as lib_file:
-            lib_file.write(new_lib_data)
+        write_text_atomic(lib_path, new_lib_data)
 
 
 def update_component_in_symbol_lib_file(
@@ -84,11 +89,22 @@ def update_component_in_symbol_lib_file(
     component_name: str,
     component_content: str,
     kicad_version: KicadVersion,
-) -> None:
+) -> bool:
     """
     更新符号库中已存在的组件
     Update existing component in symbol library
+
+    v6符号库通过字节偏移索引定位符号，新内容直接拼接到原位置，不再对全文做正则替换。
+    v6 libraries locate the symbol through the byte offset index and splice the new
+    content in place instead of running a regex substitution over the whole text.
+
+    返回:
+    Returns:
+        bool: 是否找到并替换了组件 / Whether the component was found and replaced
     """
+    if kicad_version != KicadVersion.v5:
+        return splice_symbol(Path(lib_path), component_name, component_content)
+
     with open(file=lib_path, encoding="utf-8") as lib_file:
         current_lib = lib_file.read()
         new_lib = re.sub(
@@ -100,8 +116,26 @@ def update_component_in_symbol_lib_file(
             flags=re.DOTALL,
         )
 
-    with open(file=lib_path, mode="w", encoding="utf-8") as lib_file:
-        lib_file.write(new_lib)
+    write_text_atomic(lib_path, new_lib)
+    return new_lib != current_lib
+
+
+def splice_symbol(lib_path: Path, component_name: str, component_content: str) -> bool:
+    """把新的符号内容拼接到索引中记录的字节范围 / Splice new symbol content into the byte range recorded in the index"""
+    index = SymbolLibIndex.load(lib_path)
+    symbol_range = index.get_range(component_name)
+    if symbol_range is None:
+        return False
+    start, end = symbol_range
+    content = "\n".join(line for line in str(component_content).split("\n") if line.strip()).encode("utf-8")
+    if compute_symbol_hash(content) == index.get_hash(component_name):
+        return False
+    with open(lib_path, "rb") as lib_file:
+        lib_data = lib_file.read()
+    write_file_atomic(lib_path, lib_data[:start] + content + lib_data[end:])
+    index.replace_range(component_name, content)
+    index.save(lib_path)
+    return True
 
 
 def id_already_in_symbol_lib(
@@ -110,7 +144,17 @@ def id_already_in_symbol_lib(
     """
     检查符号库中是否已存在指定名称的组件
     Check if component exists in symbol library
+
+    v6符号库查询缓存的字节偏移索引，文件未改变时不需要读取符号库。
+    v6 libraries look the name up in the cached byte offset index, the library isn't
+    read at all while the file is unchanged.
     """
+    if kicad_version != KicadVersion.v5:
+        if component_name in SymbolLibIndex.load(lib_path):
+            logging.warning(f"This id is already in {lib_path}")
+            return True
+        return False
+
     with open(lib_path, encoding="utf-8") as lib_file:
         current_lib = lib_file.read()
         component = re.findall(
@@ -129,9 +173,427 @@ def id_already_in_symbol_lib(
 sym_lib_regex_pattern = {
     "v5": r"(#\n# {component_name}\n#\n.*?ENDDEF\n)",
     "v6": r'\n  \(symbol "{component_name}".*?\n  \)',
-    "v6_99": r"",
+    "v6_99": r'\n  \(symbol "{component_name}".*?\n  \)',
 }
 
 def sanitize_for_regex(field: str):
     """字符串转义用于正则表达式匹配"""
-    return re.escape(field)
\ No newline at end of file
+    return re.escape(field)
+
+
+# 新建符号库文件的头部 / Header of newly created symbol library files
+SYMBOL_LIB_HEADER = {
+    "v5": "EESchema-LIBRARY Version 2.4\n#encoding utf-8\n",
+    "v6": """(kicad_symbol_lib
+  (version 20211014)
+  (generator https://github.com/tangsangsimida/EasyKiConverter)""",
+}
+
+# 默认每添加或更新这么多个符号写回一次磁盘，中断的批量导出最多丢失一个检查点的符号
+# By default the library is written back every that many added or updated symbols,
+# an interrupted batch loses at most one checkpoint worth of symbols
+SYMBOL_LIB_CHECKPOINT_INTERVAL = 500
+
+# 写入线程每次最多从队列取出这么多个符号一起添加
+# The writer thread takes at most that many symbols off its queue per batch
+SYMBOL_WRITER_BATCH_SIZE = 64
+
+SYMBOL_NAME_REGEX = re.compile(r'\(symbol\s+"((?:[^"\\]|\\.)*)"')
+V5_SYMBOL_REGEX = re.compile(r"#\n# (.*?)\n#\n.*?ENDDEF\n", re.DOTALL)
+GENERATOR_VERSION_REGEX = re.compile(r'\n[ \t]*\(generator_version\s+"[^"]*"\)')
+
+
+def get_symbol_name(component_content: str, kicad_version: KicadVersion) -> Optional[str]:
+    """
+    读取渲染好的符号文本中的符号名
+    Read the symbol name from rendered symbol text
+
+    参数:
+    Args:
+        component_content (str): 组件内容字符串 / Component content string
+        kicad_version (KicadVersion): KiCad版本枚举 / KiCad version enum
+
+    返回:
+    Returns:
+        str: 符号名，无法识别时为None / Symbol name, None when it can't be recognized
+    """
+    if kicad_version == KicadVersion.v5:
+        match = V5_SYMBOL_REGEX.search(component_content)
+    else:
+        match = SYMBOL_NAME_REGEX.search(component_content)
+    return match.group(1) if match else None
+
+
+class SymbolLibrary:
+    """
+    内存中的符号库，加载一次后在内存中添加或更新符号，批量结束时原子地写回一次
+    In-memory symbol library, loaded once, symbols are added or updated in memory and
+    the file is written back atomically once at the end of the batch
+
+    所有方法都是线程安全的；add_symbol 和 update_symbol 达到检查点间隔时自动写回。
+    All methods are thread safe. add_symbol and update_symbol write the library back
+    when the checkpoint interval is reached.
+    """
+
+    def __init__(
+        self,
+        lib_path: str,
+        kicad_version: KicadVersion,
+        checkpoint_interval: int = SYMBOL_LIB_CHECKPOINT_INTERVAL,
+        write_stats: Optional[WriteStats] = None,
+    ) -> None:
+        self.lib_path = Path(lib_path)
+        self.write_stats = write_stats
+        self.kicad_version = kicad_version
+        self.checkpoint_interval = checkpoint_interval
+        self.lock = threading.Lock()
+        self.header = ""
+        self.footer = ""
+        self.elements: List[Tuple[Optional[str], str]] = []
+        self.index: Dict[str, int] = {}  # 符号名 -> elements中的位置
+        self.hashes: Dict[int, str] = {}  # elements中的位置 -> 元素内容的SHA-256，按需计算
+        self.pending_changes = 0
+        self.dirty = False
+        self.load()
+
+    @property
+    def version_key(self) -> str:
+        return "v5" if self.kicad_version == KicadVersion.v5 else "v6"
+
+    def load(self) -> None:
+        """读取符号库文件并建立符号名索引，文件不存在时新建 / Read the library file and index the symbol names, a new library when the file doesn't exist"""
+        try:
+            with open(self.lib_path, "rb") as lib_file:
+                lib_data = lib_file.read()
+        except FileNotFoundError:
+            self.header = SYMBOL_LIB_HEADER[self.version_key]
+            self.footer = ""
+            self.elements = []
+            self.hashes = {}
+            self.dirty = True
+        else:
+            self.hashes = {}
+            if self.kicad_version == KicadVersion.v5:
+                self.header, self.elements, self.footer = self.split_v5(lib_data.decode("utf-8"))
+            else:
+                header, self.elements, self.hashes = self.split_v6(lib_data)
+                header = header.replace(
+                    "(generator kicad_symbol_editor)",
+                    '(generator "https://github.com/tangsangsimida/EasyKiConverter")',
+                )
+                self.header = GENERATOR_VERSION_REGEX.sub("", header)
+            self.dirty = False
+        self.index = {
+            name: position for position, (name, _) in enumerate(self.elements) if name is not None
+        }
+
+    def split_v6(self, lib_data: bytes) -> Tuple[str, List[Tuple[Optional[str], str]], Dict[int, str]]:
+        """
+        按缓存的字节偏移索引把v6符号库拆分为头部和顶层元素，索引中的内容哈希一并取出
+        Split a v6 library into its header and top level elements by the cached byte
+        offset index, taking over the content hashes of the index
+        """
+        lib_index = SymbolLibIndex.load(self.lib_path)
+        elements = []
+        hashes = {}
+        for position, (name, start, end, glued, content_hash) in enumerate(lib_index.elements):
+            element = lib_data[start:end].decode("utf-8")
+            if glued:
+                # 接在其它内容后面的元素使用符号渲染器的缩进，内容改变后哈希需要重新计算
+                # Elements following other content get the indentation of the symbol
+                # renderer, their hash has to be computed again for the changed content
+                element = "    " + element
+            else:
+                hashes[position] = content_hash
+            elements.append((name, element))
+        return lib_data[:lib_index.header_end].decode("utf-8").rstrip(), elements, hashes
+
+    @staticmethod
+    def split_v5(lib_data: str) -> Tuple[str, List[Tuple[Optional[str], str]], str]:
+        matches = list(V5_SYMBOL_REGEX.finditer(lib_data))
+        if not matches:
+            return lib_data, [], ""
+        header = lib_data[:matches[0].start()]
+        elements = [(match.group(1), match.group()) for match in matches]
+        return header, elements, lib_data[matches[-1].end():]
+
+    def format_element(self, component_content: str) -> str:
+        if self.kicad_version == KicadVersion.v5:
+            return str(component_content)
+        # 移除组件内容中的空行 / Drop the empty lines of the component content
+        return "\n".join(line for line in str(component_content).split("\n") if line.strip())
+
+    def has_symbol(self, component_name: str) -> bool:
+        """
+        检查符号库中是否已存在指定名称的符号
+        Check whether the library contains a symbol of the given name
+
+        参数:
+        Args:
+            component_name (str): 符号库中的符号名 / Symbol name in the library
+        """
+        with self.lock:
+            return component_name in self.index
+
+    def add_symbol(self, component_content: str) -> bool:
+        """
+        添加新符号，符号名已存在时不做改动
+        Add a new symbol, nothing changes when the symbol name already exists
+
+        参数:
+        Args:
+            component_content (str): 渲染好的符号文本 / Rendered symbol text
+
+        返回:
+        Returns:
+            bool: 是否添加 / Whether the symbol was added
+        """
+        name = get_symbol_name(component_content, self.kicad_version)
+        with self.lock:
+            if name is None or name in self.index:
+                return False
+            self.index[name] = len(self.elements)
+            self.elements.append((name, self.format_element(component_content)))
+            self.mark_changed()
+        return True
+
+    def add_symbols(self, component_contents: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        批量添加符号，整批只获取一次锁；同一批中的同名符号只保留第一个
+        Add a batch of symbols taking the lock once, of symbols sharing a name within
+        the batch only the first one is kept
+
+        返回:
+        Returns:
+            Tuple[List[str], List[str]]: (添加的符号名, 已存在而跳过的符号名) / (added names, names skipped as already present)
+        """
+        added = []
+        skipped = []
+        with self.lock:
+            for component_content in component_contents:
+                name = get_symbol_name(component_content, self.kicad_version)
+                if name is None or name in self.index:
+                    skipped.append(name)
+                    continue
+                self.index[name] = len(self.elements)
+                self.elements.append((name, self.format_element(component_content)))
+                added.append(name)
+                self.mark_changed()
+        return added, skipped
+
+    def get_element_hash(self, position: int) -> str:
+        """获取元素内容的SHA-256，调用时必须持有锁 / Get the SHA-256 of an element, must be called with the lock held"""
+        content_hash = self.hashes.get(position)
+        if content_hash is None:
+            content_hash = self.hashes[position] = compute_symbol_hash(self.elements[position][1])
+        return content_hash
+
+    def update_symbols(self, component_contents: List[str]) -> Tuple[List[str], List[str], List[str]]:
+        """
+        批量更新符号：内容哈希与库中符号相同时不做改动，改变的符号原位替换，不存在的符号添加到末尾
+        Update a batch of symbols: symbols whose content hash matches the library are left
+        alone, changed symbols are replaced in place and missing ones are appended
+
+        所有改动只在内存中进行，写回时整个符号库只写一次。
+        All changes happen in memory, the whole library is written once when flushing.
+
+        返回:
+        Returns:
+            Tuple[List[str], List[str], List[str]]: (添加的符号名, 更新的符号名, 未改变的符号名) / (added, updated, unchanged names)
+        """
+        added = []
+        updated = []
+        unchanged = []
+        with self.lock:
+            for component_content in component_contents:
+                name = get_symbol_name(component_content, self.kicad_version)
+                if name is None:
+                    continue
+                element = self.format_element(component_content)
+                content_hash = compute_symbol_hash(element)
+                position = self.index.get(name)
+                if position is None:
+                    position = self.index[name] = len(self.elements)
+                    self.elements.append((name, element))
+                    added.append(name)
+                elif self.get_element_hash(position) == content_hash:
+                    unchanged.append(name)
+                    continue
+                else:
+                    self.elements[position] = (name, element)
+                    updated.append(name)
+                self.hashes[position] = content_hash
+                self.mark_changed()
+        return added, updated, unchanged
+
+    def update_symbol(self, component_content: str) -> bool:
+        """
+        替换同名的符号，不存在时添加
+        Replace the symbol of the same name, it's added when missing
+
+        返回:
+        Returns:
+            bool: 内容是否改变 / Whether the content changed
+        """
+        added, updated, _ = self.update_symbols([component_content])
+        return bool(added or updated)
+
+    def mark_changed(self) -> None:
+        """调用时必须持有锁 / Must be called with the lock held"""
+        self.dirty = True
+        self.pending_changes += 1
+        if self.checkpoint_interval and self.pending_changes >= self.checkpoint_interval:
+            self.write_locked()
+
+    def render(self) -> Tuple[bytes, Optional[SymbolLibIndex]]:
+        """
+        生成符号库文件内容，v6符号库同时生成对应的字节偏移索引
+        Render the library file content, for v6 libraries together with its byte offset index
+        """
+        if self.kicad_version == KicadVersion.v5:
+            lib_data = self.header + "".join(element for _, element in self.elements) + self.footer
+            return lib_data.encode("utf-8"), None
+
+        parts = [self.header.encode("utf-8")]
+        offset = len(parts[0])
+        index_elements = []
+        for position, (name, element) in enumerate(self.elements):
+            part = ("\n" + element).encode("utf-8")
+            index_elements.append(
+                (name, offset + 1, offset + len(part), False, self.get_element_hash(position))
+            )
+            parts.append(part)
+            offset += len(part)
+        parts.append(b"\n)\n")
+        lib_end = offset + 1
+        header_end = index_elements[0][1] if index_elements else lib_end
+        return b"".join(parts), SymbolLibIndex(header_end, lib_end, index_elements)
+
+    def flush(self) -> None:
+        """
+        有改动时原子地写回符号库文件
+        Atomically write the library file back when it changed
+        """
+        with self.lock:
+            self.write_locked()
+
+    def write_locked(self) -> None:
+        if not self.dirty:
+            return
+        # 符号渲染器统一使用LF换行，写入时不做平台换行转换，索引的字节偏移与文件一致
+        # The symbol renderer uses LF line endings, writing without newline translation
+        # keeps the byte offsets of the index in line with the file
+        lib_data, lib_index = self.render()
+        write_result = write_file_atomic(self.lib_path, lib_data)
+        if self.write_stats is not None:
+            self.write_stats.add(write_result)
+        if lib_index is not None:
+            lib_index.save(self.lib_path)
+        self.dirty = False
+        self.pending_changes = 0
+
+
+class SymbolLibraryWriter:
+    """
+    符号库的单一写入线程
+    Single writer thread of a symbol library
+
+    转换线程只把渲染好的符号文本放入队列，不会等待符号库的锁或文件I/O；
+    写入线程按批取出符号、按符号名去重后添加到 SymbolLibrary，检查点写回也在写入线程中进行。
+    Conversion threads only put rendered symbol text on the queue and never wait for
+    the library lock or file I/O. The writer thread takes symbols off in batches,
+    de-duplicates them by name and adds them to the SymbolLibrary, checkpoint writes
+    happen on the writer thread as well.
+    """
+
+    STOP = object()
+
+    def __init__(
+        self,
+        library: SymbolLibrary,
+        batch_size: int = SYMBOL_WRITER_BATCH_SIZE,
+        update: bool = False,
+        on_stored: Optional[Callable[[List[str], List[str]], None]] = None,
+    ) -> None:
+        self.library = library
+        self.batch_size = batch_size
+        # 更新模式下内容改变的已有符号被替换，否则跳过
+        # In update mode existing symbols whose content changed are replaced, otherwise they're skipped
+        self.update = update
+        # 每批之后在写入线程中调用 on_stored(已在符号库中的符号名, 没有写入的符号名)
+        # After every batch on_stored(names now in the library, names not written) is called on the writer thread
+        self.on_stored = on_stored
+        self.queue = queue.Queue()
+        self.added: List[str] = []
+        self.updated: List[str] = []
+        self.skipped: List[str] = []
+        self.error: Optional[BaseException] = None
+        self.thread = threading.Thread(
+            target=self.run, name=f"symbol-writer-{library.lib_path.name}", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, component_content: str) -> None:
+        """把渲染好的符号放入写入队列，立即返回 / Queue rendered symbol text, returns at once"""
+        self.queue.put(component_content)
+
+    def run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if self.STOP in batch:
+                stopping = True
+                batch = [item for item in batch if item is not self.STOP]
+            if not batch:
+                continue
+            if self.error is not None:
+                self.report_stored([], batch)
+                continue
+            try:
+                if self.update:
+                    added, updated, skipped = self.library.update_symbols(batch)
+                    self.updated += updated
+                else:
+                    added, skipped = self.library.add_symbols(batch)
+                    updated = []
+                self.added += added
+                self.skipped += skipped
+            except Exception as e:
+                # 只保留第一个错误，继续清空队列，close 时抛出
+                # Only the first error is kept, the queue keeps draining, close raises it
+                logging.error(f"Failed to write symbols to {self.library.lib_path}: {e}")
+                self.error = e
+                self.report_stored([], batch)
+                continue
+            # 跳过的符号（已存在或内容未改变）同样在符号库中，没有名字的符号不会写入
+            # Skipped symbols (present already or unchanged) are in the library too, symbols without a name are never written
+            self.report_stored(added + updated + [name for name in skipped if name is not None], [])
+
+    def report_stored(self, stored_names: List[str], dropped_contents: List[str]) -> None:
+        """
+        调用 on_stored，没有写入的符号先从符号文本取出符号名
+        Call on_stored, the names of the symbols that weren't written are read from their text first
+        """
+        if self.on_stored is None:
+            return
+        dropped_names = [get_symbol_name(content, self.library.kicad_version) for content in dropped_contents]
+        try:
+            self.on_stored(stored_names, dropped_names)
+        except Exception as e:
+            logging.error(f"Symbol writer callback failed for {self.library.lib_path}: {e}")
+
+    def close(self) -> None:
+        """
+        等待队列中的符号全部添加并写回符号库，写入失败时抛出异常
+        Wait until every queued symbol is added and write the library back, raises when writing failed
+        """
+        self.queue.put(self.STOP)
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+        self.library.flush()
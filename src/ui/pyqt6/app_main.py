@@ -5,6 +5,7 @@ EasyKiConverter PyQt6 UI - 主程序入口
 """
 import sys
 import os
+import multiprocessing
 
 import traceback
 from PyQt6.QtWidgets import QApplication, QMessageBox, QListWidgetItem, QFileDialog
@@ -478,4 +479,6 @@ def main():
         return 1
 
 if __name__ == "__main__":
+    # 打包后的程序需要此调用，转换进程池才能正常启动
+    multiprocessing.freeze_support()
     sys.exit(main())
\ No newline at end of file
@@ -50,6 +50,22 @@ class ConfigManager:
             "network_timeout": 30,  # 网络请求超时时间（秒）
             "max_retries": 3,  # 网络请求最大重试次数
             "retry_delay": 1,  # 重试延迟时间（秒）
+            "parse_cache": True,  # 是否缓存元件解析结果
+            "cache_dir": "",  # 缓存目录（为空时使用系统默认缓存目录）
+            "conversion_backend": "auto",  # 转换后端：auto / process / thread
+            "conversion_workers": 0,  # 转换进程数（0表示CPU核心数）
+            "model3d_mesh_optimization": False,  # 是否优化3D模型网格（焊接顶点、删除退化面、共享顶点表）
+            "model3d_weld_tolerance": 0.0001,  # 顶点焊接容差（WRL单位，0.1英寸）
+            "model3d_max_triangles": 0,  # 3D模型简化的三角形预算（0表示不简化）
+            "model3d_decimation_tolerance": 0.0,  # 3D模型简化的最大误差（WRL单位，0表示不按误差简化）
+            "model3d_compressed_wrl": False,  # 是否输出gzip压缩的VRML（.wrz）
+            "model3d_manifest": True,  # 是否用3D模型清单跳过已是最新的模型
+            "model3d_obj_cache": True,  # 是否在本地缓存下载的OBJ文件
+            "model3d_workers": 4,  # 3D模型下载和转换阶段的线程数
+            "footprint_manifest": True,  # 是否用封装清单跳过已是最新的封装
+            "symbol_update_mode": False,  # 是否更新符号库中内容已改变的符号（否则跳过已存在的符号）
+            "symbol_lib_sharding": "none",  # 符号库分片策略：none / prefix（按位号前缀）/ count（按符号数）
+            "symbol_lib_shard_size": 500,  # count策略下每个分片符号库的最大符号数
         }
         
     def load_config(self) -> Dict[str, Any]:
@@ -385,6 +401,166 @@ class ConfigManager:
             return self.save_config(self.config)
         return False
         
+    def is_parse_cache_enabled(self) -> bool:
+        """是否启用解析结果缓存"""
+        return self.config.get("parse_cache", True)
+        
+    def set_parse_cache_enabled(self, enabled: bool) -> bool:
+        """设置是否启用解析结果缓存"""
+        self.config["parse_cache"] = enabled
+        return self.save_config(self.config)
+        
+    def get_cache_dir(self) -> str:
+        """获取缓存目录"""
+        return self.config.get("cache_dir", "")
+        
+    def set_cache_dir(self, path: str) -> bool:
+        """设置缓存目录"""
+        self.config["cache_dir"] = path
+        return self.save_config(self.config)
+        
+    def get_conversion_backend(self) -> str:
+        """获取转换后端（auto / process / thread）"""
+        return self.config.get("conversion_backend", "auto")
+        
+    def set_conversion_backend(self, backend: str) -> bool:
+        """设置转换后端"""
+        if backend in ("auto", "process", "thread"):
+            self.config["conversion_backend"] = backend
+            return self.save_config(self.config)
+        return False
+        
+    def get_conversion_workers(self) -> int:
+        """获取转换进程数（0表示CPU核心数）"""
+        return self.config.get("conversion_workers", 0)
+        
+    def set_conversion_workers(self, workers: int) -> bool:
+        """设置转换进程数"""
+        if workers >= 0:
+            self.config["conversion_workers"] = workers
+            return self.save_config(self.config)
+        return False
+        
+    def is_mesh_optimization_enabled(self) -> bool:
+        """是否优化3D模型网格"""
+        return self.config.get("model3d_mesh_optimization", False)
+        
+    def set_mesh_optimization_enabled(self, enabled: bool) -> bool:
+        """设置是否优化3D模型网格"""
+        self.config["model3d_mesh_optimization"] = enabled
+        return self.save_config(self.config)
+        
+    def get_weld_tolerance(self) -> float:
+        """获取顶点焊接容差"""
+        return self.config.get("model3d_weld_tolerance", 0.0001)
+        
+    def set_weld_tolerance(self, tolerance: float) -> bool:
+        """设置顶点焊接容差"""
+        if tolerance >= 0:
+            self.config["model3d_weld_tolerance"] = tolerance
+            return self.save_config(self.config)
+        return False
+        
+    def get_max_triangles(self) -> int:
+        """获取3D模型简化的三角形预算（0表示不简化）"""
+        return self.config.get("model3d_max_triangles", 0)
+        
+    def set_max_triangles(self, max_triangles: int) -> bool:
+        """设置3D模型简化的三角形预算"""
+        if max_triangles >= 0:
+            self.config["model3d_max_triangles"] = max_triangles
+            return self.save_config(self.config)
+        return False
+        
+    def get_decimation_tolerance(self) -> float:
+        """获取3D模型简化的最大误差（0表示不按误差简化）"""
+        return self.config.get("model3d_decimation_tolerance", 0.0)
+        
+    def set_decimation_tolerance(self, tolerance: float) -> bool:
+        """设置3D模型简化的最大误差"""
+        if tolerance >= 0:
+            self.config["model3d_decimation_tolerance"] = tolerance
+            return self.save_config(self.config)
+        return False
+        
+    def is_compressed_wrl_enabled(self) -> bool:
+        """是否输出gzip压缩的VRML（.wrz）"""
+        return self.config.get("model3d_compressed_wrl", False)
+        
+    def set_compressed_wrl_enabled(self, enabled: bool) -> bool:
+        """设置是否输出gzip压缩的VRML（.wrz）"""
+        self.config["model3d_compressed_wrl"] = enabled
+        return self.save_config(self.config)
+        
+    def is_model_manifest_enabled(self) -> bool:
+        """是否用3D模型清单跳过已是最新的模型"""
+        return self.config.get("model3d_manifest", True)
+        
+    def set_model_manifest_enabled(self, enabled: bool) -> bool:
+        """设置是否用3D模型清单跳过已是最新的模型"""
+        self.config["model3d_manifest"] = enabled
+        return self.save_config(self.config)
+        
+    def is_obj_cache_enabled(self) -> bool:
+        """是否在本地缓存下载的OBJ文件"""
+        return self.config.get("model3d_obj_cache", True)
+        
+    def set_obj_cache_enabled(self, enabled: bool) -> bool:
+        """设置是否在本地缓存下载的OBJ文件"""
+        self.config["model3d_obj_cache"] = enabled
+        return self.save_config(self.config)
+        
+    def is_footprint_manifest_enabled(self) -> bool:
+        """是否用封装清单跳过已是最新的封装"""
+        return self.config.get("footprint_manifest", True)
+        
+    def set_footprint_manifest_enabled(self, enabled: bool) -> bool:
+        """设置是否用封装清单跳过已是最新的封装"""
+        self.config["footprint_manifest"] = enabled
+        return self.save_config(self.config)
+        
+    def get_model3d_workers(self) -> int:
+        """获取3D模型下载和转换阶段的线程数"""
+        return self.config.get("model3d_workers", 4)
+        
+    def set_model3d_workers(self, workers: int) -> bool:
+        """设置3D模型下载和转换阶段的线程数"""
+        if workers >= 1:
+            self.config["model3d_workers"] = workers
+            return self.save_config(self.config)
+        return False
+        
+    def is_symbol_update_enabled(self) -> bool:
+        """是否更新符号库中内容已改变的符号"""
+        return self.config.get("symbol_update_mode", False)
+        
+    def set_symbol_update_enabled(self, enabled: bool) -> bool:
+        """设置是否更新符号库中内容已改变的符号"""
+        self.config["symbol_update_mode"] = enabled
+        return self.save_config(self.config)
+        
+    def get_symbol_lib_sharding(self) -> str:
+        """获取符号库分片策略（none / prefix / count）"""
+        return self.config.get("symbol_lib_sharding", "none")
+        
+    def set_symbol_lib_sharding(self, policy: str) -> bool:
+        """设置符号库分片策略"""
+        if policy in ("none", "prefix", "count"):
+            self.config["symbol_lib_sharding"] = policy
+            return self.save_config(self.config)
+        return False
+        
+    def get_symbol_lib_shard_size(self) -> int:
+        """获取count策略下每个分片符号库的最大符号数"""
+        return self.config.get("symbol_lib_shard_size", 500)
+        
+    def set_symbol_lib_shard_size(self, shard_size: int) -> bool:
+        """设置count策略下每个分片符号库的最大符号数"""
+        if shard_size >= 1:
+            self.config["symbol_lib_shard_size"] = shard_size
+            return self.save_config(self.config)
+        return False
+        
     def reset_to_defaults(self) -> bool:
         """重置为默认配置"""
         self.config = self.default_config.copy()
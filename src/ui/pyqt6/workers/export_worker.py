@@ -5,11 +5,13 @@
 
 import sys
 import os
+import copy
+import dataclasses
 import time
 import logging
 from pathlib import Path
-from typing import List, Dict, Any
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Union
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import threading
 
 from PyQt6.QtCore import QThread, pyqtSignal
@@ -25,12 +27,30 @@ EasyedaApi = None
 Easyeda3dModelImporter = None
 EasyedaFootprintImporter = None
 EasyedaSymbolImporter = None
+EasyedaShapeParseError = None
+ParseCache = None
+ObjCache = None
+compute_payload_hash = None
+FOOTPRINT_PAYLOAD_KEYS = None
 Exporter3dModelKicad = None
-ExporterFootprintKicad = None
-ExporterSymbolKicad = None
+ConversionExecutor = None
+render_footprint = None
+render_symbol = None
+write_wrl_model = None
+get_wrl_extension = None
+MeshOptions = None
+WRL_LAYOUT_PER_SHAPE = None
+WRL_LAYOUT_PLAIN = None
+ModelManifest = None
+FOOTPRINT_MANIFEST_FILE_NAME = None
+compute_options_hash = None
 KicadVersion = None
-add_component_in_symbol_lib_file = None
-id_already_in_symbol_lib = None
+SymbolLibrary = None
+SymbolLibraryWriter = None
+SymbolLibSharding = None
+WriteStats = None
+write_text_atomic = None
+get_symbol_name = None
 JLCDatasheet = None
 ConfigManager = None
 
@@ -40,13 +60,23 @@ try:
     from src.core.easyeda.easyeda_importer import (
         Easyeda3dModelImporter,
         EasyedaFootprintImporter,
+        EasyedaShapeParseError,
         EasyedaSymbolImporter,
     )
-    from src.core.kicad.export_kicad_3d_model import Exporter3dModelKicad
-    from src.core.kicad.export_kicad_footprint import ExporterFootprintKicad
-    from src.core.kicad.export_kicad_symbol import ExporterSymbolKicad
+    from src.core.easyeda.obj_cache import ObjCache
+    from src.core.easyeda.parse_cache import FOOTPRINT_PAYLOAD_KEYS, ParseCache, compute_payload_hash
+    from src.core.kicad.conversion_backend import ConversionExecutor, render_footprint, render_symbol
+    from src.core.kicad.export_kicad_3d_model import (
+        Exporter3dModelKicad,
+        get_wrl_extension,
+        write_wrl_model,
+    )
+    from src.core.kicad.mesh_processing import WRL_LAYOUT_PER_SHAPE, WRL_LAYOUT_PLAIN, MeshOptions
+    from src.core.kicad.model_manifest import FOOTPRINT_MANIFEST_FILE_NAME, ModelManifest, compute_options_hash
     from src.core.kicad.parameters_kicad_symbol import KicadVersion
-    from src.core.utils.symbol_lib_utils import add_component_in_symbol_lib_file, id_already_in_symbol_lib
+    from src.core.utils.file_utils import WriteStats, write_text_atomic
+    from src.core.utils.symbol_lib_sharding import SymbolLibSharding
+    from src.core.utils.symbol_lib_utils import SymbolLibrary, SymbolLibraryWriter, get_symbol_name
     
     # 导入数据手册下载模块
     from src.core.easyeda.jlc_datasheet import JLCDatasheet
@@ -76,6 +106,11 @@ class ExportWorker(QThread):
     component_completed = pyqtSignal(dict)  # 元件转换结果
     export_finished = pyqtSignal(int, int)  # 总数, 成功数
     error_occurred = pyqtSignal(str)  # 错误信息
+    # 3D流水线阶段的进度，参数为LCSC ID
+    model3d_queued = pyqtSignal(str)  # 3D模型进入3D线程池队列
+    model3d_downloading = pyqtSignal(str)  # 开始下载OBJ/STEP
+    model3d_converting = pyqtSignal(str)  # 开始转换并写入WRL/STEP
+    model3d_written = pyqtSignal(str)  # 3D模型文件已写入（或已是最新）
     
     def __init__(self, component_ids: List[str], options: Dict[str, bool], 
                  export_path: str = "", file_prefix: str = "", parent=None):
@@ -92,9 +127,22 @@ class ExportWorker(QThread):
         
         # 多线程配置
         self.max_workers = min(len(component_ids), 16)  # 最大并发线程数
+        # CPU密集转换阶段的执行器，run()中会按配置和元件数量重新创建
+        self.conversion_executor = ConversionExecutor() if ConversionExecutor is not None else None
+        # 3D模型下载和转换阶段的线程池，run()中创建
+        self.model_3d_executor = None
         self.file_lock = threading.Lock()  # 文件操作锁
-        self.symbol_lib_locks = {}  # 符号库文件锁字典
-        self.symbol_lib_locks_lock = threading.Lock()  # 符号库锁字典的锁
+        # 所有输出文件都先写入临时文件，内容未改变时不改写，统计写入和跳过的字节数
+        self.write_stats = WriteStats() if WriteStats is not None else None
+        # 符号库在内存中维护，每个文件只加载一次，由该库唯一的写入线程添加符号，批量结束时写回
+        self.symbol_lib_writers = {}  # 符号库文件路径 -> SymbolLibraryWriter
+        self.symbol_lib_writers_lock = threading.Lock()
+        # 符号库分片：按策略把符号分配到 <库名>_<分片>，批量结束时登记到 sym-lib-table
+        self.symbol_lib_shardings = {}  # (导出目录, 库名) -> SymbolLibSharding
+        
+        # 解析结果缓存：解析是确定性的，每个元件的每种数据只解析一次
+        self.parsed_components = {}  # (LCSC ID, 数据类型) -> 解析结果或解析异常
+        self.parsed_components_lock = threading.Lock()
         
         # 网络配置
         if ConfigManager is not None:
@@ -102,12 +150,81 @@ class ExportWorker(QThread):
             self.network_timeout = self.config_manager.get_network_timeout()
             self.max_retries = self.config_manager.get_max_retries()
             self.retry_delay = self.config_manager.get_retry_delay()
+            parse_cache_enabled = self.config_manager.is_parse_cache_enabled()
+            cache_dir = self.config_manager.get_cache_dir()
+            self.conversion_backend = self.config_manager.get_conversion_backend()
+            self.conversion_workers = self.config_manager.get_conversion_workers()
+            mesh_optimization_enabled = self.config_manager.is_mesh_optimization_enabled()
+            weld_tolerance = self.config_manager.get_weld_tolerance()
+            max_triangles = self.config_manager.get_max_triangles()
+            decimation_tolerance = self.config_manager.get_decimation_tolerance()
+            self.compress_wrl = self.config_manager.is_compressed_wrl_enabled()
+            self.model_manifest_enabled = self.config_manager.is_model_manifest_enabled()
+            self.model_3d_workers = self.config_manager.get_model3d_workers()
+            self.footprint_manifest_enabled = self.config_manager.is_footprint_manifest_enabled()
+            obj_cache_enabled = self.config_manager.is_obj_cache_enabled()
+            self.symbol_update_mode = self.config_manager.is_symbol_update_enabled()
+            self.symbol_lib_sharding = self.config_manager.get_symbol_lib_sharding()
+            self.symbol_lib_shard_size = self.config_manager.get_symbol_lib_shard_size()
         else:
             # 使用默认配置
             self.config_manager = None
             self.network_timeout = 30
             self.max_retries = 3
             self.retry_delay = 1
+            parse_cache_enabled = True
+            cache_dir = ""
+            self.conversion_backend = "auto"
+            self.conversion_workers = 0
+            mesh_optimization_enabled = False
+            weld_tolerance = 0.0001
+            max_triangles = 0
+            decimation_tolerance = 0.0
+            self.compress_wrl = False
+            self.model_manifest_enabled = True
+            self.model_3d_workers = 4
+            self.footprint_manifest_enabled = True
+            obj_cache_enabled = True
+            self.symbol_update_mode = False
+            self.symbol_lib_sharding = "none"
+            self.symbol_lib_shard_size = 500
+        
+        # 3D模型网格优化选项，为None时按原样转换；简化依赖网格优化，设置简化时自动启用
+        self.mesh_options = None
+        if MeshOptions is not None:
+            mesh_options = MeshOptions(
+                weld_tolerance=weld_tolerance,
+                max_triangles=max_triangles,
+                decimation_tolerance=decimation_tolerance,
+            )
+            if mesh_optimization_enabled or mesh_options.decimation_enabled:
+                self.mesh_options = mesh_options
+        
+        # 3D模型清单：<lib>.3dshapes 中已是最新的模型跳过下载和转换，
+        # 输出格式或网格选项改变时选项哈希随之改变，模型会重新导出
+        self.model_manifests = {}  # 3D模型目录 -> ModelManifest
+        self.model_manifests_lock = threading.Lock()
+        self.model_3d_options_hash = None
+        if compute_options_hash is not None:
+            self.model_3d_options_hash = compute_options_hash({
+                'wrl_extension': get_wrl_extension(self.compress_wrl),
+                'mesh_options': dataclasses.asdict(self.mesh_options) if self.mesh_options is not None else None,
+            })
+        
+        # 封装去重：很多元件共用同一个封装，每个封装文件在本批量中只生成和写入一次，
+        # 同一文件的其它元件等待该文件的锁后直接复用；<lib>.pretty 中的封装清单让跨批量的
+        # 增量导出也跳过已是最新的封装
+        self.exported_footprints = {}  # 封装文件路径 -> 封装数据哈希
+        self.footprint_locks = {}  # 封装文件路径 -> 锁
+        self.footprint_locks_lock = threading.Lock()
+        self.footprint_manifests = {}  # 封装目录 -> ModelManifest
+        
+        # 持久化解析缓存：以元件数据哈希为键，热启动时跳过解析
+        self.parse_cache = ParseCache(cache_dir) if parse_cache_enabled and ParseCache is not None else None
+        self.payload_hashes = {}  # LCSC ID -> 元件数据哈希
+        
+        # OBJ下载缓存：命中时内存映射缓存文件，转换器直接解析映射的字节
+        self.obj_cache = ObjCache(cache_dir) if obj_cache_enabled and ObjCache is not None else None
         
         # 日志配置
         self.logger = logging.getLogger(__name__)
@@ -122,12 +239,112 @@ class ExportWorker(QThread):
         self.logger.info(f"导出路径: {export_path}")
         self.logger.info(f"文件前缀: {file_prefix}")
         
-    def get_symbol_lib_lock(self, symbol_lib_path: str) -> threading.Lock:
-        """获取符号库文件的专用锁"""
-        with self.symbol_lib_locks_lock:
-            if symbol_lib_path not in self.symbol_lib_locks:
-                self.symbol_lib_locks[symbol_lib_path] = threading.Lock()
-            return self.symbol_lib_locks[symbol_lib_path]
+    def get_symbol_lib_writer(
+        self, symbol_lib_path: Path, kicad_version: "KicadVersion", on_stored=None
+    ) -> "SymbolLibraryWriter":
+        """获取符号库文件的写入线程，每个文件只加载一次；on_stored 在每批写入后由写入线程调用"""
+        with self.symbol_lib_writers_lock:
+            if symbol_lib_path not in self.symbol_lib_writers:
+                symbol_library = SymbolLibrary(symbol_lib_path, kicad_version, write_stats=self.write_stats)
+                # 更新模式下已有符号的内容哈希改变时原位替换，整个库仍然只在批量结束时写一次
+                self.symbol_lib_writers[symbol_lib_path] = SymbolLibraryWriter(
+                    symbol_library, update=self.symbol_update_mode, on_stored=on_stored
+                )
+                if not symbol_lib_path.exists():
+                    self.logger.info(f"创建符号库文件: {symbol_lib_path}")
+            return self.symbol_lib_writers[symbol_lib_path]
+    
+    def get_symbol_lib_sharding(self, base_folder: Path, lib_name: str, kicad_version: "KicadVersion") -> "SymbolLibSharding":
+        """获取导出库的符号库分片，count策略只在第一次使用时读取已有分片"""
+        with self.symbol_lib_writers_lock:
+            key = (base_folder, lib_name)
+            if key not in self.symbol_lib_shardings:
+                self.symbol_lib_shardings[key] = SymbolLibSharding(
+                    base_folder, lib_name, kicad_version,
+                    policy=self.symbol_lib_sharding,
+                    shard_size=self.symbol_lib_shard_size
+                )
+            return self.symbol_lib_shardings[key]
+    
+    def get_model_manifest(self, model_dir: Path) -> "ModelManifest":
+        """获取3D模型目录的清单，每个目录只加载一次"""
+        with self.model_manifests_lock:
+            if model_dir not in self.model_manifests:
+                self.model_manifests[model_dir] = ModelManifest(model_dir)
+            return self.model_manifests[model_dir]
+    
+    def get_footprint_manifest(self, footprint_dir: Path) -> "ModelManifest":
+        """获取封装目录的清单，每个目录只加载一次"""
+        with self.model_manifests_lock:
+            if footprint_dir not in self.footprint_manifests:
+                self.footprint_manifests[footprint_dir] = ModelManifest(
+                    footprint_dir, FOOTPRINT_MANIFEST_FILE_NAME
+                )
+            return self.footprint_manifests[footprint_dir]
+    
+    def get_footprint_lock(self, footprint_filename: Path) -> threading.Lock:
+        """获取封装文件的锁，同一文件同一时间只有一个线程生成和写入"""
+        with self.footprint_locks_lock:
+            return self.footprint_locks.setdefault(footprint_filename, threading.Lock())
+    
+    def parse_component_data(self, kind: str, component_data: dict):
+        """解析元件数据（符号、封装或3D模型信息）"""
+        if kind == 'symbol':
+            return EasyedaSymbolImporter(easyeda_cp_cad_data=component_data).get_symbol()
+        if kind == 'footprint':
+            return EasyedaFootprintImporter(easyeda_cp_cad_data=component_data).get_footprint()
+        if kind == 'model3d':
+            return Easyeda3dModelImporter(
+                easyeda_cp_cad_data=component_data,
+                download_raw_3d_model=False
+            ).output
+        raise ValueError(f"未知的数据类型: {kind}")
+    
+    def load_or_parse_component(self, lcsc_id: str, kind: str, component_data: dict):
+        """从持久化缓存读取解析结果，未命中时解析并写入缓存"""
+        payload_hash = None
+        if self.parse_cache is not None:
+            with self.parsed_components_lock:
+                payload_hash = self.payload_hashes.get(lcsc_id)
+            if payload_hash is None:
+                payload_hash = compute_payload_hash(component_data)
+                with self.parsed_components_lock:
+                    self.payload_hashes[lcsc_id] = payload_hash
+            
+            hit, parsed = self.parse_cache.load(payload_hash, kind)
+            if hit:
+                self.logger.info(f"解析缓存命中: {lcsc_id} ({kind})")
+                return parsed
+        
+        try:
+            parsed = self.parse_component_data(kind, component_data)
+        except EasyedaShapeParseError as e:
+            return e
+        
+        if self.parse_cache is not None:
+            self.parse_cache.store(payload_hash, kind, parsed)
+        return parsed
+    
+    def get_parsed_component(self, lcsc_id: str, kind: str, component_data: dict):
+        """
+        获取元件的解析结果（带缓存）
+        
+        解析失败同样会被缓存并立即抛出，不会进入网络重试流程。
+        返回的是缓存对象的副本，因为导出器会就地转换单位。
+        """
+        key = (lcsc_id, kind)
+        with self.parsed_components_lock:
+            is_cached = key in self.parsed_components
+            cached = self.parsed_components.get(key)
+        
+        if not is_cached:
+            cached = self.load_or_parse_component(lcsc_id, kind, component_data)
+            with self.parsed_components_lock:
+                cached = self.parsed_components.setdefault(key, cached)
+        
+        if isinstance(cached, EasyedaShapeParseError):
+            raise cached
+        return copy.deepcopy(cached)
     
     def update_progress(self, component_input: str):
         """更新进度"""
@@ -182,60 +399,101 @@ class ExportWorker(QThread):
             total_components = len(self.component_ids)
             success_count = 0
             
-            self.logger.info(f"开始处理 {total_components} 个元器件，使用 {self.max_workers} 个线程")
             start_time = time.time()
             
             # 设置总组件数和重置完成计数
             self.total_components = total_components
             self.completed_count = 0
             
-            # 根据元件数量决定是否使用多线程
-            if total_components == 1:
-                # 单个元件直接处理，避免线程开销
-                self.current_position = 1
-                self.current_component = self.component_ids[0]
-                result = self.process_single_component(self.component_ids[0], 1, total_components)
-                if result['success']:
-                    success_count += 1
-                self.component_completed.emit(result)
-            else:
-                # 多个元件使用线程池并行处理，线程数根据元件数量动态分配，最多16个线程
-                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-                    # 提交所有任务
-                    future_to_component = {
-                        executor.submit(self.process_single_component, component_input, idx + 1, total_components): 
-                        (component_input, idx + 1) 
-                        for idx, component_input in enumerate(self.component_ids)
-                    }
+            # CPU密集的转换阶段（符号、封装、WRL）交给转换执行器，进程池后端可以利用多核
+            self.conversion_executor = ConversionExecutor.for_batch(
+                backend=self.conversion_backend,
+                component_count=total_components,
+                max_workers=self.conversion_workers
+            )
+            if self.conversion_executor.backend == "process":
+                # 每个线程同一时间只等待一个转换任务，线程数不少于进程数才能让所有核心忙碌
+                self.max_workers = min(
+                    total_components,
+                    max(self.max_workers, self.conversion_executor.max_workers)
+                )
+            self.logger.info(
+                f"开始处理 {total_components} 个元器件，使用 {self.max_workers} 个线程，"
+                f"转换后端: {self.conversion_executor.backend}"
+            )
+            
+            # 3D模型的下载和转换在独立的有界线程池中进行：元件线程处理完符号和封装后
+            # 立即继续下一个元件，整个BOM的符号和封装先完成，3D模型在后台跟上
+            self.model_3d_executor = ThreadPoolExecutor(
+                max_workers=max(1, min(self.model_3d_workers, total_components)),
+                thread_name_prefix="model3d"
+            )
+            pending_results = {}  # 等待3D阶段的元件结果Future -> 元件输入
+            
+            try:
+                # 根据元件数量决定是否使用多线程
+                if total_components == 1:
+                    # 单个元件直接处理，避免线程开销
+                    self.current_position = 1
+                    self.current_component = self.component_ids[0]
+                    result = self.process_single_component(self.component_ids[0], 1, total_components)
+                    if isinstance(result, Future):
+                        pending_results[result] = self.component_ids[0]
+                    elif self.report_component_result(result):
+                        success_count += 1
+                else:
+                    # 多个元件使用线程池并行处理，线程数根据元件数量动态分配，最多16个线程（进程池后端时不少于转换进程数）
+                    with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                        # 提交所有任务
+                        future_to_component = {
+                            executor.submit(self.process_single_component, component_input, idx + 1, total_components): 
+                            (component_input, idx + 1) 
+                            for idx, component_input in enumerate(self.component_ids)
+                        }
                     
-                    # 收集结果
-                    for future in as_completed(future_to_component):
-                        component_input, position = future_to_component[future]
+                        # 收集结果
+                        for future in as_completed(future_to_component):
+                            component_input, position = future_to_component[future]
                         
-                        # 更新当前处理的组件信息
-                        self.current_position = position
-                        self.current_component = component_input
+                            # 更新当前处理的组件信息
+                            self.current_position = position
+                            self.current_component = component_input
                         
-                        if self.isInterruptionRequested():
-                            break
+                            if self.isInterruptionRequested():
+                                break
                             
-                        try:
-                            result = future.result()
-                            if result['success']:
-                                success_count += 1
-                            self.component_completed.emit(result)
+                            try:
+                                result = future.result()
+                            except Exception as e:
+                                result = self.get_error_result(component_input, e)
                             
-                        except Exception as e:
-                            error_result = {
-                                'componentId': component_input,
-                                'success': False,
-                                'error': str(e),
-                                'files': [],
-                                'message': f'处理失败: {str(e)}',
-                                'exportPath': None
-                            }
-                            self.component_completed.emit(error_result)
-                            self.logger.error(f"处理元件 {component_input} 失败: {str(e)}")
+                            # 需要3D模型的元件在3D阶段完成后才有最终结果
+                            if isinstance(result, Future):
+                                pending_results[result] = component_input
+                            elif self.report_component_result(result):
+                                success_count += 1
+                
+                # 符号和封装已经全部完成，等待3D阶段跟上
+                for future in as_completed(pending_results):
+                    if self.isInterruptionRequested():
+                        break
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        result = self.get_error_result(pending_results[future], e)
+                    if self.report_component_result(result):
+                        success_count += 1
+            
+            finally:
+                self.model_3d_executor.shutdown(cancel_futures=True)
+                self.conversion_executor.shutdown()
+                for model_manifest in self.model_manifests.values():
+                    model_manifest.save()
+                for footprint_manifest in self.footprint_manifests.values():
+                    footprint_manifest.save()
+                self.close_symbol_lib_writers()
+                self.register_symbol_lib_shards()
+                self.log_write_stats()
             
             end_time = time.time()
             processing_time = end_time - start_time
@@ -249,8 +507,68 @@ class ExportWorker(QThread):
             self.logger.error(error_msg, exc_info=True)
             self.error_occurred.emit(error_msg)
     
-    def process_single_component(self, component_input: str, current: int, total: int) -> Dict[str, Any]:
-        """处理单个元件"""
+    def close_symbol_lib_writers(self) -> None:
+        """等待所有符号库写入线程完成并写回磁盘，单个库写入失败不影响其它库"""
+        for symbol_lib_path, symbol_lib_writer in self.symbol_lib_writers.items():
+            try:
+                symbol_lib_writer.close()
+            except Exception as e:
+                error_msg = f"写入符号库文件失败 {symbol_lib_path}: {e}"
+                self.logger.error(error_msg)
+                self.error_occurred.emit(error_msg)
+                continue
+            if symbol_lib_writer.update:
+                self.logger.info(
+                    f"符号库 {symbol_lib_path.name}: 添加 {len(symbol_lib_writer.added)} 个符号，"
+                    f"更新 {len(symbol_lib_writer.updated)} 个已改变的符号，"
+                    f"{len(symbol_lib_writer.skipped)} 个符号未改变"
+                )
+            else:
+                self.logger.info(
+                    f"符号库 {symbol_lib_path.name}: 添加 {len(symbol_lib_writer.added)} 个符号，"
+                    f"跳过 {len(symbol_lib_writer.skipped)} 个已存在的符号"
+                )
+    
+    def log_write_stats(self) -> None:
+        """记录本批量写入和因内容未改变而跳过的文件"""
+        stats = self.write_stats
+        self.logger.info(
+            f"文件写入: 写入 {stats.written_files} 个文件 ({stats.written_bytes / 1024:.1f} KB)，"
+            f"跳过 {stats.skipped_files} 个内容未改变的文件 ({stats.skipped_bytes / 1024:.1f} KB)"
+        )
+    
+    def register_symbol_lib_shards(self) -> None:
+        """把本批量用到的分片符号库登记到导出目录的 sym-lib-table"""
+        for symbol_lib_sharding in self.symbol_lib_shardings.values():
+            try:
+                registered = symbol_lib_sharding.register()
+            except Exception as e:
+                error_msg = f"登记分片符号库失败 {symbol_lib_sharding.base_folder}: {e}"
+                self.logger.error(error_msg)
+                self.error_occurred.emit(error_msg)
+                continue
+            if registered:
+                self.logger.info(f"已在 sym-lib-table 中登记符号库: {', '.join(registered)}")
+    
+    def report_component_result(self, result: Dict[str, Any]) -> bool:
+        """发送元件的最终结果，返回是否计入成功数（部分成功也计入）"""
+        self.component_completed.emit(result)
+        return bool(result['success'])
+    
+    def get_error_result(self, component_input: str, error: Exception) -> Dict[str, Any]:
+        """生成元件任务异常时的结果"""
+        self.logger.error(f"处理元件 {component_input} 失败: {str(error)}")
+        return {
+            'componentId': component_input,
+            'success': False,
+            'error': str(error),
+            'files': [],
+            'message': f'处理失败: {str(error)}',
+            'exportPath': None
+        }
+    
+    def process_single_component(self, component_input: str, current: int, total: int) -> Union[Dict[str, Any], Future]:
+        """处理单个元件，需要导出3D模型时返回3D阶段中得到最终结果的Future"""
         # 设置当前组件信息
         self.current_position = current
         self.current_component = component_input
@@ -288,7 +606,202 @@ class ExportWorker(QThread):
             self.logger.error(f"处理元件 {component_input} 时发生异常: {str(e)}", exc_info=True)
             return error_result
     
-    def export_component_real(self, lcsc_id: str, export_path: str, export_options: Dict[str, bool], file_prefix: str = None) -> Dict[str, Any]:
+    def export_model_3d(self, lcsc_id: str, model_3d, model_dir: Path, model_3d_lib_path: str,
+                        export_status: Dict[str, Dict], files_created: List[str]) -> None:
+        """3D流水线阶段：下载（已是最新的模型跳过）、转换并写入3D模型，结果写入 export_status"""
+        self.logger.info(f"开始处理3D模型: {lcsc_id}")
+        try:
+            model_name = getattr(model_3d, 'name', f"{lcsc_id}_3dmodel")
+            # Sanitize model name for file system compatibility
+            import re
+            sanitized_model_name = re.sub(r'[<>:"/\|?*]', '_', model_name)
+            
+            # 清单中记录的模型文件仍是最新时，跳过下载和转换
+            model_manifest = None
+            if self.model_manifest_enabled and ModelManifest is not None:
+                model_manifest = self.get_model_manifest(model_dir)
+                up_to_date_files = model_manifest.get_up_to_date_files(
+                    sanitized_model_name, model_3d.uuid, self.model_3d_options_hash
+                )
+                if up_to_date_files:
+                    self.logger.info(f"3D模型已是最新，跳过下载和转换: {sanitized_model_name}")
+                    files_created.extend(str(model_file.absolute()) for model_file in up_to_date_files)
+                    model_3d.name = sanitized_model_name
+                    export_status['model3d']['success'] = True
+                    export_status['model3d']['message'] = "3D模型已是最新"
+                    self.model3d_written.emit(lcsc_id)
+                    return
+            
+            self.model3d_downloading.emit(lcsc_id)
+            Easyeda3dModelImporter.download_model_data(
+                model_3d=model_3d,
+                max_retries=self.max_retries,
+                retry_delay=self.retry_delay,
+                obj_cache=self.obj_cache
+            )
+            
+            self.logger.info(f"成功获取3D模型数据")
+            self.logger.info(f"3D模型详细信息:")
+            self.logger.info(f"   - 模型名称: {model_3d.name}")
+            self.logger.info(f"   - 模型UUID: {model_3d.uuid}")
+            self.logger.info(f"   - OBJ数据: {'✓ 有' if model_3d.raw_obj else '✗ 无'} {f'({len(model_3d.raw_obj)} 字节)' if model_3d.raw_obj else ''}")
+            self.logger.info(f"   - STEP数据: {'✓ 有' if model_3d.step else '✗ 无'} {f'({len(model_3d.step)} 字节)' if model_3d.step else ''}")
+            self.logger.info(f"   - 位置偏移 (translation): x={model_3d.translation.x:.2f}, y={model_3d.translation.y:.2f}, z={model_3d.translation.z:.2f}")
+            self.logger.info(f"   - 旋转角度 (rotation): x={model_3d.rotation.x:.2f}°, y={model_3d.rotation.y:.2f}°, z={model_3d.rotation.z:.2f}°")
+            
+            # OBJ到WRL的转换在转换执行器中进行并直接流式写入文件，
+            # STEP数据不参与转换，不随任务传递
+            self.model3d_converting.emit(lcsc_id)
+            model_3d_exporter = Exporter3dModelKicad(model_3d=model_3d, compress=self.compress_wrl)
+            if model_3d.raw_obj:
+                mesh_stats = self.conversion_executor.run(
+                    write_wrl_model,
+                    dataclasses.replace(model_3d, step=None),
+                    model_3d_exporter.get_model_path(model_3d_lib_path, model_3d_exporter.wrl_extension),
+                    mesh_options=self.mesh_options,
+                    compress=self.compress_wrl
+                )
+                self.write_stats.add(mesh_stats.write_result)
+                if self.mesh_options is not None:
+                    self.logger.info(
+                        f"   - 网格优化: 顶点 {mesh_stats.vertices_before} → {mesh_stats.vertices_after}, "
+                        f"面 {mesh_stats.faces_before} → {mesh_stats.faces_after}, "
+                        f"WRL {mesh_stats.wrl_size_before / 1024:.1f} KB → {mesh_stats.wrl_size_after / 1024:.1f} KB "
+                        f"(减少 {mesh_stats.size_reduction:.1%})"
+                    )
+                    if mesh_stats.wrl_layout == WRL_LAYOUT_PER_SHAPE:
+                        self.logger.info("   - 共享顶点表不能减小文件，每个材质使用单独的顶点表")
+                    elif mesh_stats.wrl_layout == WRL_LAYOUT_PLAIN:
+                        self.logger.info("   - 网格优化不能减小文件，保留未优化的输出")
+                    if mesh_stats.decimation_cell_size:
+                        self.logger.info(
+                            f"   - 网格简化: 删除 {mesh_stats.decimated_faces} 个三角形, "
+                            f"聚类网格大小 {mesh_stats.decimation_cell_size:.4f}"
+                        )
+            else:
+                self.write_stats.add(model_3d_exporter.export_wrl(lib_path=model_3d_lib_path))
+            self.write_stats.add(model_3d_exporter.export_step(lib_path=model_3d_lib_path))
+            
+            # 查找导出的3D模型文件
+            model_files = []
+            for ext in ['.step', f'.{model_3d_exporter.wrl_extension}']:
+                model_file = model_dir / f"{sanitized_model_name}{ext}"
+                if model_file.exists():
+                    model_files.append(model_file)
+                    files_created.append(str(model_file.absolute()))
+                    self.logger.info(f"保存3D模型: {model_file}")
+                else:
+                    self.logger.warning(f"3D模型文件未找到: {model_file}")
+            
+            # OBJ和STEP都下载成功时才记入清单，下载失败的模型下次导出时会重试
+            if model_manifest is not None and model_3d.raw_obj and model_3d.step:
+                model_manifest.record(
+                    sanitized_model_name, model_3d.uuid, self.model_3d_options_hash, model_files
+                )
+            
+            # Update the model name in the 3D model object to match the sanitized name
+            # This ensures consistency between the exported file name and the reference in footprint
+            model_3d.name = sanitized_model_name
+            
+            export_status['model3d']['success'] = True
+            export_status['model3d']['message'] = "3D模型导出成功"
+            self.model3d_written.emit(lcsc_id)
+        except Exception as e:
+            error_msg = f"3D模型导出失败 {lcsc_id}: {e}"
+            self.logger.error(error_msg, exc_info=True)
+            export_status['model3d']['success'] = False
+            export_status['model3d']['message'] = error_msg
+    
+    def finish_component_with_model_3d(self, lcsc_id: str, model_3d, model_dir: Path, model_3d_lib_path: str,
+                                       export_options: Dict[str, bool], export_status: Dict[str, Dict],
+                                       files_created: List[str], base_folder: Path) -> Dict[str, Any]:
+        """在3D线程池中导出元件的3D模型，然后生成元件的最终结果"""
+        self.export_model_3d(lcsc_id, model_3d, model_dir, model_3d_lib_path, export_status, files_created)
+        self.update_completed_progress(f"{lcsc_id}")
+        return self.build_component_result(lcsc_id, export_options, export_status, files_created, base_folder)
+    
+    def build_component_result(self, lcsc_id: str, export_options: Dict[str, bool], export_status: Dict[str, Dict],
+                               files_created: List[str], base_folder: Path) -> Dict[str, Any]:
+        """打印转换总结，并根据导出状态确定元件的整体结果"""
+        # 根据导出状态确定整体结果
+        selected_options = [k for k, v in export_options.items() if v]
+        successful_options = [k for k, v in export_status.items() if v['success']]
+        failed_options = [k for k, v in export_status.items() if not v['success'] and export_options.get(k, False)]
+        
+        # 打印转换总结
+        self.logger.info("=" * 80)
+        self.logger.info(f"转换总结 - {lcsc_id}")
+        self.logger.info("=" * 80)
+        self.logger.info(f"成功的选项 ({len(successful_options)}/{len(selected_options)}):")
+        option_names = {'symbol': '符号', 'footprint': '封装', 'model3d': '3D模型', 'datasheet': '数据手册'}
+        for opt in successful_options:
+            self.logger.info(f"   ✓ {option_names.get(opt, opt)}")
+        
+        if failed_options:
+            self.logger.info(f"失败的选项 ({len(failed_options)}/{len(selected_options)}):")
+            for opt in failed_options:
+                self.logger.info(f"   ✗ {option_names.get(opt, opt)}: {export_status[opt]['message']}")
+        
+        self.logger.info(f"生成的文件 ({len(files_created)} 个):")
+        for file_path in files_created:
+            self.logger.info(f"   - {Path(file_path).name}")
+        
+        self.logger.info(f"导出路径: {base_folder.absolute()}")
+        self.logger.info("=" * 80)
+        
+        # 如果没有选择任何导出选项，视为成功
+        if not selected_options:
+            return {
+                "success": True,
+                "componentId": lcsc_id,
+                "message": f"元件 {lcsc_id} 转换成功（未选择任何导出选项）",
+                "files": files_created,
+                "export_path": str(base_folder.absolute()),
+                "export_status": export_status
+            }
+        
+        # 如果所有选择的选项都成功，视为完全成功
+        if len(successful_options) == len(selected_options):
+            return {
+                "success": True,
+                "componentId": lcsc_id,
+                "message": f"元件 {lcsc_id} 转换成功",
+                "files": files_created,
+                "export_path": str(base_folder.absolute()),
+                "export_status": export_status
+            }
+        
+        # 如果没有任何选项成功，视为完全失败
+        if len(successful_options) == 0:
+            error_messages = [export_status[opt]['message'] for opt in selected_options if export_status[opt]['message']]
+            error_msg = "; ".join(error_messages) if error_messages else "所有选择的导出选项都失败了"
+            return {
+                "success": False,
+                "componentId": lcsc_id,
+                "message": error_msg,
+                "files": files_created,
+                "export_path": str(base_folder.absolute()),
+                "export_status": export_status
+            }
+        
+        # 如果部分选项成功，视为部分成功
+        success_msg = f"部分成功: {', '.join(successful_options)} 导出成功"
+        if failed_options:
+            failed_msg = f"{', '.join(failed_options)} 导出失败"
+            message = f"{success_msg}; {failed_msg}"
+        else:
+            message = success_msg
+        
+        return {
+            "success": "partial",  # 使用特殊值表示部分成功
+            "componentId": lcsc_id,
+            "message": message,
+            "files": files_created,
+            "export_path": str(base_folder.absolute()),
+            "export_status": export_status
+        }
+    
+    def export_component_real(self, lcsc_id: str, export_path: str, export_options: Dict[str, bool], file_prefix: str = None) -> Union[Dict[str, Any], Future]:
         """使用EasyKiConverter工具链导出元器件 - 线程安全版本"""
         # 保存lcsc_id以便在错误处理中使用
         self.current_lcsc_id = lcsc_id
@@ -383,26 +896,8 @@ class ExportWorker(QThread):
                 model_dir.mkdir(exist_ok=True)
                 self.logger.info(f"创建封装和3D模型目录")
             
-            # 符号库文件路径
-            lib_extension = "kicad_sym" if kicad_version == KicadVersion.v6 else "lib"
-            symbol_lib_path = base_folder / f"{lib_name}.{lib_extension}"
-            
-            # 线程安全的符号库文件创建
-            symbol_lib_lock = self.get_symbol_lib_lock(str(symbol_lib_path))
-            with symbol_lib_lock:
-                if not symbol_lib_path.exists():
-                    with open(symbol_lib_path, "w+", encoding="utf-8") as my_lib:
-                        if kicad_version == KicadVersion.v6:
-                            my_lib.write(
-                                """(kicad_symbol_lib
-  (version 20211014)
-  (generator https://github.com/tangsangsimida/EasyKiConverter)
-  (generator_version \"6.0.0\")
-)"""
-                            )
-                        else:
-                            my_lib.write("EESchema-LIBRARY Version 2.4\n#encoding utf-8\n")
-                    self.logger.info(f"创建符号库文件: {symbol_lib_path}")
+            # 符号库分片，不分片时所有符号写入 <库名>.kicad_sym
+            symbol_lib_sharding = self.get_symbol_lib_sharding(base_folder, lib_name, kicad_version)
             
             # 跟踪每个导出选项的状态
             export_status = {
@@ -412,76 +907,20 @@ class ExportWorker(QThread):
                 'datasheet': {'success': False, 'message': ''}
             }
             
-            # First, process 3D models if enabled (needed for footprint 3D references)
-            model_3d = None
+            # 3D模型的下载和转换交给独立的3D流水线阶段，本线程继续处理符号和封装；
+            # 封装中的3D模型引用只依赖模型名称，不需要等待3D模型写入
+            model_3d_job = None
             if export_options.get('model3d', True) and component_data:
-                self.logger.info(f"开始处理3D模型...")
-                # 不在重试过程中更新进度，只在最终完成或失败时更新
                 try:
-                    # 尝试多次获取3D模型数据，以应对网络问题
-                    model_3d_importer = None
-                    success = False
-                    for attempt in range(self.max_retries + 1):  # 使用配置的重试次数
-                        if attempt > 0:
-                            self.logger.info(f"第 {attempt + 1} 次尝试获取3D模型数据...")
-                        
-                        model_3d_importer = Easyeda3dModelImporter(
-                            easyeda_cp_cad_data=component_data, 
-                            download_raw_3d_model=True
-                        )
-                        model_3d = model_3d_importer.output  # Use the output property directly
-                        
-                        if model_3d:
-                            success = True
-                            if attempt > 0:  # 如果不是第一次就成功，记录重试成功
-                                self.logger.info(f"第 {attempt + 1} 次尝试成功！")
-                            break  # 成功获取到3D模型，跳出循环
-                        else:
-                            self.logger.warning(f"第 {attempt + 1} 次尝试失败")
-                            if attempt < self.max_retries:  # 不是最后一次尝试，等待后重试
-                                # 使用配置的重试延迟时间
-                                wait_time = self.retry_delay * (2 ** attempt)  # 指数退避
-                                self.logger.info(f"等待 {wait_time:.1f} 秒后重试...")
-                                time.sleep(wait_time)
-                    
-                    if not success:
-                        error_msg = f"最终失败 - 未找到3D模型数据"
+                    # 3D模型信息只解析一次，只有OBJ/STEP下载会按配置重试
+                    model_3d = self.get_parsed_component(lcsc_id, 'model3d', component_data)
+                    if not model_3d:
+                        error_msg = f"未找到3D模型数据"
                         self.logger.warning(error_msg)
                         export_status['model3d']['success'] = False
                         export_status['model3d']['message'] = error_msg
-                    elif model_3d:
-                        self.logger.info(f"成功获取3D模型数据")
-                        self.logger.info(f"3D模型详细信息:")
-                        self.logger.info(f"   - 模型名称: {model_3d.name}")
-                        self.logger.info(f"   - 模型UUID: {model_3d.uuid}")
-                        self.logger.info(f"   - OBJ数据: {'✓ 有' if model_3d.raw_obj else '✗ 无'} {f'({len(model_3d.raw_obj)} 字节)' if model_3d.raw_obj else ''}")
-                        self.logger.info(f"   - STEP数据: {'✓ 有' if model_3d.step else '✗ 无'} {f'({len(model_3d.step)} 字节)' if model_3d.step else ''}")
-                        self.logger.info(f"   - 位置偏移 (translation): x={model_3d.translation.x:.2f}, y={model_3d.translation.y:.2f}, z={model_3d.translation.z:.2f}")
-                        self.logger.info(f"   - 旋转角度 (rotation): x={model_3d.rotation.x:.2f}°, y={model_3d.rotation.y:.2f}°, z={model_3d.rotation.z:.2f}°")
-                        
-                        model_3d_exporter = Exporter3dModelKicad(model_3d=model_3d)
-                        model_3d_exporter.export(lib_path=str(base_folder / lib_name))
-                        
-                        # 查找导出的3D模型文件
-                        model_name = getattr(model_3d, 'name', f"{lcsc_id}_3dmodel")
-                        # Sanitize model name for file system compatibility
-                        import re
-                        sanitized_model_name = re.sub(r'[<>:"/\|?*]', '_', model_name)
-                        for ext in ['.step', '.wrl']:
-                            model_file = model_dir / f"{sanitized_model_name}{ext}"
-                            if model_file.exists():
-                                files_created.append(str(model_file.absolute()))
-                                self.logger.info(f"保存3D模型: {model_file}")
-                            else:
-                                self.logger.warning(f"3D模型文件未找到: {model_file}")
-                        
-                        # Update the model name in the 3D model object to match the sanitized name
-                        # This ensures consistency between the exported file name and the reference in footprint
-                        if model_3d:
-                            model_3d.name = sanitized_model_name
-                        
-                        export_status['model3d']['success'] = True
-                        export_status['model3d']['message'] = "3D模型导出成功"
+                    else:
+                        model_3d_job = (model_3d, model_dir, str(base_folder / lib_name))
                 except Exception as e:
                     error_msg = f"3D模型导出失败 {lcsc_id}: {e}"
                     self.logger.error(error_msg, exc_info=True)
@@ -496,29 +935,17 @@ class ExportWorker(QThread):
             # 导出符号
             if export_options.get('symbol', True) and component_data:
                 self.logger.info(f"转换符号: {lcsc_id}")
-                # 不在重试过程中更新进度，只在最终完成或失败时更新
-                # 尝试多次获取符号数据，以应对网络问题
-                symbol_data = None
-                success = False
-                for attempt in range(self.max_retries + 1):  # 使用配置的重试次数
-                    symbol_importer = EasyedaSymbolImporter(easyeda_cp_cad_data=component_data)
-                    symbol_data = symbol_importer.get_symbol()
-                    
-                    if symbol_data:
-                        success = True
-                        if attempt > 0:  # 如果不是第一次就成功，记录重试成功
-                            self.logger.info(f"第{attempt + 1}次尝试成功获取符号数据: {lcsc_id}")
-                        break  # 成功获取到符号数据，跳出循环
-                    else:
-                        self.logger.warning(f"第{attempt + 1}次尝试获取符号数据失败: {lcsc_id}")
-                        if attempt < self.max_retries:  # 不是最后一次尝试，等待后重试
-                            # 使用配置的重试延迟时间
-                            wait_time = self.retry_delay * (2 ** attempt)  # 指数退避
-                            time.sleep(wait_time)
+                # 解析是确定性的，失败时立即报告出错的图形数据行，不再重试
+                try:
+                    symbol_data = self.get_parsed_component(lcsc_id, 'symbol', component_data)
+                    parse_error = None
+                except EasyedaShapeParseError as e:
+                    symbol_data = None
+                    parse_error = e
                 
-                if not success:
-                    error_msg = f"最终失败 - 未找到符号数据: {lcsc_id}"
-                    self.logger.warning(error_msg)
+                if parse_error:
+                    error_msg = f"符号数据解析失败: {lcsc_id}: {parse_error}"
+                    self.logger.error(error_msg)
                     export_status['symbol']['success'] = False
                     export_status['symbol']['message'] = error_msg
                 elif not symbol_data:
@@ -527,29 +954,24 @@ class ExportWorker(QThread):
                     export_status['symbol']['success'] = False
                     export_status['symbol']['message'] = error_msg
                 else:
-                    symbol_exporter = ExporterSymbolKicad(
-                        symbol=symbol_data, 
-                        kicad_version=kicad_version
+                    kicad_symbol_str = self.conversion_executor.run(
+                        render_symbol, symbol_data, kicad_version, lib_name
                     )
-                    kicad_symbol_str = symbol_exporter.export(
-                        footprint_lib_name=lib_name
+                    
+                    # 符号库由分片策略决定，只在第一次使用时加载，新文件在写回时创建
+                    symbol_lib_path = symbol_lib_sharding.get_lib_path(
+                        get_symbol_name(kicad_symbol_str, kicad_version),
+                        symbol_data.info.prefix
+                    )
+                    # count策略下符号在写入线程确认写入后才计入分片，没有写入的符号释放预留的位置
+                    symbol_lib_writer = self.get_symbol_lib_writer(
+                        symbol_lib_path, kicad_version, on_stored=symbol_lib_sharding.record_stored
                     )
                     
-                    # 线程安全的符号库文件操作
-                    with symbol_lib_lock:
-                        if not id_already_in_symbol_lib(
-                            lib_path=str(symbol_lib_path),
-                            component_name=symbol_data.info.name,
-                            kicad_version=kicad_version,
-                        ):
-                            add_component_in_symbol_lib_file(
-                                lib_path=str(symbol_lib_path),
-                                component_content=kicad_symbol_str,
-                                kicad_version=kicad_version,
-                            )
-                            self.logger.info(f"添加符号到库文件: {symbol_data.info.name}")
-                        else:
-                            self.logger.info(f"符号已存在，跳过: {symbol_data.info.name}")
+                    # 符号交给符号库的写入线程，按名称去重后添加到内存中的符号库，
+                    # 文件在批量结束时（或检查点）写回，当前线程不等待符号库I/O
+                    symbol_lib_writer.submit(kicad_symbol_str)
+                    self.logger.info(f"符号已加入符号库写入队列: {symbol_data.info.name}")
                     
                     files_created.append(str(symbol_lib_path.absolute()))
                     export_status['symbol']['success'] = True
@@ -563,37 +985,17 @@ class ExportWorker(QThread):
             # 导出封装 (with 3D model reference if available)
             if export_options.get('footprint', True) and component_data:
                 self.logger.info(f"转换封装: {lcsc_id}")
-                # 不在开始时立即更新进度，而是在重试过程中更新
-                # 尝试多次获取封装数据，以应对网络问题
-                footprint_data = None
-                success = False
-                for attempt in range(self.max_retries + 1):  # 使用配置的重试次数
-                    # 移除重试过程中的进度更新调用，避免进度条闪烁
-                    # if attempt > 0:
-                    #     self.update_progress(f"{lcsc_id} - 封装重试 {attempt}/3...")
-                    
-                    footprint_importer = EasyedaFootprintImporter(easyeda_cp_cad_data=component_data)
-                    footprint_data = footprint_importer.get_footprint()
-                    
-                    if footprint_data:
-                        success = True
-                        if attempt > 0:  # 如果不是第一次就成功，记录重试成功
-                            self.logger.info(f"第{attempt + 1}次尝试成功获取封装数据: {lcsc_id}")
-                            # 移除重试成功时的进度更新调用
-                            # self.update_progress(f"{lcsc_id} - 封装重试成功")
-                        break  # 成功获取到封装数据，跳出循环
-                    else:
-                        self.logger.warning(f"第{attempt + 1}次尝试获取封装数据失败: {lcsc_id}")
-                        if attempt < self.max_retries:  # 不是最后一次尝试，等待后重试
-                            # 使用配置的重试延迟时间
-                            wait_time = self.retry_delay * (2 ** attempt)  # 指数退避
-                            time.sleep(wait_time)
+                # 解析是确定性的，失败时立即报告出错的图形数据行，不再重试
+                try:
+                    footprint_data = self.get_parsed_component(lcsc_id, 'footprint', component_data)
+                    parse_error = None
+                except EasyedaShapeParseError as e:
+                    footprint_data = None
+                    parse_error = e
                 
-                if not success:
-                    error_msg = f"最终失败 - 未找到封装数据: {lcsc_id}"
-                    self.logger.warning(error_msg)
-                    # 移除获取失败时的进度更新调用
-                    # self.update_progress(f"{lcsc_id} - 封装获取失败")
+                if parse_error:
+                    error_msg = f"封装数据解析失败: {lcsc_id}: {parse_error}"
+                    self.logger.error(error_msg)
                     export_status['footprint']['success'] = False
                     export_status['footprint']['message'] = error_msg
                 elif not footprint_data:
@@ -602,18 +1004,55 @@ class ExportWorker(QThread):
                     export_status['footprint']['success'] = False
                     export_status['footprint']['message'] = error_msg
                 else:
-                    footprint_exporter = ExporterFootprintKicad(footprint=footprint_data)
                     footprint_filename = footprint_dir / f"{footprint_data.info.name}.kicad_mod"
                     
                     # Set 3D model path for footprint reference
                     model_3d_path = base_folder / lib_name
-                    footprint_exporter.export(
-                        footprint_full_path=str(footprint_filename),
-                        model_3d_path=str(model_3d_path)
-                    )
+                    wrl_extension = get_wrl_extension(self.compress_wrl)
+                    # 封装数据和影响输出的选项相同时封装文件完全相同
+                    footprint_hash = compute_payload_hash(component_data, FOOTPRINT_PAYLOAD_KEYS)
+                    footprint_options_hash = compute_options_hash({
+                        'model_3d_path': str(model_3d_path),
+                        'wrl_extension': wrl_extension,
+                    })
+                    footprint_key = f"{footprint_hash}:{footprint_options_hash}"
+                    
+                    with self.get_footprint_lock(footprint_filename):
+                        footprint_manifest = None
+                        if self.footprint_manifest_enabled and ModelManifest is not None:
+                            footprint_manifest = self.get_footprint_manifest(footprint_dir)
+                        
+                        if self.exported_footprints.get(footprint_filename) == footprint_key:
+                            self.logger.info(f"封装已在本批量中导出，复用: {footprint_filename}")
+                        elif footprint_manifest is not None and footprint_manifest.get_up_to_date_files(
+                            footprint_data.info.name, footprint_hash, footprint_options_hash
+                        ):
+                            self.exported_footprints[footprint_filename] = footprint_key
+                            self.logger.info(f"封装已是最新，跳过: {footprint_filename}")
+                        else:
+                            if footprint_filename in self.exported_footprints:
+                                self.logger.warning(
+                                    f"封装 {footprint_filename.name} 与本批量中已导出的同名封装数据不同，将被覆盖"
+                                )
+                            # 封装转换在转换执行器中进行，文件写入留在当前线程
+                            ki_footprint_str = self.conversion_executor.run(
+                                render_footprint, footprint_data, str(model_3d_path), wrl_extension
+                            )
+                            # 原子写入，内容未改变时不改写文件，修改时间保持不变
+                            write_result = write_text_atomic(footprint_filename, ki_footprint_str)
+                            self.write_stats.add(write_result)
+                            self.exported_footprints[footprint_filename] = footprint_key
+                            if footprint_manifest is not None:
+                                footprint_manifest.record(
+                                    footprint_data.info.name, footprint_hash,
+                                    footprint_options_hash, [footprint_filename]
+                                )
+                            if write_result.written:
+                                self.logger.info(f"保存封装: {footprint_filename}")
+                            else:
+                                self.logger.info(f"封装内容未改变，保留原文件: {footprint_filename}")
                     
                     files_created.append(str(footprint_filename.absolute()))
-                    self.logger.info(f"保存封装: {footprint_filename}")
                     export_status['footprint']['success'] = True
                     export_status['footprint']['message'] = "封装导出成功"
             elif export_options.get('footprint', True) and not component_data:
@@ -661,86 +1100,17 @@ class ExportWorker(QThread):
                     export_status['datasheet']['success'] = False
                     export_status['datasheet']['message'] = error_msg
             
+            if model_3d_job is not None:
+                # 3D模型写入后才能确定元件的最终结果，返回3D阶段的Future
+                self.model3d_queued.emit(lcsc_id)
+                return self.model_3d_executor.submit(
+                    self.finish_component_with_model_3d, lcsc_id, *model_3d_job,
+                    export_options, export_status, files_created, base_folder
+                )
+            
             # 处理完成，更新最终进度
             self.update_completed_progress(f"{lcsc_id}")
-            
-            # 根据导出状态确定整体结果
-            selected_options = [k for k, v in export_options.items() if v]
-            successful_options = [k for k, v in export_status.items() if v['success']]
-            failed_options = [k for k, v in export_status.items() if not v['success'] and export_options.get(k, False)]
-            
-            # 打印转换总结
-            self.logger.info("=" * 80)
-            self.logger.info(f"转换总结 - {lcsc_id}")
-            self.logger.info("=" * 80)
-            self.logger.info(f"成功的选项 ({len(successful_options)}/{len(selected_options)}):")
-            option_names = {'symbol': '符号', 'footprint': '封装', 'model3d': '3D模型', 'datasheet': '数据手册'}
-            for opt in successful_options:
-                self.logger.info(f"   ✓ {option_names.get(opt, opt)}")
-            
-            if failed_options:
-                self.logger.info(f"失败的选项 ({len(failed_options)}/{len(selected_options)}):")
-                for opt in failed_options:
-                    self.logger.info(f"   ✗ {option_names.get(opt, opt)}: {export_status[opt]['message']}")
-            
-            self.logger.info(f"生成的文件 ({len(files_created)} 个):")
-            for file_path in files_created:
-                self.logger.info(f"   - {Path(file_path).name}")
-            
-            self.logger.info(f"导出路径: {base_folder.absolute()}")
-            self.logger.info("=" * 80)
-            
-            # 如果没有选择任何导出选项，视为成功
-            if not selected_options:
-                return {
-                    "success": True,
-                    "componentId": lcsc_id,
-                    "message": f"元件 {lcsc_id} 转换成功（未选择任何导出选项）",
-                    "files": files_created,
-                    "export_path": str(base_folder.absolute()),
-                    "export_status": export_status
-                }
-            
-            # 如果所有选择的选项都成功，视为完全成功
-            if len(successful_options) == len(selected_options):
-                return {
-                    "success": True,
-                    "componentId": lcsc_id,
-                    "message": f"元件 {lcsc_id} 转换成功",
-                    "files": files_created,
-                    "export_path": str(base_folder.absolute()),
-                    "export_status": export_status
-                }
-            
-            # 如果没有任何选项成功，视为完全失败
-            if len(successful_options) == 0:
-                error_messages = [export_status[opt]['message'] for opt in selected_options if export_status[opt]['message']]
-                error_msg = "; ".join(error_messages) if error_messages else "所有选择的导出选项都失败了"
-                return {
-                    "success": False,
-                    "componentId": lcsc_id,
-                    "message": error_msg,
-                    "files": files_created,
-                    "export_path": str(base_folder.absolute()),
-                    "export_status": export_status
-                }
-            
-            # 如果部分选项成功，视为部分成功
-            success_msg = f"部分成功: {', '.join(successful_options)} 导出成功"
-            if failed_options:
-                failed_msg = f"{', '.join(failed_options)} 导出失败"
-                message = f"{success_msg}; {failed_msg}"
-            else:
-                message = success_msg
-                
-            return {
-                "success": "partial",  # 使用特殊值表示部分成功
-                "componentId": lcsc_id,
-                "message": message,
-                "files": files_created,
-                "export_path": str(base_folder.absolute()),
-                "export_status": export_status
-            }
+            return self.build_component_result(lcsc_id, export_options, export_status, files_created, base_folder)
             
         except Exception as e:
             error_msg = f"转换失败: {str(e)}"